@@ -0,0 +1,112 @@
+# lookup_cache.py
+# Read-through cache for sandbox lookups, scoped to one agent turn and invalidated by sandbox writes
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+SANDBOX_TABLES = ("customers", "merchants", "drivers", "orders", "transactions", "complaints",
+                  "delivery_logs", "officers")
+
+# One version per table, bumped by every SandboxDatabase write to it. A cached lookup is stale
+# only when a table it reads has moved on, so a refund in one conversation does not flush
+# another turn's merchant or driver lookups.
+_table_versions = dict.fromkeys(SANDBOX_TABLES, 0)
+_write_lock = threading.Lock()
+
+_current_scope = contextvars.ContextVar("sandbox_lookup_scope", default=None)
+
+
+def table_versions(tables) -> tuple:
+    return tuple(_table_versions[table] for table in tables)
+
+
+class LookupScope:
+    """Lookup results and hit counts for one turn; shared by the threads working on that turn"""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.hits_by_lookup = {}
+
+    def get(self, key, tables):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                versions, value = entry
+                if versions == table_versions(tables):
+                    self.hits += 1
+                    self.hits_by_lookup[key[0]] = self.hits_by_lookup.get(key[0], 0) + 1
+                    return True, value
+                self.invalidations += 1
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, tables, versions, value):
+        with self.lock:
+            # A write to one of its tables while the lookup ran makes its result stale
+            if versions == table_versions(tables):
+                self.entries[key] = (versions, value)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hits_by_lookup": dict(self.hits_by_lookup)
+            }
+
+
+@contextmanager
+def lookup_scope():
+    """Cache sandbox lookups made inside the block (one agent turn); yields the LookupScope"""
+    scope = LookupScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def cached_lookup(*tables):
+    """Decorator for read-only sandbox functions that read the given tables; only caches inside a lookup_scope"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            scope = _current_scope.get()
+            if scope is None:
+                return func(*args, **kwargs)
+
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            found, value = scope.get(key, tables)
+            if found:
+                return value
+            versions = table_versions(tables)
+            value = func(*args, **kwargs)
+            scope.put(key, tables, versions, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidates_lookups(*tables):
+    """Decorator for SandboxDatabase methods that change data in the given tables (all of them if none given)"""
+    tables = tables or SANDBOX_TABLES
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with _write_lock:
+                    for table in tables:
+                        _table_versions[table] += 1
+        return wrapper
+    return decorator
@@ -3,12 +3,66 @@
 
 import json
 import random
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import uuid
 
+from config import get_setting
+from lookup_cache import invalidates_lookups
+from sandbox_records import ComplaintRecord, CustomerRecord, OrderRecord, TransactionRecord
+
+# Secondary indexes: field -> value -> {record_id: None} (a dict keeps insertion order, so
+# histories come back oldest first, and removes in O(1) when a record's status changes)
+ORDER_INDEX_FIELDS = ("customer_id", "merchant_id", "driver_id", "status")
+COMPLAINT_INDEX_FIELDS = ("customer_id", "order_id")
+
+# Customer, merchant and driver records are guarded by one of these striped locks, so writes
+# to different entities rarely wait on each other without keeping a lock per record
+ENTITY_LOCK_STRIPES = 64
+
+# Tables whose records are stored as slotted sandbox_records when compact_records is on
+RECORD_TYPES = {
+    "customers": CustomerRecord,
+    "orders": OrderRecord,
+    "transactions": TransactionRecord,
+    "complaints": ComplaintRecord
+}
+
+
+def _index_add(index: Dict, value, record_id: str):
+    index.setdefault(value, {})[record_id] = None
+
+
+def _index_remove(index: Dict, value, record_id: str):
+    ids = index.get(value)
+    if ids is not None:
+        ids.pop(record_id, None)
+        if not ids:
+            del index[value]
+
+
+def _highest_id_number(record_ids, prefix: str) -> int:
+    """Largest N among IDs shaped like PREFIX_N (0 if there are none)"""
+    numbers = (record_id[len(prefix) + 1:] for record_id in record_ids if record_id.startswith(prefix + "_"))
+    return max((int(number) for number in numbers if number.isdigit()), default=0)
+
+
 class SandboxDatabase:
-    def __init__(self):
+    """
+    In-memory sandbox data. Orders, complaints and officer statuses have secondary indexes, so
+    they must be changed through the write methods below rather than by editing the dicts.
+
+    Safe to share between request threads: IDs come from atomic counters, each table and its
+    indexes have their own lock, and entity records (wallets, logs) are updated under a striped
+    per-entity lock. Table locks are always taken before entity locks, never the other way round.
+
+    With compact_records, customers, orders, transactions and complaints are kept as slotted
+    dict-compatible records (sandbox_records) instead of dicts, a fraction of the memory per row.
+    """
+
+    def __init__(self, compact_records: bool = True):
+        self.compact_records = compact_records
         self.customers = {}
         self.merchants = {}
         self.drivers = {}
@@ -18,6 +72,80 @@ class SandboxDatabase:
         self.delivery_logs = {}
         self.customer_care_officers = {}
         self._initialize_data()
+        self.customers = {customer_id: self._record("customers", customer) for customer_id, customer in self.customers.items()}
+        self._rebuild_indexes()
+        self.table_locks = {table: threading.Lock() for table in ("orders", "transactions", "complaints", "officers")}
+        self.entity_locks = [threading.Lock() for _ in range(ENTITY_LOCK_STRIPES)]
+        # Next sequence number per table, only read and advanced under that table's lock
+        self.next_ids = {
+            "orders": _highest_id_number(self.orders, "ORD") + 1,
+            "transactions": _highest_id_number(self.transactions, "REF") + 1,
+            "complaints": _highest_id_number(self.complaints, "COMP") + 1
+        }
+    
+    def _record(self, table: str, record: Dict) -> Dict:
+        if not self.compact_records or isinstance(record, RECORD_TYPES[table]):
+            return record
+        return RECORD_TYPES[table](record)
+    
+    def _entity_lock(self, table: str, record_id: str) -> threading.Lock:
+        return self.entity_locks[hash((table, record_id)) % ENTITY_LOCK_STRIPES]
+    
+    def _next_id(self, table: str, prefix: str, existing: Dict) -> str:
+        """Allocate the next ID for a table, skipping any already taken; call with the table's lock held"""
+        while True:
+            record_id = f"{prefix}_{self.next_ids[table]:03d}"
+            self.next_ids[table] += 1
+            if record_id not in existing:
+                return record_id
+    
+    def _skip_loaded_ids(self, table: str, prefix: str, records: List[Dict]):
+        """Move a table's sequence past the highest ID in a bulk load, so sparse or high IDs are never reissued"""
+        self.next_ids[table] = max(self.next_ids[table], _highest_id_number((record["id"] for record in records), prefix) + 1)
+    
+    def _rebuild_indexes(self):
+        """Build every secondary index from the primary tables"""
+        self.order_index = {field: {} for field in ORDER_INDEX_FIELDS}
+        self.complaint_index = {field: {} for field in COMPLAINT_INDEX_FIELDS}
+        self.officers_by_status = {}
+        for order in self.orders.values():
+            self._index_order(order)
+        for complaint in self.complaints.values():
+            for field in COMPLAINT_INDEX_FIELDS:
+                _index_add(self.complaint_index[field], complaint[field], complaint["id"])
+        for officer in self.customer_care_officers.values():
+            _index_add(self.officers_by_status, officer["current_status"], officer["id"])
+    
+    def _index_order(self, order: Dict):
+        for field in ORDER_INDEX_FIELDS:
+            _index_add(self.order_index[field], order[field], order["id"])
+    
+    def _store_order(self, order: Dict) -> str:
+        # Caller holds the orders lock
+        order = self._record("orders", order)
+        previous = self.orders.get(order["id"])
+        if previous is not None:
+            for field in ORDER_INDEX_FIELDS:
+                _index_remove(self.order_index[field], previous[field], previous["id"])
+        self.orders[order["id"]] = order
+        self._index_order(order)
+        return order["id"]
+    
+    def _orders_for(self, field: str, value) -> List[Dict]:
+        with self.table_locks["orders"]:
+            return [self.orders[order_id] for order_id in self.order_index[field].get(value, ())]
+    
+    def _complaints_for(self, field: str, value) -> List[Dict]:
+        with self.table_locks["complaints"]:
+            return [self.complaints[complaint_id] for complaint_id in self.complaint_index[field].get(value, ())]
+    
+    def _append_log(self, table: Dict, table_name: str, record_id: str, field: str, entry: str) -> bool:
+        with self._entity_lock(table_name, record_id):
+            record = table.get(record_id)
+            if record is None:
+                return False
+            record.setdefault(field, []).append(entry)
+            return True
     
     def _initialize_data(self):
         """Initialize the sandbox with minimal realistic data"""
@@ -149,6 +277,10 @@ class SandboxDatabase:
         """Get merchant information"""
         return self.merchants.get(merchant_id)
     
+    def get_all_merchants(self) -> List[Dict]:
+        """Get every merchant"""
+        return list(self.merchants.values())
+    
     def get_driver_details(self, driver_id: str) -> Optional[Dict]:
         """Get driver information"""
         return self.drivers.get(driver_id)
@@ -163,18 +295,38 @@ class SandboxDatabase:
     
     def get_customer_order_history(self, customer_id: str) -> List[Dict]:
         """Get all orders for a customer"""
-        return [order for order in self.orders.values() if order["customer_id"] == customer_id]
+        return self._orders_for("customer_id", customer_id)
+    
+    def get_merchant_orders(self, merchant_id: str) -> List[Dict]:
+        """Get all orders placed with a merchant"""
+        return self._orders_for("merchant_id", merchant_id)
+    
+    def get_driver_orders(self, driver_id: str) -> List[Dict]:
+        """Get all orders delivered by a driver"""
+        return self._orders_for("driver_id", driver_id)
+    
+    def get_orders_by_status(self, status: str) -> List[Dict]:
+        """Get all orders currently in a status"""
+        return self._orders_for("status", status)
+    
+    def get_customer_complaints(self, customer_id: str) -> List[Dict]:
+        """Get all complaints logged by a customer"""
+        return self._complaints_for("customer_id", customer_id)
+    
+    def get_order_complaints(self, order_id: str) -> List[Dict]:
+        """Get all complaints logged against an order"""
+        return self._complaints_for("order_id", order_id)
     
     def get_merchant_recent_issues(self, merchant_id: str) -> List[str]:
         """Get recent quality issues for a merchant"""
         merchant = self.merchants.get(merchant_id)
         return merchant["quality_issues"] if merchant else []
     
+    @invalidates_lookups("transactions", "customers")
     def process_refund(self, customer_id: str, amount: float, reason: str) -> Dict:
         """Process a refund transaction"""
-        txn_id = f"REF_{len(self.transactions) + 1:03d}"
-        refund_txn = {
-            "id": txn_id,
+        refund_txn = self._record("transactions", {
+            "id": None,  # allocated under the transactions lock below
             "customer_id": customer_id,
             "amount": amount,
             "type": "refund",
@@ -182,20 +334,23 @@ class SandboxDatabase:
             "status": "processed",
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "reference": f"REFUND_REF_{random.randint(10000, 99999)}"
-        }
-        self.transactions[txn_id] = refund_txn
+        })
+        with self.table_locks["transactions"]:
+            refund_txn["id"] = self._next_id("transactions", "REF", self.transactions)
+            self.transactions[refund_txn["id"]] = refund_txn
         
-        # Update customer wallet balance
-        if customer_id in self.customers:
-            self.customers[customer_id]["wallet_balance"] += amount
+        # Update customer wallet balance (+= is a read and a write, so two refunds could interleave)
+        with self._entity_lock("customers", customer_id):
+            if customer_id in self.customers:
+                self.customers[customer_id]["wallet_balance"] += amount
         
         return refund_txn
     
+    @invalidates_lookups("complaints", "customers")
     def log_complaint(self, customer_id: str, order_id: str, issue_type: str, details: str) -> str:
         """Log a customer complaint"""
-        complaint_id = f"COMP_{len(self.complaints) + 1:03d}"
-        complaint = {
-            "id": complaint_id,
+        complaint = self._record("complaints", {
+            "id": None,  # allocated under the complaints lock below
             "customer_id": customer_id,
             "order_id": order_id,
             "issue_type": issue_type,
@@ -203,21 +358,25 @@ class SandboxDatabase:
             "status": "open",
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "resolution": None
-        }
-        self.complaints[complaint_id] = complaint
+        })
+        with self.table_locks["complaints"]:
+            complaint_id = complaint["id"] = self._next_id("complaints", "COMP", self.complaints)
+            self.complaints[complaint_id] = complaint
+            for field in COMPLAINT_INDEX_FIELDS:
+                _index_add(self.complaint_index[field], complaint[field], complaint_id)
         
         # Update customer complaint history
-        if customer_id in self.customers:
-            self.customers[customer_id]["complaint_history"].append(complaint_id)
+        self._append_log(self.customers, "customers", customer_id, "complaint_history", complaint_id)
         
         return complaint_id
     
     def get_available_customer_care_officer(self, specialization: str = None) -> Optional[Dict]:
         """Get an available customer care officer, optionally by specialization"""
-        available_officers = [
-            officer for officer in self.customer_care_officers.values()
-            if officer["current_status"] == "available"
-        ]
+        with self.table_locks["officers"]:
+            available_officers = [
+                self.customer_care_officers[officer_id]
+                for officer_id in self.officers_by_status.get("available", ())
+            ]
         
         if not available_officers:
             return None
@@ -234,50 +393,43 @@ class SandboxDatabase:
         # Return any available officer
         return available_officers[0]
     
+    def _set_officer_status(self, officer_id: str, status: str) -> bool:
+        with self.table_locks["officers"]:
+            officer = self.customer_care_officers.get(officer_id)
+            if officer is None:
+                return False
+            _index_remove(self.officers_by_status, officer["current_status"], officer_id)
+            officer["current_status"] = status
+            _index_add(self.officers_by_status, status, officer_id)
+            return True
+    
+    @invalidates_lookups("officers")
     def assign_customer_care_officer(self, officer_id: str) -> bool:
         """Mark a customer care officer as busy"""
-        if officer_id in self.customer_care_officers:
-            self.customer_care_officers[officer_id]["current_status"] = "busy"
-            return True
-        return False
+        return self._set_officer_status(officer_id, "busy")
     
+    @invalidates_lookups("officers")
     def release_customer_care_officer(self, officer_id: str) -> bool:
         """Mark a customer care officer as available again"""
-        if officer_id in self.customer_care_officers:
-            self.customer_care_officers[officer_id]["current_status"] = "available"
-            return True
-        return False
+        return self._set_officer_status(officer_id, "available")
     
+    @invalidates_lookups("merchants")
     def log_merchant_feedback(self, merchant_id: str, issue: str, severity: str) -> bool:
         """Log feedback against a merchant"""
-        if merchant_id in self.merchants:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            feedback_entry = f"{timestamp}: {severity.upper()} - {issue}"
-            
-            if "feedback_log" not in self.merchants[merchant_id]:
-                self.merchants[merchant_id]["feedback_log"] = []
-            
-            self.merchants[merchant_id]["feedback_log"].append(feedback_entry)
-            return True
-        return False
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        feedback_entry = f"{timestamp}: {severity.upper()} - {issue}"
+        return self._append_log(self.merchants, "merchants", merchant_id, "feedback_log", feedback_entry)
     
+    @invalidates_lookups("drivers")
     def exonerate_driver(self, driver_id: str, reason: str) -> bool:
         """Clear driver of fault"""
-        if driver_id in self.drivers:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            exoneration_entry = f"{timestamp}: EXONERATED - {reason}"
-            
-            if "exoneration_log" not in self.drivers[driver_id]:
-                self.drivers[driver_id]["exoneration_log"] = []
-            
-            self.drivers[driver_id]["exoneration_log"].append(exoneration_entry)
-            return True
-        return False
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        exoneration_entry = f"{timestamp}: EXONERATED - {reason}"
+        return self._append_log(self.drivers, "drivers", driver_id, "exoneration_log", exoneration_entry)
     
+    @invalidates_lookups("orders")
     def create_order_from_description(self, customer_description: str, amount: float = None) -> str:
         """Create an order dynamically based on customer description"""
-        order_id = f"ORD_{len(self.orders) + 1:03d}"
-        
         # Extract basic details or use defaults
         customer_id = "C001"  # Default customer
         merchant_id = "M001"  # Default merchant
@@ -285,7 +437,7 @@ class SandboxDatabase:
         
         # Create a generic order based on description
         order = {
-            "id": order_id,
+            "id": None,  # allocated under the orders lock below
             "customer_id": customer_id,
             "merchant_id": merchant_id,
             "driver_id": driver_id,
@@ -298,8 +450,79 @@ class SandboxDatabase:
             "issue_reported": None
         }
         
-        self.orders[order_id] = order
-        return order_id
+        with self.table_locks["orders"]:
+            order["id"] = self._next_id("orders", "ORD", self.orders)
+            return self._store_order(order)
+    
+    @invalidates_lookups("orders")
+    def add_order(self, order: Dict) -> str:
+        """Insert (or replace) a complete order record, e.g. from a data import"""
+        with self.table_locks["orders"]:
+            return self._store_order(order)
+    
+    @invalidates_lookups("orders")
+    def update_order_status(self, order_id: str, status: str) -> bool:
+        """Move an order to a new status"""
+        with self.table_locks["orders"]:
+            order = self.orders.get(order_id)
+            if order is None:
+                return False
+            _index_remove(self.order_index["status"], order["status"], order_id)
+            order["status"] = status
+            _index_add(self.order_index["status"], status, order_id)
+            return True
+
+    @invalidates_lookups()
+    def bulk_load(self, table: str, records: List[Dict]) -> int:
+        """Insert (or replace) a batch of complete records, e.g. from sandbox_generator"""
+        if table == "customers":
+            self.customers.update((record["id"], self._record("customers", record)) for record in records)
+        elif table in ("merchants", "drivers"):
+            getattr(self, table).update((record["id"], record) for record in records)
+        elif table == "delivery_logs":
+            self.delivery_logs.update((record["order_id"], record) for record in records)
+        elif table == "orders":
+            with self.table_locks["orders"]:
+                for order in records:
+                    self._store_order(order)
+                self._skip_loaded_ids("orders", "ORD", records)
+        elif table == "complaints":
+            with self.table_locks["complaints"]:
+                for complaint in records:
+                    complaint = self._record("complaints", complaint)
+                    previous = self.complaints.get(complaint["id"])
+                    if previous is not None:
+                        for field in COMPLAINT_INDEX_FIELDS:
+                            _index_remove(self.complaint_index[field], previous[field], previous["id"])
+                    self.complaints[complaint["id"]] = complaint
+                    for field in COMPLAINT_INDEX_FIELDS:
+                        _index_add(self.complaint_index[field], complaint[field], complaint["id"])
+                self._skip_loaded_ids("complaints", "COMP", records)
+        elif table == "officers":
+            with self.table_locks["officers"]:
+                for officer in records:
+                    previous = self.customer_care_officers.get(officer["id"])
+                    if previous is not None:
+                        _index_remove(self.officers_by_status, previous["current_status"], previous["id"])
+                    self.customer_care_officers[officer["id"]] = officer
+                    _index_add(self.officers_by_status, officer["current_status"], officer["id"])
+        else:
+            raise ValueError(f"Unknown sandbox table: {table}")
+        return len(records)
+
+
+def create_sandbox_database(backend_name: str, sqlite_path: str, compact_records: bool = True):
+    """Build the configured sandbox engine: in-process dicts, or a durable SQLite file"""
+    if backend_name == "memory":
+        return SandboxDatabase(compact_records)
+    if backend_name == "sqlite":
+        from sandbox_sqlite import SQLiteSandboxDatabase
+        return SQLiteSandboxDatabase(sqlite_path, seed=SandboxDatabase())
+    raise ValueError(f"Unknown SANDBOX_BACKEND '{backend_name}'. Use memory or sqlite.")
 
 # Global sandbox instance
-sandbox_db = SandboxDatabase()
+sandbox_db = create_sandbox_database(
+    get_setting("SANDBOX_BACKEND", "memory"),
+    sqlite_path=get_setting("SANDBOX_SQLITE_PATH", "sandbox.db"),
+    compact_records=get_setting("SANDBOX_COMPACT_RECORDS", "on") == "on"
+)
@@ -0,0 +1,317 @@
+# sandbox_generator.py
+# Seeded, streaming synthetic data for load-testing the sandbox: customers, merchants with menus,
+# drivers, officers, orders, delivery logs and complaints at production scale. Records are
+# yielded one at a time and written in batches, so memory stays bounded however many are made.
+#
+# Usage:
+#   python Sandbox/sandbox_generator.py --customers 50000 --orders 1000000 --backend sqlite --path load.db
+#   python Sandbox/sandbox_generator.py --orders 10000 --jsonl sample.jsonl
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rahul", "Meera",
+               "John", "Sarah", "Wei", "Maria", "Omar", "Fatima", "Liam", "Aisha", "Kenji", "Nadia"]
+LAST_NAMES = ["Sharma", "Patel", "Singh", "Gupta", "Reddy", "Iyer", "Khan", "Das", "Mehta", "Nair",
+              "Smith", "Chen", "Santos", "Kumar", "Wilson", "Ali", "Tanaka", "Johnson", "Verma", "Joshi"]
+AREAS = ["Sector 15, Noida", "Indiranagar, Bengaluru", "Bandra West, Mumbai", "Saket, Delhi", "Gachibowli, Hyderabad",
+         "Koramangala, Bengaluru", "Powai, Mumbai", "Salt Lake, Kolkata", "Anna Nagar, Chennai", "Baner, Pune"]
+MERCHANT_WORDS = (["Spice", "Golden", "Royal", "Urban", "Green", "Tandoor", "Coastal", "Street", "Fusion", "Little"],
+                  ["Kitchen", "Garden", "House", "Corner", "Express", "Bistro", "Dhaba", "Cafe", "Grill", "Bowl"])
+
+# cuisine -> (dish, category, low price, high price)
+MENUS = {
+    "north_indian": [("butter chicken", "main", 280, 420), ("dal makhani", "main", 180, 280), ("garlic naan", "side", 50, 90),
+                     ("paneer tikka", "starter", 220, 320), ("lassi", "beverage", 60, 120), ("gulab jamun", "dessert", 60, 110)],
+    "south_indian": [("masala dosa", "main", 90, 160), ("idli sambar", "main", 60, 110), ("medu vada", "side", 50, 90),
+                     ("filter coffee", "beverage", 30, 60), ("payasam", "dessert", 70, 120)],
+    "chinese": [("hakka noodles", "main", 160, 260), ("chilli chicken", "main", 220, 320), ("fried rice", "main", 150, 240),
+                ("spring rolls", "starter", 120, 200), ("manchow soup", "starter", 100, 160)],
+    "pizza": [("margherita pizza", "main", 199, 349), ("farmhouse pizza", "main", 299, 499), ("garlic bread", "side", 99, 169),
+              ("pasta alfredo", "main", 229, 329), ("cola", "beverage", 40, 70), ("choco lava cake", "dessert", 99, 149)],
+    "burgers": [("chicken burger", "main", 149, 249), ("veg burger", "main", 99, 179), ("fries", "side", 79, 129),
+                ("milkshake", "beverage", 119, 189), ("onion rings", "side", 89, 139)],
+    "biryani": [("chicken biryani", "main", 240, 360), ("mutton biryani", "main", 320, 460), ("veg biryani", "main", 180, 260),
+                ("raita", "side", 40, 70), ("double ka meetha", "dessert", 90, 140)],
+}
+CUISINES = list(MENUS)
+ORDER_STATUSES = ["delivered"] * 90 + ["cancelled"] * 4 + ["in_transit"] * 3 + ["preparing"] * 3
+ISSUE_TYPES = ["late_delivery", "wrong_order", "missing_items", "spilled_food", "cold_food", "quality_issue"]
+OFFICER_SPECIALIZATIONS = ["Order Issues & Refunds", "Delivery & Driver Issues", "Payment & Wallet Issues", "General Support"]
+
+# Share of customers who complain about a large fraction of their orders
+REPEAT_COMPLAINER_SHARE = 0.03
+REPEAT_COMPLAINT_RATE = 0.35
+COMPLAINT_RATE = 0.02
+MAX_ORDERS_PER_CUSTOMER = 5000
+START = datetime(2024, 1, 1)
+
+# Generated IDs continue after the sandbox's seed records (C001, M001, D001, CCO001-CCO004)
+FIRST_GENERATED = {"customers": 2, "merchants": 2, "drivers": 2, "officers": 5}
+
+
+def skewed_index(rng: random.Random, count: int, skew: float) -> int:
+    """0..count-1, with low indexes far more likely the larger skew is (skew 1 is uniform)"""
+    return min(int(count * rng.random() ** skew), count - 1)
+
+
+def entity_rng(seed: int, kind: str, number: int) -> random.Random:
+    """Per-entity generator, so each merchant, driver or officer is the same whatever else is generated"""
+    return random.Random(f"{seed}:{kind}:{number}")
+
+
+def merchant_menu(seed: int, number: int):
+    rng = entity_rng(seed, "merchant", number)
+    cuisine = rng.choice(CUISINES)
+    menu = {
+        dish: {"price": rng.randint(low // 10, high // 10) * 10, "available": rng.random() > 0.05, "category": category}
+        for dish, category, low, high in MENUS[cuisine]
+    }
+    return rng, cuisine, menu
+
+
+def make_merchant(seed: int, number: int) -> dict:
+    rng, cuisine, menu = merchant_menu(seed, number)
+    return {
+        "id": f"M{number:03d}",
+        "name": f"{rng.choice(MERCHANT_WORDS[0])} {rng.choice(MERCHANT_WORDS[1])}",
+        "type": cuisine,
+        "cuisine_type": cuisine.replace("_", " ").title(),
+        "rating": round(rng.uniform(3.2, 4.9), 1),
+        "address": rng.choice(AREAS),
+        "phone": f"+91-11{rng.randint(10000000, 99999999)}",
+        "total_orders": rng.randint(100, 50000),
+        "complaint_rate": round(rng.uniform(0.01, 0.12), 3),
+        "avg_preparation_time": rng.randint(8, 35),
+        "status": "active",
+        "menu": menu,
+        "substitution_policy": {"unavailable_items": rng.choice(["contact_customer", "substitute_similar", "refund_item"])},
+        "quality_issues": [],
+        "last_inspection": (START - timedelta(days=rng.randint(0, 365))).strftime("%Y-%m-%d")
+    }
+
+
+def make_driver(seed: int, number: int) -> dict:
+    rng = entity_rng(seed, "driver", number)
+    return {
+        "id": f"D{number:03d}",
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "phone": f"+91-9{rng.randint(100000000, 999999999)}",
+        "vehicle_type": rng.choice(["bike", "bike", "bike", "scooter", "car"]),
+        "rating": round(rng.uniform(3.8, 5.0), 1),
+        "total_deliveries": rng.randint(10, 8000),
+        "current_status": rng.choice(["available", "available", "on_delivery", "offline"]),
+        "location": rng.choice(AREAS),
+        "incidents": [],
+        "delivery_time_avg": rng.randint(15, 45),
+        "cancellation_rate": round(rng.uniform(0.0, 0.08), 3),
+        "earnings_today": float(rng.randint(0, 1500)),
+        "joined_date": (START - timedelta(days=rng.randint(30, 1500))).strftime("%Y-%m-%d")
+    }
+
+
+def make_officer(seed: int, number: int) -> dict:
+    rng = entity_rng(seed, "officer", number)
+    return {
+        "id": f"CCO{number:03d}",
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "specialization": rng.choice(OFFICER_SPECIALIZATIONS),
+        "rating": round(rng.uniform(4.0, 5.0), 1),
+        "cases_handled": rng.randint(50, 3000),
+        "current_status": rng.choice(["available", "available", "busy"]),
+        "languages": ["English"] + rng.sample(["Hindi", "Tamil", "Bengali", "Punjabi", "Marathi"], rng.randint(0, 2)),
+        "shift": rng.choice(["Day", "Night"]),
+        "experience_years": rng.randint(1, 10)
+    }
+
+
+def generate(seed: int = 42, customers: int = 1000, merchants: int = 100, drivers: int = 200, orders: int = 20000,
+             officers: int = 20, merchant_skew: float = 3.0):
+    """
+    Yield (table, record) pairs. Merchants, drivers and officers come first; then each customer
+    is followed by their orders, delivery logs and complaints. Order counts per customer are
+    heavy-tailed, a few hot merchants take most orders (merchant_skew), and a small share of
+    customers complain about many of their orders. Only one customer's orders are held at once,
+    plus each merchant's dish prices, so orders never rebuild a menu from its seed.
+    """
+    # dish -> price per merchant, in menu order; orders pick from these
+    prices = []
+    for number in range(FIRST_GENERATED["merchants"], FIRST_GENERATED["merchants"] + merchants):
+        merchant = make_merchant(seed, number)
+        prices.append({dish: details["price"] for dish, details in merchant["menu"].items()})
+        yield "merchants", merchant
+    for number in range(FIRST_GENERATED["drivers"], FIRST_GENERATED["drivers"] + drivers):
+        yield "drivers", make_driver(seed, number)
+    for number in range(FIRST_GENERATED["officers"], FIRST_GENERATED["officers"] + officers):
+        yield "officers", make_officer(seed, number)
+
+    rng = random.Random(seed)
+    mean_orders = orders / max(customers, 1)
+    order_number = 0
+    complaint_number = 0
+    for number in range(FIRST_GENERATED["customers"], FIRST_GENERATED["customers"] + customers):
+        customer_id = f"C{number:03d}"
+        address = f"Block {rng.choice('ABCDEFGH')}, {rng.choice(AREAS)}"
+        repeat_complainer = rng.random() < REPEAT_COMPLAINER_SHARE
+        complaint_rate = REPEAT_COMPLAINT_RATE if repeat_complainer else COMPLAINT_RATE
+        # Lomax (Pareto minus one, alpha 1.5) has mean 2: most customers order a little, a few a lot
+        order_count = min(round(mean_orders * (rng.paretovariate(1.5) - 1) / 2), MAX_ORDERS_PER_CUSTOMER)
+
+        blocks = []
+        complaint_ids = []
+        for _ in range(order_count):
+            order_number += 1
+            order, delivery_log = make_order(rng, f"ORD_{order_number:03d}", customer_id, address,
+                                             prices, drivers, merchant_skew)
+            complaint = None
+            if rng.random() < complaint_rate:
+                complaint_number += 1
+                complaint = make_complaint(rng, f"COMP_{complaint_number:03d}", order)
+                complaint_ids.append(complaint["id"])
+            blocks.append((order, delivery_log, complaint))
+
+        yield "customers", {
+            "id": customer_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "phone": f"+91-9{rng.randint(100000000, 999999999)}",
+            "email": f"customer{number}@example.com",
+            "address": address,
+            "rating": round(rng.uniform(2.5, 5.0) if repeat_complainer else rng.uniform(3.8, 5.0), 1),
+            "total_orders": order_count,
+            "complaint_history": complaint_ids,
+            "account_status": "active",
+            "wallet_balance": float(rng.randint(0, 2000)),
+            "preferred_payment": rng.choice(["wallet", "upi", "card", "cash"]),
+            "joined_date": (START - timedelta(days=rng.randint(0, 1500))).strftime("%Y-%m-%d")
+        }
+        for order, delivery_log, complaint in blocks:
+            yield "orders", order
+            yield "delivery_logs", delivery_log
+            if complaint:
+                yield "complaints", complaint
+
+
+def make_order(rng: random.Random, order_id: str, customer_id: str, address: str,
+               prices: list, drivers: int, merchant_skew: float):
+    merchant_index = skewed_index(rng, len(prices), merchant_skew)
+    merchant_number = FIRST_GENERATED["merchants"] + merchant_index
+    driver_number = FIRST_GENERATED["drivers"] + skewed_index(rng, drivers, 1.5)
+    menu = prices[merchant_index]
+    dishes = rng.sample(list(menu), rng.randint(1, min(4, len(menu))))
+    items = [{"name": dish, "quantity": rng.choice([1, 1, 1, 2, 3]), "price": menu[dish]} for dish in dishes]
+    total = sum(item["quantity"] * item["price"] for item in items)
+    delivery_charges = rng.choice([0, 25, 30, 40, 50])
+    ordered_at = START + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+    picked_up_at = ordered_at + timedelta(minutes=rng.randint(8, 35))
+    delivered_at = picked_up_at + timedelta(minutes=rng.randint(10, 50))
+    status = rng.choice(ORDER_STATUSES)
+    order = {
+        "id": order_id,
+        "customer_id": customer_id,
+        "merchant_id": f"M{merchant_number:03d}",
+        "driver_id": f"D{driver_number:03d}",
+        "items": items,
+        "total_amount": total,
+        "delivery_charges": delivery_charges,
+        "final_amount": total + delivery_charges,
+        "amount": total + delivery_charges,
+        "order_time": ordered_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "delivery_time": delivered_at.strftime("%Y-%m-%d %H:%M:%S") if status == "delivered" else None,
+        "status": status,
+        "payment_method": rng.choice(["wallet", "upi", "card", "cash"]),
+        "delivery_address": address,
+        "issue_reported": None
+    }
+    delays = [] if rng.random() < 0.8 else [rng.choice(["Traffic congestion", "Restaurant delay", "Rain", "Address not found"])]
+    delivery_log = {
+        "order_id": order_id,
+        "pickup_time": picked_up_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "items_received": [{"name": item["name"], "quantity": item["quantity"]} for item in items],
+        "delivery_attempts": 1 if rng.random() < 0.95 else 2,
+        "route_taken": f"Via {rng.choice(AREAS).split(',')[0]}",
+        "delays": delays,
+        "driver_notes": rng.choice(["Delivered to customer", "Left at door", "Handed to security", "Customer collected"])
+    }
+    return order, delivery_log
+
+
+def make_complaint(rng: random.Random, complaint_id: str, order: dict) -> dict:
+    issue_type = rng.choice(ISSUE_TYPES)
+    order["issue_reported"] = issue_type
+    return {
+        "id": complaint_id,
+        "customer_id": order["customer_id"],
+        "order_id": order["id"],
+        "issue_type": issue_type,
+        "details": f"Customer reported {issue_type.replace('_', ' ')}",
+        "status": rng.choice(["open", "resolved", "resolved", "resolved"]),
+        "timestamp": order["order_time"],
+        "resolution": None
+    }
+
+
+def load_into(database, records, batch_size: int = 5000) -> dict:
+    """Write generated records to any sandbox engine with bulk_load, batch_size at a time per table"""
+    batches = {}
+    counts = {}
+    for table, record in records:
+        batch = batches.setdefault(table, [])
+        batch.append(record)
+        counts[table] = counts.get(table, 0) + 1
+        if len(batch) >= batch_size:
+            database.bulk_load(table, batch)
+            batches[table] = []
+    for table, batch in batches.items():
+        if batch:
+            database.bulk_load(table, batch)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a sandbox engine with seeded synthetic data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--drivers", type=int, default=2000)
+    parser.add_argument("--officers", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=200000, help="approximate; per-customer counts are random")
+    parser.add_argument("--merchant-skew", type=float, default=3.0, help="1 is uniform; higher concentrates orders on hot merchants")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--path", default="sandbox.db", help="SQLite file for --backend sqlite")
+    parser.add_argument("--jsonl", help="write records as JSON lines to this file instead of a database")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    records = generate(args.seed, args.customers, args.merchants, args.drivers, args.orders, args.officers, args.merchant_skew)
+    started = time.perf_counter()
+    if args.jsonl:
+        counts = {}
+        with open(args.jsonl, "w", encoding="utf-8") as output:
+            for table, record in records:
+                output.write(json.dumps({"table": table, "record": record}, ensure_ascii=False) + "\n")
+                counts[table] = counts.get(table, 0) + 1
+    else:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from sandbox_database import SandboxDatabase
+        if args.backend == "sqlite":
+            from sandbox_sqlite import SQLiteSandboxDatabase
+            database = SQLiteSandboxDatabase(args.path, seed=SandboxDatabase())
+        else:
+            database = SandboxDatabase()
+        counts = load_into(database, records, args.batch_size)
+        if hasattr(database, "close"):
+            database.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"Generated {total:,} records in {elapsed:.1f} s ({total / elapsed:,.0f}/s): "
+          + ", ".join(f"{count:,} {table}" for table, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# sandbox_records.py
+# Compact records for the big sandbox tables. A plain dict per order costs several hundred bytes
+# before its values; these keep each field in a __slots__ entry, store "%Y-%m-%d %H:%M:%S"
+# timestamps as integer epoch seconds, intern repeated strings (statuses, IDs, addresses) and
+# hold order items as tuples. They still behave as dicts: record["status"], .get(), in,
+# setdefault(), iteration and == against a dict all work, so callers see no difference.
+
+import sys
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime, timezone
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+ITEM_KEYS = ("name", "quantity", "price")
+_MISSING = object()
+
+
+def encode_time(value):
+    """Epoch seconds for a sandbox timestamp string; anything else is kept as it is"""
+    if isinstance(value, str) and len(value) == 19 and value[10] == " ":
+        try:
+            return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+        except ValueError:
+            return value
+    return value
+
+
+def decode_time(value):
+    if type(value) is int:
+        return datetime.fromtimestamp(value, timezone.utc).strftime(TIME_FORMAT)
+    return value
+
+
+def encode_items(items):
+    """Order items as (name, quantity, price) tuples when they have exactly those keys"""
+    if isinstance(items, list) and all(isinstance(item, dict) and len(item) == 3 and all(key in item for key in ITEM_KEYS)
+                                       for item in items):
+        return tuple((sys.intern(item["name"]), item["quantity"], item["price"]) for item in items)
+    return items
+
+
+def decode_items(items):
+    if isinstance(items, tuple):
+        return [{"name": name, "quantity": quantity, "price": price} for name, quantity, price in items]
+    return items
+
+
+class CompactRecord(MutableMapping):
+    """
+    Dict-compatible record with a slot per known field. Keys outside FIELDS go to a small
+    overflow dict. Items are decoded on every read, so change them by assigning record["items"].
+    """
+
+    __slots__ = ("_extra",)
+    FIELDS = ()
+    TIME_FIELDS = ()
+    INTERNED = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._slot_of = {field: "_" + field for field in cls.FIELDS}
+        cls._time_fields = frozenset(cls.TIME_FIELDS)
+        cls._interned = frozenset(cls.INTERNED)
+
+    def __init__(self, record: Mapping = ()):
+        self._extra = None
+        for key, value in dict(record).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        slot = self._slot_of.get(key)
+        if slot is None:
+            if self._extra is not None and key in self._extra:
+                return self._extra[key]
+            raise KeyError(key)
+        value = getattr(self, slot, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        if key in self._time_fields:
+            return decode_time(value)
+        if key == "items":
+            return decode_items(value)
+        return value
+
+    def __setitem__(self, key, value):
+        slot = self._slot_of.get(key)
+        if slot is None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+        elif key in self._time_fields:
+            setattr(self, slot, encode_time(value))
+        elif key == "items":
+            setattr(self, slot, encode_items(value))
+        elif key in self._interned and type(value) is str:
+            setattr(self, slot, sys.intern(value))
+        else:
+            setattr(self, slot, value)
+
+    def __delitem__(self, key):
+        slot = self._slot_of.get(key)
+        if slot is not None and getattr(self, slot, _MISSING) is not _MISSING:
+            delattr(self, slot)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for field, slot in self._slot_of.items():
+            if getattr(self, slot, _MISSING) is not _MISSING:
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        slot = self._slot_of.get(key)
+        if slot is None:
+            return self._extra is not None and key in self._extra
+        return getattr(self, slot, _MISSING) is not _MISSING
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class OrderRecord(CompactRecord):
+    FIELDS = ("id", "customer_id", "merchant_id", "driver_id", "description", "items", "amount", "total_amount",
+              "delivery_charges", "final_amount", "order_time", "delivery_time", "status", "payment_method",
+              "delivery_address", "issue_reported")
+    TIME_FIELDS = ("order_time", "delivery_time")
+    INTERNED = ("customer_id", "merchant_id", "driver_id", "status", "payment_method", "delivery_address",
+                "issue_reported")
+    __slots__ = tuple("_" + field for field in FIELDS)
+
+
+class TransactionRecord(CompactRecord):
+    FIELDS = ("id", "customer_id", "amount", "type", "reason", "status", "timestamp", "reference")
+    TIME_FIELDS = ("timestamp",)
+    INTERNED = ("customer_id", "type", "status")
+    __slots__ = tuple("_" + field for field in FIELDS)
+
+
+class ComplaintRecord(CompactRecord):
+    FIELDS = ("id", "customer_id", "order_id", "issue_type", "details", "status", "timestamp", "resolution")
+    TIME_FIELDS = ("timestamp",)
+    INTERNED = ("customer_id", "issue_type", "status")
+    __slots__ = tuple("_" + field for field in FIELDS)
+
+
+class CustomerRecord(CompactRecord):
+    FIELDS = ("id", "name", "phone", "email", "address", "rating", "total_orders", "complaint_history",
+              "account_status", "wallet_balance", "preferred_payment", "joined_date")
+    INTERNED = ("account_status", "preferred_payment")
+    __slots__ = tuple("_" + field for field in FIELDS)
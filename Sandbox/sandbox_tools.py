@@ -6,9 +6,11 @@ import os
 sys.path.append(os.path.dirname(__file__))
 
 from sandbox_database import sandbox_db
+from lookup_cache import cached_lookup
 from typing import Dict, List, Optional
 import json
 
+@cached_lookup("customers", "orders")
 def get_customer_profile(customer_id: str) -> str:
     """Get comprehensive customer profile and history"""
     customer = sandbox_db.get_customer_details(customer_id)
@@ -29,6 +31,7 @@ Customer Profile Analysis:
 """
     return profile_summary
 
+@cached_lookup("orders", "customers", "merchants", "drivers", "delivery_logs")
 def get_order_investigation(order_id: str) -> str:
     """Comprehensive order investigation with all stakeholder data"""
     order = sandbox_db.get_order_details(order_id)
@@ -92,6 +95,7 @@ DISCREPANCY ANALYSIS:
     
     return investigation_report
 
+@cached_lookup("merchants")
 def get_merchant_quality_assessment(merchant_id: str) -> str:
     """Get merchant quality assessment and recent issues"""
     merchant = sandbox_db.get_merchant_details(merchant_id)
@@ -188,6 +192,7 @@ INCIDENT REPORT CREATED
 • Expected Resolution: 24-48 hours
 """
 
+@cached_lookup("customers", "orders")
 def check_refund_eligibility(customer_id: str, order_id: str, claim_amount: float) -> str:
     """Check if customer is eligible for requested refund amount"""
     customer = sandbox_db.get_customer_details(customer_id)
@@ -220,6 +225,7 @@ REFUND ELIGIBILITY ASSESSMENT
     
     return eligibility_report
 
+@cached_lookup("merchants", "delivery_logs")
 def get_merchant_substitute_policy(merchant_id: str, original_item: str) -> str:
     """Check merchant's substitution policy and available alternatives"""
     merchant = sandbox_db.get_merchant_details(merchant_id)
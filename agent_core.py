@@ -1,11 +1,37 @@
 # agent_core.py
 # This file creates and configures the conversational AI agent.
 
+from functools import lru_cache
+
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import Tool
-from langchain.memory import ConversationBufferMemory
-from langchain.agents import initialize_agent, AgentType
-from config import load_api_key
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.tools import StructuredTool
+from config import get_int_setting, get_setting, load_api_key
+from investigation import Investigator
+from llm_cache import build_llm_cache, releases_failed_calls
+from observation_budget import budgeted
+from replay_llm import ReplayChatModel
+from tool_schemas import (
+    EscalationInput,
+    ExonerateDriverInput,
+    DriverMessageInput,
+    IdentityVerificationInput,
+    IncidentReportInput,
+    InvestigateInput,
+    MerchantFeedbackInput,
+    MerchantMessageInput,
+    NearbyMerchantsInput,
+    RefundAmountInput,
+    RefundEligibilityInput,
+    RefundInput,
+    RerouteInput,
+    SubstitutionPolicyInput,
+    TrafficInput,
+    VoucherInput,
+    describe_validation_error,
+)
+from tool_selection import tool_names_for_groups
 from tools import (
     collect_evidence, 
     ask_for_order_details,
@@ -45,209 +71,288 @@ from tools import (
     calculate_dynamic_refund_amount
 )
 
-# Load the API key
-load_api_key()
-
 # 1. Initialize the LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    temperature=0.2, # Balanced for reasoning and consistency
-)
+# Identical prompts (repeated complaints, parsing-error retries, double sends) are served
+# from llm_cache and concurrent duplicates share one Gemini call; a failed call releases the
+# duplicates waiting on it straight away. LLM_CACHE=off disables it.
+llm_cache = build_llm_cache()
+
+if get_setting("AGENT_LLM", "gemini") == "replay":
+    # Deterministic stand-in that replays recorded agent transcripts (see benchmarks/turn_benchmark.py)
+    llm = releases_failed_calls(ReplayChatModel)(
+        cassette_path=get_setting("LLM_CASSETTE", "") or None,
+        latency_seconds=get_int_setting("REPLAY_LATENCY_MS", 0) / 1000,
+        streaming=True,
+        cache=llm_cache or False,
+    )
+else:
+    # Load the API key
+    load_api_key()
+    
+    llm = releases_failed_calls(ChatGoogleGenerativeAI)(
+        model="gemini-1.5-flash",
+        temperature=0.2, # Balanced for reasoning and consistency
+        streaming=True, # Push tokens to callbacks as they arrive (used by /send_message_stream)
+        cache=llm_cache or False,
+    )
+
+# 2. Define the list of tools
+# Tools are called through Gemini function calling: arguments arrive as typed JSON validated
+# against each tool's schema (inferred from the signature, or from tool_schemas.py when a tool
+# takes several values). Invalid arguments come back to the agent as an observation to correct.
+def structured_tool(func, read_only, description, args_schema=None):
+    return StructuredTool.from_function(
+        func=func,
+        name=func.__name__,
+        description=description,
+        args_schema=args_schema,
+        metadata={"read_only": read_only},
+        handle_validation_error=describe_validation_error
+    )
 
-# 2. Define the list of tools 
 tools = [
-    Tool(
-        name="analyze_customer_situation",
-        func=analyze_customer_situation,
+    structured_tool(
+        analyze_customer_situation,
+        read_only=True,
         description="Business-first analysis to determine if customer wants TRACKING (where is order) or has ACTUAL PROBLEM (spilled/wrong food). Directs to proper workflow - tracking or solution-first approach. Use this FIRST for any customer message."
     ),
-    Tool(
-        name="provide_generic_solution",
-        func=provide_generic_solution,
+    structured_tool(
+        provide_generic_solution,
+        read_only=False,
         description="Offer SOLUTIONS FIRST (redelivery, replacement, credits) before discussing money. Only use AFTER analyze_customer_situation confirms actual problem. Never gives immediate compensation - always offers choices."
     ),
-    Tool(
-        name="ask_for_order_details",
-        func=ask_for_order_details,
+    structured_tool(
+        ask_for_order_details,
+        read_only=False,
         description="Ask for missing order information only when absolutely necessary. Use sparingly - customers don't like repeating themselves."
     ),
-    Tool(
-        name="check_customer_history",
-        func=check_customer_history,
+    structured_tool(
+        check_customer_history,
+        read_only=True,
         description="Check the customer's order history, complaint patterns, and account status. Input: customer_id"
     ),
-    Tool(
-        name="check_driver_history",
-        func=check_driver_history,
+    structured_tool(
+        check_driver_history,
+        read_only=True,
         description="Check driver's performance ratings, incident history, and current status. Input: driver_id"
     ),
-    Tool(
-        name="check_merchant_history",
-        func=check_merchant_history,
+    structured_tool(
+        check_merchant_history,
+        read_only=True,
         description="Check merchant's quality ratings, packaging issues, and complaint history. Input: merchant_id"
     ),
-    Tool(
-        name="track_delivery_status",
-        func=track_delivery_status,
+    structured_tool(
+        track_delivery_status,
+        read_only=True,
         description="Get real-time delivery status, GPS location, and estimated time. Use THIS FIRST for any tracking questions like 'where is my order', 'driver is late', 'order status'. Input: order_id (use 'ORD_001' as default)"
     ),
-    Tool(
-        name="analyze_gps_data",
-        func=analyze_gps_data,
+    structured_tool(
+        analyze_gps_data,
+        read_only=True,
         description="Analyze GPS coordinates and route data for delivery verification. Input: order_id"
     ),
-    Tool(
-        name="check_weather_conditions",
-        func=check_weather_conditions,
+    structured_tool(
+        check_weather_conditions,
+        read_only=True,
         description="Check weather conditions that might affect delivery. Input: location,timestamp"
     ),
-    Tool(
-        name="contact_driver",
-        func=contact_driver,
-        description="Send message or call driver for clarification. Input: driver_id,message"
-    ),
-    Tool(
-        name="contact_merchant",
-        func=contact_merchant,
-        description="Contact merchant about order issues or preparation delays. Input: merchant_id,message"
-    ),
-    Tool(
-        name="verify_customer_identity",
-        func=verify_customer_identity,
-        description="Verify customer identity for security purposes. Input: customer_id,verification_method"
-    ),
-    Tool(
-        name="offer_compensation_voucher",
-        func=offer_compensation_voucher,
-        description="Offer voucher/credits ONLY after negotiation failed or as part of negotiated settlement. NOT for immediate compensation. Input: customer_id,amount,voucher_type"
-    ),
-    Tool(
-        name="issue_instant_refund",
-        func=issue_instant_refund,
-        description="Issue cash refund ONLY after successful negotiation OR when customer explicitly demands money back AND gather_compensation_details + negotiate_fair_compensation were used first. Input: customer_id,amount,reason"
-    ),
-    Tool(
-        name="exonerate_driver",
-        func=exonerate_driver,
-        description="Clear driver of fault when evidence supports their innocence. Input: driver_id,reason"
-    ),
-    Tool(
-        name="log_merchant_packaging_feedback",
-        func=log_merchant_packaging_feedback,
-        description="Log merchant feedback for quality improvement. Input: merchant_id,feedback_details"
-    ),
-    Tool(
-        name="log_incident_report",
-        func=log_incident_report,
-        description="Create detailed incident report for future analysis. Input: incident_type,details,involved_parties"
-    ),
-    Tool(
-        name="analyze_order_discrepancy",
-        func=analyze_order_discrepancy,
+    structured_tool(
+        contact_driver,
+        read_only=False,
+        args_schema=DriverMessageInput,
+        description="Send message or call driver for clarification."
+    ),
+    structured_tool(
+        contact_merchant,
+        read_only=False,
+        args_schema=MerchantMessageInput,
+        description="Contact merchant about order issues or preparation delays."
+    ),
+    structured_tool(
+        verify_customer_identity,
+        read_only=False,
+        args_schema=IdentityVerificationInput,
+        description="Verify customer identity for security purposes."
+    ),
+    structured_tool(
+        offer_compensation_voucher,
+        read_only=False,
+        args_schema=VoucherInput,
+        description="Offer voucher/credits ONLY after negotiation failed or as part of negotiated settlement. NOT for immediate compensation."
+    ),
+    structured_tool(
+        issue_instant_refund,
+        read_only=False,
+        args_schema=RefundInput,
+        description="Issue cash refund ONLY after successful negotiation OR when customer explicitly demands money back AND gather_compensation_details + negotiate_fair_compensation were used first."
+    ),
+    structured_tool(
+        exonerate_driver,
+        read_only=False,
+        args_schema=ExonerateDriverInput,
+        description="Clear driver of fault when evidence supports their innocence."
+    ),
+    structured_tool(
+        log_merchant_packaging_feedback,
+        read_only=False,
+        args_schema=MerchantFeedbackInput,
+        description="Log merchant feedback for quality improvement."
+    ),
+    structured_tool(
+        log_incident_report,
+        read_only=False,
+        args_schema=IncidentReportInput,
+        description="Create detailed incident report for future analysis."
+    ),
+    structured_tool(
+        analyze_order_discrepancy,
+        read_only=True,
         description="Analyze specific order to identify what went wrong. Input: order_id (use 'ORD_001' if not known)"
     ),
-    Tool(
-        name="assess_refund_eligibility", 
-        func=assess_refund_eligibility,
-        description="Assess customer's eligibility for refund. Input: 'customer_id,order_id,amount' or just 'refund_assessment' for defaults"
-    ),
-    Tool(
-        name="check_merchant_substitution_policy",
-        func=check_merchant_substitution_policy,
-        description="Check merchant's policy on item substitutions and alternatives. Input: merchant_id,original_item"
-    ),
-    Tool(
-        name="validate_customer_complaint",
-        func=validate_customer_complaint,
+    structured_tool(
+        assess_refund_eligibility,
+        read_only=True,
+        args_schema=RefundEligibilityInput,
+        description="Assess customer's eligibility for refund."
+    ),
+    structured_tool(
+        check_merchant_substitution_policy,
+        read_only=True,
+        args_schema=SubstitutionPolicyInput,
+        description="Check merchant's policy on item substitutions and alternatives."
+    ),
+    structured_tool(
+        validate_customer_complaint,
+        read_only=True,
         description="Validate customer complaint against order history and delivery records. Input: complaint_details (e.g., 'received wrong order')"
     ),
-    Tool(
-        name="check_traffic",
-        func=check_traffic,
-        description="Check current traffic conditions for delivery route optimization. Input: location or location,route"
+    structured_tool(
+        check_traffic,
+        read_only=True,
+        args_schema=TrafficInput,
+        description="Check current traffic conditions for delivery route optimization."
     ),
-    Tool(
-        name="get_merchant_status",
-        func=get_merchant_status,
+    structured_tool(
+        get_merchant_status,
+        read_only=True,
         description="Get real-time merchant operational status, queue length, and prep times. Input: merchant_id"
     ),
-    Tool(
-        name="reroute_driver",
-        func=reroute_driver,
-        description="Reroute driver to avoid traffic or optimize delivery path. Input: driver_id,new_route"
-    ),
-    Tool(
-        name="get_nearby_merchants",
-        func=get_nearby_merchants,
-        description="Find nearby alternative merchants when primary merchant has issues. Input: location or location,cuisine_type"
-    ),
-    Tool(
-        name="initiate_mediation_flow",
-        func=initiate_mediation_flow,
+    structured_tool(
+        reroute_driver,
+        read_only=False,
+        args_schema=RerouteInput,
+        description="Reroute driver to avoid traffic or optimize delivery path."
+    ),
+    structured_tool(
+        get_nearby_merchants,
+        read_only=True,
+        args_schema=NearbyMerchantsInput,
+        description="Find nearby alternative merchants when primary merchant has issues."
+    ),
+    structured_tool(
+        initiate_mediation_flow,
+        read_only=False,
         description="Start formal mediation process for complex multi-party disputes. Input: order_id"
     ),
-    Tool(
-        name="find_nearby_locker",
-        func=find_nearby_locker,
+    structured_tool(
+        find_nearby_locker,
+        read_only=True,
         description="Find nearby Grab lockers for alternative pickup when delivery issues occur. Input: location"
     ),
-    Tool(
-        name="analyze_image_evidence",
-        func=analyze_image_evidence,
+    structured_tool(
+        analyze_image_evidence,
+        read_only=False,
         description="Analyze uploaded image evidence from customer to validate complaints and support resolution decisions. Use when customer has provided photo evidence. Input: image_context"
     ),
-    Tool(
-        name="orchestrate_resolution_plan",
-        func=orchestrate_resolution_plan,
+    structured_tool(
+        orchestrate_resolution_plan,
+        read_only=False,
         description="Create comprehensive multi-step resolution plan with severity analysis and proactive problem detection. Use for complex issues requiring structured approach. Input: issue_details"
     ),
-    Tool(
-        name="handle_wrong_order_situation",
-        func=handle_wrong_order_situation,
+    structured_tool(
+        handle_wrong_order_situation,
+        read_only=False,
         description="Handle wrong order complaints by offering customer choices (reorder, partial refund, full refund) instead of immediately processing refunds. Use this for wrong order situations. Input: order_details"
     ),
-    Tool(
-        name="gather_compensation_details",
-        func=gather_compensation_details,
+    structured_tool(
+        gather_compensation_details,
+        read_only=False,
         description="FIRST STEP for compensation: Gather order value and customer expectations before any refund negotiation. Use this before offering money. Input: customer_complaint"
     ),
-    Tool(
-        name="negotiate_fair_compensation",
-        func=negotiate_fair_compensation,
+    structured_tool(
+        negotiate_fair_compensation,
+        read_only=False,
         description="SECOND STEP for compensation: Calculate and present business-balanced compensation offers with negotiation tiers. Use after gather_compensation_details. Input: order_details_and_expectations"
     ),
-    Tool(
-        name="explain_business_compensation_policy",
-        func=explain_business_compensation_policy,
+    structured_tool(
+        explain_business_compensation_policy,
+        read_only=True,
         description="Explain Grab's compensation philosophy to help customer understand business constraints while showing fairness. Input: issue_type"
     ),
-    Tool(
-        name="calculate_dynamic_refund_amount",
-        func=calculate_dynamic_refund_amount,
-        description="Calculate contextual refund amounts with business justification for negotiation. Use when customer requests specific amounts. Input: order_value,issue_type,customer_expectation"
+    structured_tool(
+        calculate_dynamic_refund_amount,
+        read_only=True,
+        args_schema=RefundAmountInput,
+        description="Calculate contextual refund amounts with business justification for negotiation. Use when customer requests specific amounts."
     ),
-    Tool(
-        name="escalate_to_human",
-        func=escalate_to_human,
-        description="Escalate complex cases to human agents. Input: reason,urgency_level,case_summary"
+    structured_tool(
+        escalate_to_human,
+        read_only=False,
+        args_schema=EscalationInput,
+        description="Escalate complex cases to human agents."
     ),
 ]
 
-# 3. Initialize Memory
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-
-# 4. Initialize the Agent with a more detailed persona and instructions
-agent = initialize_agent(
-    tools,
-    llm,
-    agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
-    verbose=True,
-    memory=memory,
-    handle_parsing_errors="Check your input and make sure it is a single string.",
-    # This is the key change to get the reasoning steps for the UI
-    return_intermediate_steps=True, 
-    agent_kwargs={
-        "system_message": """
+# The investigators run the original tools; the agent's copies below may be budgeted
+unbudgeted_tools = {tool.name: tool for tool in tools}
+
+# Batched lookups: one agent step runs every read-only check the agent needs in parallel.
+# Each executor gets its own, over just its read-only tools (see build_agent).
+def investigate_tool(agent_tools):
+    """The investigate tool over the read-only tools among agent_tools"""
+    investigator = Investigator([unbudgeted_tools[tool.name] for tool in agent_tools])
+    return StructuredTool.from_function(
+        func=investigator.investigate,
+        name="investigate",
+        args_schema=InvestigateInput,
+        metadata={"read_only": True},
+        handle_validation_error=describe_validation_error,
+        description=f"Run several read-only lookups at once and get one combined result. Use this instead of calling lookups one by one when investigating a complaint, e.g. lookups=[{{tool: <read-only tool>, args: {{<its arguments>}}}}, ...]. Read-only tools: {investigator.describe()}"
+    )
+
+# Observation budgets (estimated tokens): every observation is re-sent on each later agent
+# step, so long tool outputs are truncated section by section before the agent sees them.
+# flask_app shares TURN_OBSERVATION_TOKEN_BUDGET across a turn's tool calls (observation_scope)
+# and shows the full outputs in the reasoning panel. OBSERVATION_BUDGETS=off disables it.
+OBSERVATION_BUDGETS_ENABLED = get_setting("OBSERVATION_BUDGETS", "on") == "on"
+OBSERVATION_TOKEN_BUDGET = get_int_setting("OBSERVATION_TOKEN_BUDGET", 300)
+TURN_OBSERVATION_TOKEN_BUDGET = get_int_setting("TURN_OBSERVATION_TOKEN_BUDGET", 1500)
+TOOL_OBSERVATION_BUDGETS = {
+    # Several lookups in one observation
+    "investigate": 900,
+    # Order investigation report with the merchant menu embedded
+    "analyze_order_discrepancy": 400,
+    # Long prose plans and talking points; the headline figures come first
+    "orchestrate_resolution_plan": 150,
+    "negotiate_fair_compensation": 200,
+    "explain_business_compensation_policy": 200,
+}
+
+def apply_observation_budget(tool):
+    """Copy of the tool whose output is cut to its observation budget; the investigator keeps the original"""
+    return tool.model_copy(update={
+        "func": budgeted(tool.func, TOOL_OBSERVATION_BUDGETS.get(tool.name, OBSERVATION_TOKEN_BUDGET))
+    })
+
+if OBSERVATION_BUDGETS_ENABLED:
+    tools = [apply_observation_budget(tool) for tool in tools]
+
+# 3. Conversation memory is per session: flask_app passes each conversation's
+# token-budgeted chat_history (see conversation_memory.py) with every invoke.
+# A shared ConversationBufferMemory here would mix every user's history together.
+
+# 4. The agent persona and instructions, shared by every executor below
+SYSTEM_MESSAGE = """
         You are SYNAPSE - Grab's business-savvy customer service AI that balances customer satisfaction with company profitability through intelligent negotiation.
 
         🎯 CORE BUSINESS PHILOSOPHY: "SOLVE PROBLEMS, MINIMIZE LOSSES, MAXIMIZE SATISFACTION"
@@ -370,6 +475,7 @@ agent = initialize_agent(
         ✅ Use dynamic compensation amounts (never same ₹400!)
         ✅ Match customer communication style
         ✅ Provide weather context for delays when appropriate
+        ✅ Batch history, order and weather checks into ONE investigate() call
 
         ❌ **FORBIDDEN:**
         ❌ Don't jump to compensation for tracking requests
@@ -377,5 +483,40 @@ agent = initialize_agent(
         ❌ Don't give same refund amounts repeatedly
 
         """
-    }
-)
+
+# 5. Initialize the Agent with a more detailed persona and instructions
+# The tool schemas go to Gemini as function declarations, so the prompt only carries the
+# persona, the budgeted chat history (text, see conversation_memory.py) and the scratchpad
+# of tool calls and results.
+AGENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_MESSAGE + "\n\nConversation so far:\n{chat_history}"),
+    ("human", "{input}"),
+    MessagesPlaceholder("agent_scratchpad"),
+])
+
+def build_agent(agent_tools):
+    """Executor over agent_tools plus an investigate tool limited to their read-only ones"""
+    investigate = investigate_tool(agent_tools)
+    if OBSERVATION_BUDGETS_ENABLED:
+        investigate = apply_observation_budget(investigate)
+    agent_tools = agent_tools + [investigate]
+    return AgentExecutor(
+        agent=create_tool_calling_agent(llm, agent_tools, AGENT_PROMPT),
+        tools=agent_tools,
+        verbose=True,
+        handle_parsing_errors=True,
+        # This is the key change to get the reasoning steps for the UI
+        return_intermediate_steps=True
+    )
+
+agent = build_agent(tools)
+
+# 6. Intent-scoped executors: every agent step re-sends the tool declarations, so a turn
+# only gets the tool groups its text calls for (see tool_selection.py)
+@lru_cache(maxsize=None)
+def get_scoped_agent(groups: tuple):
+    """Executor limited to the core tools plus the given groups; built once per combination"""
+    if not groups:
+        return agent
+    names = tool_names_for_groups(groups)
+    return build_agent([tool for tool in tools if tool.name in names])
@@ -0,0 +1,254 @@
+# asgi_app.py
+# ASGI entry point: asyncio versions of the chat (with vision) and transcription endpoints,
+# with every other route served by the Flask app mounted underneath.
+#
+# Run with: uvicorn asgi_app:app --port 5000
+# A request waiting on Gemini or AssemblyAI only holds a coroutine, not an OS thread,
+# so one worker can keep hundreds of conversations in flight. Blocking work (session store
+# reads and writes, the fast-path router, caches, turn logs) runs in worker threads via
+# asyncio.to_thread, and LangChain runs the synchronous tools in its executor, so the
+# event loop itself never waits on SQLite or a sandbox lookup.
+
+import asyncio
+import secrets
+import weakref
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+import flask_app
+from flask_app import (
+    AUDIO_MAX_BYTES,
+    AUDIO_MEMORY_LIMIT_BYTES,
+    agent_unavailable_reply,
+    attach_image_analysis,
+    build_assistant_message,
+    cached_image_analysis,
+    close_turn,
+    ensure_session_state,
+    fallback_image_analysis,
+    format_reasoning,
+    image_pipeline,
+    memory_entries_for_turn,
+    merge_pending_turns,
+    new_user_message,
+    parse_image_analysis,
+    lookup_trace,
+    observation_trace,
+    prepare_agent_turn,
+    record_turn,
+    transcription_cache,
+    try_fast_path,
+    vision_request,
+)
+from cache_store import content_hash
+from entity_extraction import entity_scope
+from model_clients import model_clients
+from observation_budget import observation_scope
+from tools import lookup_scope
+from transcription import buffer_audio, store_transcript, transcribe_async, TRANSCRIPTION_CONFIG_VERSION
+from turn_accounting import TurnAccounting
+
+# Conversations are shared with the Flask routes through the server-side session store
+if flask_app.session_interface is None:
+    raise RuntimeError("asgi_app needs a server-side session store: set SESSION_BACKEND=memory or sqlite")
+session_backend = flask_app.session_interface.backend
+SESSION_COOKIE = flask_app.app.config["SESSION_COOKIE_NAME"]
+
+# One turn at a time per conversation, like the job queue's per-session ordering
+conversation_locks = weakref.WeakValueDictionary()
+
+
+def conversation_lock(sid):
+    lock = conversation_locks.get(sid)
+    if lock is None:
+        lock = asyncio.Lock()
+        conversation_locks[sid] = lock
+    return lock
+
+
+def load_conversation(sid):
+    state = session_backend.load(sid) or {}
+    ensure_session_state(state)
+    merge_pending_turns(state)
+    return state
+
+
+def save_conversation(response, sid, state, new):
+    session_backend.save(sid, state)
+    if new:
+        response.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite="lax")
+    return response
+
+
+async def analyze_image_content_async(ingested_image):
+    """analyze_image_content without blocking the event loop on the Gemini call"""
+    cache_key, contents = vision_request(ingested_image)
+    cached_analysis = cached_image_analysis(cache_key)
+    if cached_analysis is not None:
+        return cached_analysis
+
+    try:
+        model = model_clients.get("vision")
+        response = await model.generate_content_async(contents)
+        return parse_image_analysis(response.text, ingested_image, cache_key)
+    except Exception as e:
+        print(f"Vision API error: {e}")
+        return fallback_image_analysis(ingested_image, e)
+
+
+async def build_user_turn_async(user_prompt, image_bytes, accounting):
+    user_message = new_user_message(user_prompt)
+    agent_input_content = [user_prompt]
+
+    if image_bytes:
+        try:
+            with accounting.stage("image"):
+                ingested_image = await image_pipeline.ingest_async(image_bytes)
+            with accounting.stage("vision"):
+                image_analysis = await analyze_image_content_async(ingested_image)
+            attach_image_analysis(user_message, agent_input_content, ingested_image, image_analysis)
+        except Exception as e:
+            print(f"Error processing image: {e}")
+            user_message['image_error'] = str(e)
+
+    return user_message, agent_input_content
+
+
+async def run_agent_turn_async(agent_input_content, memory, memory_summary, accounting):
+    turn_agent, inputs, history_stats = await asyncio.to_thread(
+        prepare_agent_turn, agent_input_content, memory, memory_summary
+    )
+    if turn_agent is None:
+        return (*agent_unavailable_reply(), history_stats)
+
+    with lookup_scope() as lookups, observation_scope(flask_app.TURN_OBSERVATION_TOKEN_BUDGET) as observations, \
+            entity_scope(agent_input_content) as entities:
+        print(f"Turn entities: {entities.to_dict()}")
+        response = await turn_agent.ainvoke(inputs, config={"callbacks": [accounting]})
+    reasoning_text = (format_reasoning(response.get('intermediate_steps', []), observations)
+                      + lookup_trace(lookups) + observation_trace(observations))
+    return response['output'], reasoning_text, history_stats
+
+
+async def send_message(request):
+    """Async /send_message: same form fields and response as the Flask route"""
+    form = await request.form()
+    user_prompt = (form.get('message') or '').strip()
+    if not user_prompt:
+        return JSONResponse({'error': 'Please enter a message'}, status_code=400)
+
+    uploaded_file = form.get('image')
+    image_bytes = await uploaded_file.read() if uploaded_file and getattr(uploaded_file, 'filename', None) else None
+
+    sid = request.cookies.get(SESSION_COOKIE)
+    new = not sid or await asyncio.to_thread(session_backend.load, sid) is None
+    if new:
+        sid = secrets.token_urlsafe(32)
+
+    async with conversation_lock(sid):
+        state = await asyncio.to_thread(load_conversation, sid)
+
+        fast_path = await asyncio.to_thread(try_fast_path, user_prompt, image_bytes is not None, state)
+        if fast_path:
+            response = JSONResponse({
+                'success': True,
+                'user_message': fast_path[0],
+                'assistant_message': fast_path[1],
+                'timings': fast_path[2]
+            })
+            return await asyncio.to_thread(save_conversation, response, sid, state, new)
+
+        accounting = TurnAccounting()
+        try:
+            user_message, agent_input_content = await build_user_turn_async(user_prompt, image_bytes, accounting)
+            final_output, reasoning_text, history_stats = await run_agent_turn_async(
+                agent_input_content, state['memory'], state['memory_summary'], accounting
+            )
+        except Exception as e:
+            print(f"Agent error: {e}")
+            return JSONResponse({'error': f'Agent processing error: {str(e)}'}, status_code=500)
+
+        assistant_message = build_assistant_message(final_output, reasoning_text, history_stats)
+        timings = await asyncio.to_thread(
+            finish_turn, sid, new, user_message, assistant_message, final_output, accounting
+        )
+        response = JSONResponse({
+            'success': True,
+            'user_message': user_message,
+            'assistant_message': assistant_message,
+            'timings': timings
+        })
+        if new:
+            response.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite="lax")
+        return response
+
+
+def finish_turn(sid, new, user_message, assistant_message, final_output, accounting):
+    """Record a finished turn in the stored conversation (blocking; runs in a worker thread)"""
+    # Flask routes may have changed the conversation (e.g. cleared it) while the agent ran
+    state = load_conversation(sid)
+    record_turn([user_message, assistant_message], memory_entries_for_turn(user_message, final_output), state)
+    timings = close_turn(accounting, state['conversation_id'], 'async_send_message')
+    session_backend.save(sid, state)
+    return timings
+
+
+async def transcribe_audio(request):
+    """
+    Async /transcribe_audio: waits for the transcript in the request itself (200 with the
+    text) instead of queueing a job to poll, since the wait no longer costs a thread.
+    """
+    form = await request.form()
+    audio_file = form.get('audio')
+    if audio_file is None or not getattr(audio_file, 'filename', None):
+        return JSONResponse({'success': False, 'error': 'No audio file provided'}, status_code=400)
+
+    try:
+        audio_buffer, audio_hash, audio_size = await asyncio.to_thread(
+            buffer_audio, audio_file.file, memory_limit=AUDIO_MEMORY_LIMIT_BYTES, max_bytes=AUDIO_MAX_BYTES
+        )
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=413)
+
+    cache_key = content_hash(TRANSCRIPTION_CONFIG_VERSION, audio_hash)
+    cached_transcript = await asyncio.to_thread(transcription_cache.get, cache_key)
+    if cached_transcript is not None:
+        audio_buffer.close()
+        return JSONResponse(dict(cached_transcript, success=True, cached=True))
+
+    accounting = TurnAccounting()
+    try:
+        with accounting.stage("transcription"):
+            transcript = await transcribe_async(model_clients.get("transcriber"), audio_buffer)
+        result = await asyncio.to_thread(store_transcript, transcript, transcription_cache, cache_key)
+    except Exception as e:
+        print(f"Transcription error: {e}")
+        return JSONResponse({
+            'success': False,
+            'error': f'Transcription processing error: {str(e)}'
+        }, status_code=500)
+    finally:
+        audio_buffer.close()
+
+    timings = await asyncio.to_thread(close_transcription, request.cookies.get(SESSION_COOKIE), accounting)
+    return JSONResponse(dict(result, success=True, cached=False, timings=timings))
+
+
+def close_transcription(sid, accounting):
+    conversation_id = ((sid and session_backend.load(sid)) or {}).get('conversation_id')
+    return close_turn(accounting, conversation_id, 'async_transcribe_audio', route='transcription')
+
+
+app = Starlette(routes=[
+    Route('/async/send_message', send_message, methods=['POST']),
+    Route('/async/transcribe_audio', transcribe_audio, methods=['POST']),
+    Mount('/', app=WSGIMiddleware(flask_app.app)),
+])
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, port=5000)
@@ -0,0 +1,154 @@
+# benchmarks/classifier_benchmark.py
+# Per-message cost of the keyword/slang classification the tools in tools.py run on a message:
+# the old per-tool scans (lowercase, then `any(word in text ...)` per rule, slang via sequential
+# str.replace) against one pass of message_features.MessageFeatures. The lru_cache is bypassed
+# so every message is scanned from scratch. Exits non-zero below --target messages per second.
+#
+# Usage:
+#   python benchmarks/classifier_benchmark.py --messages 10000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from message_features import (  # noqa: E402
+    COMPENSATION_ISSUES, CURRENCY_TERMS, EMOTIONS, EVIDENCE_REQUEST_ISSUES, EVIDENCE_TERMS, FEEDBACK_ISSUES,
+    HUMOR_TERMS, ISSUE_INFO_TERMS, ORDER_INFO_TERMS, PROBLEM_TERMS, QUERY_SEVERITY, QUESTION_TERMS,
+    REPEAT_TERMS, SEVERITY_LEVELS, SITUATION_ISSUES, SLANG, SOLUTION_ISSUES, TRACKING_TERMS, VAGUE_TERMS,
+    MessageFeatures
+)
+
+TEMPLATES = [
+    "where is my order {order}? it's been {minutes} minutes",
+    "my food arrived completely spilled and the packaging was broken, I paid ₹{amount}",
+    "this is the wrong order, I got burgers instead of pizza from {merchant}",
+    "lol the driver is sus, took the longest route again",
+    "food is trash no cap, cold and soggy. I want a refund of rs {amount}",
+    "the kitchen forgot my drink and the fries were missing, very disappointed",
+    "hi, what's the status of {order}? the ETA keeps changing",
+    "I'm furious, this happens every time I order from {merchant}. terrible service",
+    "lowkey mid food, the curry was lukewarm but the naan slaps",
+    "My child is allergic and they added peanuts even though I said not to!!",
+]
+
+
+def build_messages(count: int, seed: int = 7):
+    generator = random.Random(seed)
+    return [
+        generator.choice(TEMPLATES).format(
+            order=f"ORD_{generator.randint(1, 999):03d}",
+            minutes=generator.randint(20, 90),
+            amount=generator.choice([250, 390, 450, 820]),
+            merchant=generator.choice(["Dominos", "Burger Hub", "Spice Route"])
+        )
+        for _ in range(count)
+    ]
+
+
+def first_hit(text, rules, default=None):
+    for label, terms in rules:
+        if any(word in text for word in terms):
+            return label
+    return default
+
+
+def legacy_scan(message: str):
+    """What the tools did before: every tool lowercases and scans the message on its own"""
+    text = message.lower()
+    has_problem = any(word in text for word in PROBLEM_TERMS)
+    any(word in text for word in TRACKING_TERMS) and not has_problem
+    any(word in text for word in EVIDENCE_TERMS)
+    first_hit(text, SITUATION_ISSUES)
+
+    text = message.lower()
+    first_hit(text, SOLUTION_ISSUES)
+
+    text = message.lower()
+    first_hit(text, SEVERITY_LEVELS)
+    first_hit(text, EMOTIONS)
+    any(word in text for word in REPEAT_TERMS)
+
+    text = message.lower()
+    any(word in text for word in CURRENCY_TERMS)
+    first_hit(text, QUERY_SEVERITY)
+
+    text = message.lower()
+    first_hit(text, COMPENSATION_ISSUES)
+
+    text = message.lower()
+    first_hit(text, EVIDENCE_REQUEST_ISSUES)
+
+    text = message.lower()
+    first_hit(text, FEEDBACK_ISSUES)
+    any(word in text for word in ORDER_INFO_TERMS)
+    any(word in text for word in ISSUE_INFO_TERMS)
+
+    text = message.lower()
+    any(word in text for word in HUMOR_TERMS)
+    translated = text
+    for slang, meaning in SLANG.items():
+        if slang in text:
+            translated = translated.replace(slang, meaning)
+    any(word in text for word in VAGUE_TERMS)
+    any(word in text for word in QUESTION_TERMS)
+    return translated
+
+
+def engine_scan(message: str):
+    """One MessageFeatures pass, then the same questions answered from it"""
+    features = MessageFeatures(message)
+    features.has(PROBLEM_TERMS)
+    features.has(EVIDENCE_TERMS)
+    features.classify(SITUATION_ISSUES)
+    features.classify(SOLUTION_ISSUES)
+    features.classify(QUERY_SEVERITY)
+    features.classify(COMPENSATION_ISSUES)
+    features.classify(EVIDENCE_REQUEST_ISSUES)
+    features.classify(FEEDBACK_ISSUES)
+    features.has(ORDER_INFO_TERMS)
+    features.has(ISSUE_INFO_TERMS)
+    features.has(VAGUE_TERMS)
+    return features.translated
+
+
+def measure(scan, messages, rounds: int) -> float:
+    """Best-of-rounds messages per second"""
+    best = 0.0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for message in messages:
+            scan(message)
+        best = max(best, len(messages) / (time.perf_counter() - started))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-message keyword/slang classification cost")
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--target", type=int, default=10000, help="minimum messages per second for the engine")
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages)
+    mismatched = sum(1 for message in messages if legacy_scan(message) != engine_scan(message))
+
+    print(f"{'scan':<10}{'msgs/s':>12}{'us/msg':>10}")
+    results = {}
+    for name, scan in (("legacy", legacy_scan), ("engine", engine_scan)):
+        rate = measure(scan, messages, args.rounds)
+        results[name] = rate
+        print(f"{name:<10}{rate:>12,.0f}{1e6 / rate:>10.1f}")
+
+    print(f"\nengine is {results['engine'] / results['legacy']:.1f}x legacy; "
+          f"slang rewrites differing from legacy: {mismatched}")
+    if results["engine"] < args.target:
+        print(f"FAIL: engine below {args.target:,} messages/s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
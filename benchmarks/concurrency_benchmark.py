@@ -0,0 +1,160 @@
+# benchmarks/concurrency_benchmark.py
+# Fires N concurrent conversations at the threaded Flask server and at the ASGI server
+# (asgi_app.py) and reports throughput, latency and how many OS threads each server used.
+#
+# Both servers run with MODEL_CLIENTS=local, so Gemini vision and AssemblyAI are replaced by
+# stand-ins that wait LOCAL_CLIENT_LATENCY_MS like a network call would. Every request
+# carries a distinct photo or audio clip so the result caches do not answer it.
+#
+# Usage:
+#   python benchmarks/concurrency_benchmark.py --concurrency 200 --latency-ms 1000
+#   python benchmarks/concurrency_benchmark.py --scenario transcribe
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "flask": {
+        "command": [sys.executable, "-m", "flask", "--app", "flask_app", "run", "--port", "{port}", "--no-reload"],
+        "chat": "/send_message",
+        "transcribe": "/transcribe_audio",
+    },
+    "asgi": {
+        "command": [sys.executable, "-m", "uvicorn", "asgi_app:app", "--port", "{port}", "--log-level", "warning"],
+        "chat": "/async/send_message",
+        "transcribe": "/async/transcribe_audio",
+    },
+}
+
+
+def photo(index: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), (index % 256, (index // 256) % 256, 90)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def thread_count(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+async def chat(client, path: str, index: int):
+    response = await client.post(
+        path,
+        data={"message": "My food was spilled, see the photo"},
+        files={"image": (f"evidence_{index}.jpg", photo(index), "image/jpeg")},
+    )
+    response.raise_for_status()
+
+
+async def transcribe(client, path: str, index: int):
+    audio = b"RIFF" + index.to_bytes(4, "big") + os.urandom(2048)
+    response = await client.post(path, files={"audio": (f"note_{index}.wav", audio, "audio/wav")})
+    response.raise_for_status()
+    body = response.json()
+    # The Flask route queues a job; poll it like the browser does
+    status_url = body.get("status_url")
+    while status_url and body.get("status") not in ("done", "error"):
+        await asyncio.sleep(0.2)
+        body = (await client.get(status_url)).json()
+
+
+async def run_load(base_url: str, path: str, scenario: str, concurrency: int, pid: int) -> dict:
+    request = chat if scenario == "chat" else transcribe
+    latencies = []
+    peak_threads = thread_count(pid)
+    done = asyncio.Event()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, thread_count(pid))
+            await asyncio.sleep(0.05)
+
+    async def one(index: int):
+        # Each conversation gets its own cookie jar, like separate browsers
+        async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+            start = time.perf_counter()
+            await request(client, path, index)
+            latencies.append(time.perf_counter() - start)
+
+    sampler = asyncio.create_task(sample_threads())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(index) for index in range(concurrency)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await sampler
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    return {
+        "requests": concurrency,
+        "errors": len(errors),
+        "wall_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_seconds": round(statistics.median(latencies), 2) if latencies else None,
+        "p95_seconds": round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 2) if latencies else None,
+        "peak_threads": peak_threads,
+    }
+
+
+def start_server(name: str, port: int, latency_ms: int, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ, MODEL_CLIENTS="local", LOCAL_CLIENT_LATENCY_MS=str(latency_ms),
+               PYTHONPATH=ROOT, FAST_PATH_ROUTER="off",
+               VISION_CACHE_PATH=os.path.join(workdir, f"{name}_vision.db"),
+               TRANSCRIPTION_CACHE_PATH=os.path.join(workdir, f"{name}_transcription.db"))
+    command = [part.format(port=port) for part in SERVERS[name]["command"]]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/router_stats", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"{name} server did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded Flask vs ASGI under concurrent waiting conversations")
+    parser.add_argument("--scenario", choices=["chat", "transcribe"], default="chat")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=int, default=1000, help="simulated Gemini/AssemblyAI latency")
+    parser.add_argument("--port", type=int, default=5100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for offset, name in enumerate(SERVERS):
+            port = args.port + offset
+            process = start_server(name, port, args.latency_ms, workdir)
+            try:
+                result = asyncio.run(run_load(
+                    f"http://127.0.0.1:{port}", SERVERS[name][args.scenario], args.scenario, args.concurrency, process.pid
+                ))
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"{name:<6} {result}")
+
+
+if __name__ == "__main__":
+    main()
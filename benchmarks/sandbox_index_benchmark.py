@@ -0,0 +1,85 @@
+# benchmarks/sandbox_index_benchmark.py
+# Loads a production-sized order table from sandbox_generator (hot merchants, heavy-tailed
+# customers, repeat complainers) into the sandbox and compares the indexed lookups
+# (orders by customer, merchant, driver and status; complaints by customer and order) with
+# the full scans SandboxDatabase used to do, plus get_customer_profile end to end.
+#
+# Usage:
+#   python benchmarks/sandbox_index_benchmark.py --orders 1000000
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Sandbox"))
+
+from sandbox_database import sandbox_db  # noqa: E402
+from sandbox_generator import generate, load_into  # noqa: E402
+from sandbox_tools import get_customer_profile  # noqa: E402
+
+
+def scan(table: dict, field: str, value):
+    """The pre-index implementation: look at every record"""
+    return [record for record in table.values() if record[field] == value]
+
+
+def timed(function, keys, runs: int):
+    """Median milliseconds per call over the given keys"""
+    samples = []
+    for key in keys[:runs]:
+        started = time.perf_counter()
+        function(key)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sandbox secondary indexes vs full scans")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=50_000)
+    parser.add_argument("--merchants", type=int, default=2_000)
+    parser.add_argument("--drivers", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=20, help="lookups timed per query (scans get a quarter)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    load_into(sandbox_db, generate(11, args.customers, args.merchants, args.drivers, args.orders))
+    print(f"Loaded {len(sandbox_db.orders):,} orders and {len(sandbox_db.complaints):,} complaints "
+          f"in {time.perf_counter() - started:.1f} s\n")
+
+    generator = random.Random(5)
+    customers = [f"C{generator.randint(2, args.customers + 1):03d}" for _ in range(args.runs)]
+    merchants = [f"M{generator.randint(2, args.merchants + 1):03d}" for _ in range(args.runs)]
+    drivers = [f"D{generator.randint(2, args.drivers + 1):03d}" for _ in range(args.runs)]
+    complained = list(sandbox_db.complaint_index["order_id"])[:args.runs]
+    scan_runs = max(args.runs // 4, 1)
+
+    queries = [
+        ("orders by customer", sandbox_db.get_customer_order_history, sandbox_db.orders, "customer_id", customers),
+        ("orders by merchant", sandbox_db.get_merchant_orders, sandbox_db.orders, "merchant_id", merchants),
+        ("orders by driver", sandbox_db.get_driver_orders, sandbox_db.orders, "driver_id", drivers),
+        ("orders by status", sandbox_db.get_orders_by_status, sandbox_db.orders, "status", ["in_transit"] * args.runs),
+        ("complaints by customer", sandbox_db.get_customer_complaints, sandbox_db.complaints, "customer_id", customers),
+        ("complaints by order", sandbox_db.get_order_complaints, sandbox_db.complaints, "order_id", complained),
+    ]
+
+    print(f"{'query':<24}{'indexed ms':>12}{'scan ms':>12}{'speedup':>10}")
+    for name, indexed, table, field, keys in queries:
+        for key in keys[:scan_runs]:
+            assert indexed(key) == scan(table, field, key), f"{name}: index disagrees with scan for {key}"
+        indexed_ms = timed(indexed, keys, args.runs)
+        scan_ms = timed(lambda key: scan(table, field, key), keys, scan_runs)
+        print(f"{name:<24}{indexed_ms:>12.4f}{scan_ms:>12.2f}{scan_ms / max(indexed_ms, 1e-6):>9.0f}x")
+
+    heaviest = max(sandbox_db.order_index["customer_id"].items(), key=lambda item: len(item[1]))[0]
+    profile_ms = timed(get_customer_profile, [heaviest] * args.runs, args.runs)
+    print(f"\nget_customer_profile({heaviest}) with {len(sandbox_db.get_customer_order_history(heaviest))} orders: {profile_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/sandbox_memory_benchmark.py
+# Bytes per record of the in-memory sandbox with plain dict records and with the compact slotted
+# records of sandbox_records (SANDBOX_COMPACT_RECORDS). Each table comes from sandbox_generator
+# as JSON, like an import, and is decoded and loaded under tracemalloc, so the figures include
+# the record, its values and its index entries. Accessors are checked to agree across both first.
+#
+# Usage:
+#   python benchmarks/sandbox_memory_benchmark.py --orders 200000
+
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Sandbox"))
+
+from sandbox_database import SandboxDatabase  # noqa: E402
+from sandbox_generator import generate, load_into  # noqa: E402
+
+TABLES = ("customers", "orders", "complaints")
+
+
+def serialized(args) -> dict:
+    """Generated records as JSON per table, decoded again under tracemalloc so each load builds fresh dicts"""
+    tables = {table: [] for table in TABLES}
+    for table, record in generate(args.seed, args.customers, args.merchants, args.drivers, args.orders):
+        if table in tables:
+            tables[table].append(json.dumps(record))
+    return tables
+
+
+def bytes_per_record(compact: bool, tables: dict) -> dict:
+    database = SandboxDatabase(compact_records=compact)
+    sizes = {}
+    for table in TABLES:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        load_into(database, ((table, json.loads(line)) for line in tables[table]))
+        sizes[table] = (tracemalloc.get_traced_memory()[0] - before) / max(len(tables[table]), 1)
+        tracemalloc.stop()
+    # 100 refunds stand in for the transactions table, which the generator does not fill
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for number in range(100):
+        database.process_refund("C002", 50.0, f"Benchmark refund {number}")
+    sizes["transactions"] = (tracemalloc.get_traced_memory()[0] - before) / 100
+    tracemalloc.stop()
+    return sizes
+
+
+def check_accessors(args, samples: int = 200):
+    """get_*_details and the history lookups return equal records from both engines"""
+    plain, compact = SandboxDatabase(compact_records=False), SandboxDatabase(compact_records=True)
+    for database in (plain, compact):
+        load_into(database, generate(args.seed, min(args.customers, 500), args.merchants, args.drivers, min(args.orders, 10000)))
+    generator = random.Random(1)
+    for order_id in generator.sample(list(plain.orders), min(samples, len(plain.orders))):
+        order = plain.get_order_details(order_id)
+        assert compact.get_order_details(order_id) == order, order_id
+        assert compact.get_customer_details(order["customer_id"]) == plain.get_customer_details(order["customer_id"])
+        assert compact.get_customer_order_history(order["customer_id"]) == plain.get_customer_order_history(order["customer_id"])
+        assert compact.get_order_complaints(order_id) == plain.get_order_complaints(order_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sandbox memory per record: dicts vs compact records")
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--drivers", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    check_accessors(args)
+    tables = serialized(args)
+    plain = bytes_per_record(False, tables)
+    compact = bytes_per_record(True, tables)
+    print(f"{'table':<16}{'dict B/record':>15}{'compact B/record':>18}{'saved':>8}")
+    for table in TABLES + ("transactions",):
+        print(f"{table:<16}{plain[table]:>15,.0f}{compact[table]:>18,.0f}{1 - compact[table] / plain[table]:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
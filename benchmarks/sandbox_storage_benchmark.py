@@ -0,0 +1,95 @@
+# benchmarks/sandbox_storage_benchmark.py
+# Read and write throughput of the sandbox storage engines: the in-memory SandboxDatabase,
+# SQLite with group-committed writes, and SQLite committing every write on its own
+# (max_batch=1). Writes are refunds, complaints and merchant feedback issued from several
+# threads at once, like concurrent agent turns; reads are customer, order and history lookups.
+#
+# Usage:
+#   python benchmarks/sandbox_storage_benchmark.py --writes 5000 --threads 16
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Sandbox"))
+
+from sandbox_database import SandboxDatabase  # noqa: E402
+from sandbox_sqlite import GroupCommitWriter, SQLiteSandboxDatabase  # noqa: E402
+
+
+def build(engine: str, directory: str):
+    if engine == "memory":
+        return SandboxDatabase()
+    database = SQLiteSandboxDatabase(os.path.join(directory, f"{engine}.db"), seed=SandboxDatabase())
+    if engine == "sqlite-single-commit":
+        database.writer.close()
+        database.writer = GroupCommitWriter(database.path, max_batch=1)
+    return database
+
+
+def write(database, index: int):
+    kind = index % 3
+    if kind == 0:
+        database.process_refund("C001", 50.0, f"Benchmark refund {index}")
+    elif kind == 1:
+        database.log_complaint("C001", f"ORD_{index % 500 + 1:03d}", "late_delivery", f"Benchmark complaint {index}")
+    else:
+        database.log_merchant_feedback("M001", f"Benchmark feedback {index}", "low")
+
+
+def read(database, index: int):
+    kind = index % 3
+    if kind == 0:
+        database.get_customer_details("C001")
+    elif kind == 1:
+        database.get_order_details(f"ORD_{index % 500 + 1:03d}")
+    else:
+        database.get_order_complaints(f"ORD_{index % 500 + 1:03d}")
+
+
+def throughput(operation, database, count: int, threads: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda index: operation(database, index), range(count)))
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sandbox storage engine read/write throughput")
+    parser.add_argument("--writes", type=int, default=3000)
+    parser.add_argument("--reads", type=int, default=30000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    generator = random.Random(3)
+    orders = [{
+        "id": f"ORD_{number:03d}", "customer_id": "C001", "merchant_id": "M001", "driver_id": "D001",
+        "description": "Benchmark order", "amount": generator.choice([150, 250, 450]),
+        "order_time": "2024-08-01 12:00:00", "status": "delivered", "payment_method": "wallet",
+        "delivery_address": "Benchmark address", "issue_reported": None
+    } for number in range(1, 501)]
+
+    print(f"{'engine':<24}{'writes/s':>10}{'reads/s':>10}{'commits':>10}{'largest batch':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for engine in ("memory", "sqlite", "sqlite-single-commit"):
+            database = build(engine, directory)
+            for order in orders:
+                database.add_order(order)
+            writes = throughput(write, database, args.writes, args.threads)
+            reads = throughput(read, database, args.reads, args.threads)
+            commits, largest = "-", "-"
+            if hasattr(database, "writer"):
+                stats = database.writer.stats()
+                commits, largest = stats["commits"], stats["largest_batch"]
+                database.close()
+            print(f"{engine:<24}{writes:>10,.0f}{reads:>10,.0f}{commits:>10}{largest:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/sandbox_stress_test.py
+# Hammers a sandbox engine with refunds, complaints, new orders and feedback from many threads
+# at once, then checks that nothing was lost: every returned ID is unique, the wallet balance
+# equals the starting balance plus every refund, and each history holds every record written.
+# The interpreter switch interval is lowered so threads are preempted mid-update far more often
+# than under a real server. Exits non-zero on any lost or duplicated update.
+#
+# Usage:
+#   python benchmarks/sandbox_stress_test.py --threads 32 --ops 2000
+#   python benchmarks/sandbox_stress_test.py --engine sqlite
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Sandbox"))
+
+from sandbox_database import SandboxDatabase  # noqa: E402
+
+CUSTOMER_ID = "C001"
+MERCHANT_ID = "M001"
+REFUND_AMOUNT = 1.0
+
+
+def worker(database, thread_index: int, ops: int, results: dict, start: threading.Barrier):
+    refunds, complaints, orders = [], [], []
+    feedback = 0
+    start.wait()
+    for op in range(ops):
+        kind = (thread_index + op) % 4
+        if kind == 0:
+            refunds.append(database.process_refund(CUSTOMER_ID, REFUND_AMOUNT, "stress")["id"])
+        elif kind == 1:
+            complaints.append(database.log_complaint(CUSTOMER_ID, "ORD_001", "stress", f"{thread_index}-{op}"))
+        elif kind == 2:
+            orders.append(database.create_order_from_description(f"stress {thread_index}-{op}", 100.0))
+        else:
+            database.log_merchant_feedback(MERCHANT_ID, f"stress {thread_index}-{op}", "low")
+            feedback += 1
+    results[thread_index] = (refunds, complaints, orders, feedback)
+
+
+def check(database, before: dict, results: dict) -> list:
+    refunds = [txn_id for result in results.values() for txn_id in result[0]]
+    complaints = [complaint_id for result in results.values() for complaint_id in result[1]]
+    orders = [order_id for result in results.values() for order_id in result[2]]
+    feedback = sum(result[3] for result in results.values())
+
+    customer = database.get_customer_details(CUSTOMER_ID)
+    merchant = database.get_merchant_details(MERCHANT_ID)
+    expected_balance = before["wallet_balance"] + REFUND_AMOUNT * len(refunds)
+    problems = [
+        ("duplicate refund IDs", len(refunds) - len(set(refunds))),
+        ("duplicate complaint IDs", len(complaints) - len(set(complaints))),
+        ("duplicate order IDs", len(orders) - len(set(orders))),
+        ("lost wallet credits", round((expected_balance - customer["wallet_balance"]) / REFUND_AMOUNT)),
+        ("lost complaint history entries", before["complaint_history"] + len(complaints) - len(customer["complaint_history"])),
+        ("complaints missing from index", len(complaints) - len(database.get_customer_complaints(CUSTOMER_ID))),
+        ("orders missing from history", before["orders"] + len(orders) - len(database.get_customer_order_history(CUSTOMER_ID))),
+        ("lost feedback entries", before["feedback"] + feedback - len(merchant.get("feedback_log", []))),
+    ]
+    return [(name, count) for name, count in problems if count]
+
+
+def run(engine: str, threads: int, ops: int, directory: str) -> bool:
+    if engine == "sqlite":
+        from sandbox_sqlite import SQLiteSandboxDatabase
+        database = SQLiteSandboxDatabase(os.path.join(directory, "stress.db"), seed=SandboxDatabase())
+    else:
+        database = SandboxDatabase()
+
+    customer = database.get_customer_details(CUSTOMER_ID)
+    before = {
+        "wallet_balance": customer["wallet_balance"],
+        "complaint_history": len(customer["complaint_history"]),
+        "orders": len(database.get_customer_order_history(CUSTOMER_ID)),
+        "feedback": len(database.get_merchant_details(MERCHANT_ID).get("feedback_log", []))
+    }
+
+    results = {}
+    start = threading.Barrier(threads)
+    pool = [threading.Thread(target=worker, args=(database, index, ops, results, start)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    problems = check(database, before, results)
+    if hasattr(database, "close"):
+        database.close()
+    writes = threads * ops
+    print(f"{engine:<8}{writes:>10,} writes in {elapsed:6.2f} s ({writes / elapsed:>9,.0f}/s)  "
+          + ("OK" if not problems else "FAILED: " + ", ".join(f"{name} {count}" for name, count in problems)))
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent write stress test for the sandbox engines")
+    parser.add_argument("--engine", choices=["memory", "sqlite", "all"], default="all")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=2000, help="writes per thread")
+    parser.add_argument("--switch-interval", type=float, default=1e-6, help="sys.setswitchinterval seconds")
+    args = parser.parse_args()
+
+    sys.setswitchinterval(args.switch_interval)
+    engines = ["memory", "sqlite"] if args.engine == "all" else [args.engine]
+    with tempfile.TemporaryDirectory() as directory:
+        ok = all([run(engine, args.threads, args.ops if engine == "memory" else max(args.ops // 10, 1), directory)
+                  for engine in engines])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
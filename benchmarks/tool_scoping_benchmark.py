@@ -0,0 +1,92 @@
+# benchmarks/tool_scoping_benchmark.py
+# Compares the agent prompt size (and optionally per-step Gemini latency) of the full
+# toolset against the intent-scoped executors picked by tool_selection.
+#
+# Usage:
+#   python benchmarks/tool_scoping_benchmark.py            # prompt tokens only, no API calls
+#   python benchmarks/tool_scoping_benchmark.py --live 3   # also time 3 uncached calls per prompt
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agent_core import AGENT_PROMPT, agent, get_scoped_agent
+from conversation_memory import estimate_tokens
+from tool_selection import select_tool_groups
+
+SCENARIOS = [
+    "Where is my order? It's been 40 minutes",
+    "My driver is stuck in traffic, how long will it take?",
+    "My food was spilled all over the bag",
+    "I received the wrong order, these are not my items",
+    "I want a refund for my ₹800 order",
+    "The packaging was damaged and I want my money back",
+    "Can you help me with something?",
+]
+
+
+def render_step(message: str) -> list:
+    """The messages sent to Gemini on the first agent step of a turn"""
+    return AGENT_PROMPT.format_messages(input=message, chat_history="", agent_scratchpad=[])
+
+
+def step_tokens(executor, messages: list) -> int:
+    """Prompt plus the executor's tool declarations, which are sent with every step"""
+    declarations = [convert_to_openai_tool(tool) for tool in executor.tools]
+    return estimate_tokens("\n".join(str(message.content) for message in messages) + json.dumps(declarations))
+
+
+def time_step(llm, executor, messages: list, runs: int) -> float:
+    bound = llm.bind_tools(executor.tools)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        bound.invoke(messages)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent prompt size with and without tool scoping")
+    parser.add_argument("--live", type=int, default=0, metavar="RUNS",
+                        help="time RUNS uncached Gemini calls per prompt (needs GOOGLE_API_KEY)")
+    args = parser.parse_args()
+
+    llm = None
+    if args.live:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.2, cache=False)
+
+    print(f"{'scenario':<55} {'groups':<24} {'tools':>5} {'full':>6} {'scoped':>6} {'saved':>6}", end="")
+    print(f" {'full ms':>8} {'scoped ms':>9}" if llm else "")
+
+    full_total = scoped_total = 0
+    for message in SCENARIOS:
+        groups = select_tool_groups(message)
+        scoped = get_scoped_agent(groups)
+        messages = render_step(message)
+        full_tokens = step_tokens(agent, messages)
+        scoped_tokens = step_tokens(scoped, messages)
+        full_total += full_tokens
+        scoped_total += scoped_tokens
+
+        print(f"{message[:55]:<55} {', '.join(groups) or 'all':<24} {len(scoped.tools):>5} "
+              f"{full_tokens:>6} {scoped_tokens:>6} {1 - scoped_tokens / full_tokens:>6.0%}", end="")
+        if llm:
+            print(f" {time_step(llm, agent, messages, args.live):>8.0f} {time_step(llm, scoped, messages, args.live):>9.0f}")
+        else:
+            print()
+
+    print(f"\nPrompt tokens per first step: {full_total} full vs {scoped_total} scoped "
+          f"({1 - scoped_total / full_total:.0%} fewer)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/turn_benchmark.py
+# Runs scripted conversations through flask_app against the replay LLM and reports, per
+# scenario, wall time, LLM calls (agent iterations), tool calls and prompt tokens per turn
+# and the LLM calls per resolved turn. Exits non-zero
+# when a scenario needs more LLM calls than benchmarks/baseline.json allows.
+#
+# Usage:
+#   python benchmarks/turn_benchmark.py                      # replay every cassette, check the baseline
+#   python benchmarks/turn_benchmark.py --latency-ms 800     # simulate Gemini latency per call
+#   python benchmarks/turn_benchmark.py --update-baseline    # accept the current LLM call counts
+#   python benchmarks/turn_benchmark.py --record spilled_food "msg 1" "msg 2"   # record a cassette with Gemini
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASSETTE_DIR = os.path.join(ROOT, "benchmarks", "cassettes")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+sys.path.insert(0, ROOT)
+
+
+def configure(record: bool, latency_ms: int):
+    """Settings must be in place before flask_app and agent_core are imported"""
+    if not record:
+        os.environ["AGENT_LLM"] = "replay"
+        os.environ["REPLAY_LATENCY_MS"] = str(latency_ms)
+    # Cached answers would hide LLM calls from the counts
+    os.environ["LLM_CACHE"] = "off"
+    os.environ.setdefault("MODEL_CLIENTS", "local")
+    os.environ.setdefault("SESSION_BACKEND", "memory")
+
+
+def run_scenario(flask_app, llm, turns: list) -> list:
+    """Send each turn through /send_message in one conversation; returns per-turn metrics"""
+    client = flask_app.app.test_client()
+    results = []
+    for message in turns:
+        before = llm.stats() if hasattr(llm, "stats") else None
+        start = time.perf_counter()
+        response = client.post("/send_message", data={"message": message})
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"Turn failed ({response.status_code}): {response.get_json()}")
+
+        turn = {"wall_ms": round(elapsed * 1000, 1)}
+        if before is not None:
+            after = llm.stats()
+            for counter in ("llm_calls", "tool_calls", "prompt_tokens"):
+                turn[counter] = after[counter] - before[counter]
+        results.append(turn)
+    return results
+
+
+def record(flask_app, agent_core, name: str, turns: list):
+    from replay_llm import CassetteRecorder, save_cassette
+
+    recorder = CassetteRecorder()
+    agent_core.llm.callbacks = [recorder]
+    run_scenario(flask_app, agent_core.llm, turns)
+    path = os.path.join(CASSETTE_DIR, f"{name}.json")
+    save_cassette(path, name, turns, recorder.responses)
+    print(f"Recorded {len(recorder.responses)} LLM responses to {path}")
+
+
+def replay(flask_app, agent_core, update_baseline: bool) -> int:
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    regressions = []
+    measured = {}
+    print(f"{'scenario':<16} {'turn':>4} {'wall ms':>9} {'llm':>4} {'tools':>5} {'prompt tok':>10}")
+    for path in sorted(glob.glob(os.path.join(CASSETTE_DIR, "*.json"))):
+        cassette = agent_core.llm.load_cassette(path)
+        name = cassette["scenario"]
+        turns = run_scenario(flask_app, agent_core.llm, cassette["turns"])
+
+        for index, turn in enumerate(turns, 1):
+            print(f"{name:<16} {index:>4} {turn['wall_ms']:>9.1f} {turn['llm_calls']:>4} "
+                  f"{turn['tool_calls']:>5} {turn['prompt_tokens']:>10}")
+        llm_calls = sum(turn["llm_calls"] for turn in turns)
+        measured[name] = {"llm_calls": llm_calls}
+
+        allowed = baseline.get(name, {}).get("llm_calls")
+        status = "new" if allowed is None else "ok" if llm_calls <= allowed else "REGRESSION"
+        print(f"{name:<16} total wall {sum(turn['wall_ms'] for turn in turns):.1f} ms, "
+              f"{llm_calls} LLM calls, {llm_calls / len(turns):.1f} per turn (baseline {allowed}) {status}\n")
+        if status == "REGRESSION":
+            regressions.append(f"{name}: {llm_calls} LLM calls, baseline allows {allowed}")
+
+    if update_baseline:
+        with open(BASELINE_PATH, "w") as baseline_file:
+            json.dump(measured, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    for regression in regressions:
+        print(f"FAIL {regression}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end agent turn benchmark on recorded LLM transcripts")
+    parser.add_argument("--latency-ms", type=int, default=0, help="simulated latency per replayed LLM call")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--record", nargs="+", metavar=("SCENARIO", "MESSAGE"),
+                        help="record a new cassette against Gemini: scenario name followed by its messages")
+    args = parser.parse_args()
+
+    configure(record=bool(args.record), latency_ms=args.latency_ms)
+    import flask_app
+
+    if not flask_app.AGENT_AVAILABLE:
+        print("Agent could not be imported; see the warning above")
+        return 2
+    import agent_core
+
+    if args.record:
+        record(flask_app, agent_core, args.record[0], args.record[1:])
+        return 0
+    return replay(flask_app, agent_core, args.update_baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
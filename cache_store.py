@@ -0,0 +1,140 @@
+# cache_store.py
+# Two-tier (in-memory LRU + local SQLite) result cache with TTL, size limits and hit/miss metrics
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_hash(*parts) -> str:
+    """Stable SHA-256 key over bytes and strings"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class TieredCache:
+    """
+    JSON-serializable values are kept in an in-process LRU and, when disk_path is set,
+    in a local SQLite file that survives restarts and is shared by worker processes.
+    Memory hits avoid any I/O; disk hits are promoted back into memory.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl_seconds: int = 86400,
+                 disk_path: str = None, max_disk_bytes: int = 100 * 1024 * 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if self.disk_path:
+            directory = os.path.dirname(self.disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._disk().execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._disk().execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def _disk(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Return the cached value or None"""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                encoded, expires_at = entry
+                if expires_at >= now:
+                    self.memory.move_to_end(key)
+                    self.metrics["memory_hits"] += 1
+                    return json.loads(encoded)
+                del self.memory[key]
+
+        if self.disk_path:
+            try:
+                conn = self._disk()
+                row = conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at >= ?", (key, now)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._remember(key, row[0], row[1])
+                    with self.lock:
+                        self.metrics["disk_hits"] += 1
+                    return json.loads(row[0])
+            except sqlite3.Error as e:
+                print(f"{self.name} cache disk read failed: {e}")
+
+        with self.lock:
+            self.metrics["misses"] += 1
+        return None
+
+    def set(self, key: str, value):
+        encoded = json.dumps(value, separators=(',', ':'), default=str)
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, encoded, expires_at)
+        with self.lock:
+            self.metrics["stores"] += 1
+
+        if self.disk_path:
+            try:
+                conn = self._disk()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, encoded, len(encoded), expires_at, time.time())
+                )
+                self._evict_disk(conn)
+            except sqlite3.Error as e:
+                print(f"{self.name} cache disk write failed: {e}")
+
+    def _remember(self, key: str, encoded: str, expires_at: float):
+        with self.lock:
+            self.memory[key] = (encoded, expires_at)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def _evict_disk(self, conn: sqlite3.Connection):
+        """Drop expired rows, then least recently used rows until under the size limit"""
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        while total > self.max_disk_bytes:
+            row = conn.execute("SELECT key, size FROM cache ORDER BY accessed_at LIMIT 1").fetchone()
+            if not row:
+                break
+            conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+            total -= row[1]
+            with self.lock:
+                self.metrics["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            metrics = dict(self.metrics)
+            metrics["memory_entries"] = len(self.memory)
+        lookups = metrics["memory_hits"] + metrics["disk_hits"] + metrics["misses"]
+        metrics["hit_ratio"] = round((metrics["memory_hits"] + metrics["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return metrics
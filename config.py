@@ -1,13 +1,21 @@
 # config.py
 
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
+@lru_cache(maxsize=None)
+def load_environment():
+    """
+    Reads the .env file into the environment once per process.
+    """
+    load_dotenv()
+
 def load_api_key():
     """
     Loads the Google API key from the .env file.
     """
-    load_dotenv()
+    load_environment()
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY not found in .env file. Please add it.")
@@ -17,9 +25,24 @@ def load_assemblyai_api_key():
     """
     Loads the AssemblyAI API key from the .env file.
     """
-    load_dotenv()
+    load_environment()
     api_key = os.getenv("ASSEMBLYAI_API_KEY")
     if not api_key:
         raise ValueError("ASSEMBLYAI_API_KEY not found in .env file. Please add it.")
     return api_key
 
+
+def get_int_setting(name: str, default: int) -> int:
+    """
+    Reads an integer deployment setting from the environment (or .env file).
+    """
+    load_environment()
+    value = os.getenv(name)
+    return int(value) if value else default
+
+def get_setting(name: str, default: str) -> str:
+    """
+    Reads a string deployment setting from the environment (or .env file).
+    """
+    load_environment()
+    return os.getenv(name) or default
@@ -0,0 +1,102 @@
+# conversation_memory.py
+# Per-session conversation memory with a token budget and a rolling summary of older turns
+
+import math
+import re
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Length of each side of a turn kept in the rolling summary
+SUMMARY_SNIPPET_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token-count estimate, no tokenizer download or API call needed.
+    Takes the larger of ~4 characters per token and ~1.3 tokens per word/punctuation
+    mark, which tracks Gemini's counts closely enough for budgeting.
+    """
+    if not text:
+        return 0
+    by_chars = len(text) / 4
+    by_words = len(WORD_PATTERN.findall(text)) * 1.3
+    return int(math.ceil(max(by_chars, by_words)))
+
+
+def split_turns(entries: list) -> list:
+    """Group memory entries into turns; every turn starts with a user entry"""
+    turns = []
+    for entry in entries:
+        if entry['role'] == 'user' or not turns:
+            turns.append([])
+        turns[-1].append(entry)
+    return turns
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= SUMMARY_SNIPPET_CHARS else text[:SUMMARY_SNIPPET_CHARS - 3] + "..."
+
+
+def summarize_turn(turn: list) -> str:
+    """One extractive summary line for a compacted turn"""
+    parts = []
+    for entry in turn:
+        if entry['role'] == 'user':
+            parts.append(f"Customer: {_snippet(entry['content'])}")
+        elif entry['role'] == 'system':
+            description = entry['content'].split("- Description:", 1)[-1].split("\n", 1)[0]
+            parts.append(f"Image evidence: {_snippet(description)}")
+        else:
+            parts.append(f"Agent: {_snippet(entry['content'])}")
+    return " | ".join(parts)
+
+
+def compact_memory(entries: list, summary_lines: list, token_budget: int, summary_budget: int):
+    """
+    Keep the newest turns that fit within token_budget and fold older ones into the
+    rolling summary, whose oldest lines are dropped once it exceeds summary_budget.
+    Returns (entries, summary_lines) without modifying the inputs.
+    """
+    turns = split_turns(entries)
+    kept = []
+    used = 0
+    for turn in reversed(turns):
+        cost = sum(estimate_tokens(entry['content']) for entry in turn)
+        # Always keep the latest turn, even if it alone is over budget
+        if kept and used + cost > token_budget:
+            break
+        kept.insert(0, turn)
+        used += cost
+
+    compacted = turns[:len(turns) - len(kept)]
+    summary_lines = list(summary_lines) + [summarize_turn(turn) for turn in compacted]
+    while summary_lines and sum(estimate_tokens(line) for line in summary_lines) > summary_budget:
+        summary_lines.pop(0)
+
+    return [entry for turn in kept for entry in turn], summary_lines
+
+
+def build_chat_history(entries: list, summary_lines: list, token_budget: int, summary_budget: int):
+    """
+    Render the budgeted history as the agent's chat_history text.
+    Returns (history_text, stats) where stats reports the estimated history tokens.
+    """
+    window, summary_lines = compact_memory(entries, summary_lines, token_budget, summary_budget)
+
+    lines = []
+    if summary_lines:
+        lines.append("Summary of earlier conversation:")
+        lines.extend(f"- {line}" for line in summary_lines)
+    prefixes = {'user': 'Human', 'assistant': 'AI', 'system': 'System'}
+    for entry in window:
+        lines.append(f"{prefixes.get(entry['role'], 'AI')}: {entry['content']}")
+    history_text = "\n".join(lines)
+
+    stats = {
+        'history_tokens': estimate_tokens(history_text),
+        'window_turns': len(split_turns(window)),
+        'summarized_turns': len(summary_lines),
+        'token_budget': token_budget
+    }
+    return history_text, stats
@@ -0,0 +1,130 @@
+# entity_extraction.py
+# Pulls amounts, IDs and item names out of a customer's message once per turn, so tools read
+# them from the turn instead of re-parsing their inputs or falling back to sample IDs.
+
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+NUMBER = r"\d[\d,]*(?:\.\d+)?"
+
+# No \b after "Rs.": "." to " " is not a word boundary, so "Rs. 500" would never match.
+# (?![a-z]) still stops "rsvp" or "inrange" from reading as a currency.
+AMOUNT_PATTERN = re.compile(
+    rf"(?P<symbol>₹|\$|\b(?:rs\.?|inr|usd)(?![a-z]))\s*(?P<value>{NUMBER})"
+    rf"|\b(?P<value_first>{NUMBER})\s*(?P<unit>/-|\b(?:rupees?|rs\.?|inr|dollars?|usd)\b)",
+    re.IGNORECASE
+)
+CURRENCIES = {"₹": "INR", "rs": "INR", "rs.": "INR", "inr": "INR", "rupee": "INR", "rupees": "INR", "/-": "INR",
+              "$": "USD", "usd": "USD", "dollar": "USD", "dollars": "USD"}
+
+ID_PATTERN = re.compile(r"\b(?:ORD_\d+|[CMD]\d{3,})\b", re.IGNORECASE)
+ID_KINDS = {"O": "order_ids", "C": "customer_ids", "M": "merchant_ids", "D": "driver_ids"}
+
+ITEM_PATTERN = re.compile(
+    r"\b(?:ordered|got|received|instead of|missing|forgot)\s+(?:(?:a|an|the|my|some|\d+)\s+)?"
+    r"(?P<item>[a-z][a-z' -]{1,40}?)"
+    r"(?=\s+(?:from|instead|but|and|with|which|that|was|were|is|are)\b|\s*[,.!?;]|\s*$)",
+    re.IGNORECASE
+)
+NOT_ITEMS = {"food", "it", "this", "that", "nothing", "anything", "refund", "money", "delivery", "items"}
+# "got the wrong order", "received someone else's order": the complaint, not an item
+NOT_ITEM_WORDS = re.compile(r"\b(?:order|wrong|nothing)\b", re.IGNORECASE)
+
+FIELDS = ("amounts", "order_ids", "customer_ids", "merchant_ids", "driver_ids", "items")
+
+_current_entities = ContextVar("turn_entities", default=None)
+
+
+class Entities:
+    """Amounts ({"value", "currency"}), IDs and item names mentioned in a text, in order of appearance"""
+
+    def __init__(self, **values):
+        for field in FIELDS:
+            setattr(self, field, tuple(values.get(field, ())))
+
+    @property
+    def order_id(self):
+        return self.order_ids[0] if self.order_ids else None
+
+    @property
+    def customer_id(self):
+        return self.customer_ids[0] if self.customer_ids else None
+
+    @property
+    def merchant_id(self):
+        return self.merchant_ids[0] if self.merchant_ids else None
+
+    @property
+    def driver_id(self):
+        return self.driver_ids[0] if self.driver_ids else None
+
+    def amount(self, currency: str = "INR"):
+        """First amount in the given currency, or None"""
+        for amount in self.amounts:
+            if amount["currency"] == currency:
+                return amount["value"]
+        return None
+
+    def backed_by(self, fallback: "Entities") -> "Entities":
+        """These entities first, then any of fallback's that are not already listed"""
+        return Entities(**{
+            field: getattr(self, field) + tuple(value for value in getattr(fallback, field) if value not in getattr(self, field))
+            for field in FIELDS
+        })
+
+    def to_dict(self) -> dict:
+        return {field: list(getattr(self, field)) for field in FIELDS if getattr(self, field)}
+
+
+def _parse_number(text: str) -> float:
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value
+
+
+@lru_cache(maxsize=2048)
+def extract_entities(text: str) -> Entities:
+    """Run every entity pattern over the text once"""
+    text = text or ""
+    values = {field: [] for field in FIELDS}
+
+    for match in AMOUNT_PATTERN.finditer(text):
+        unit = (match.group("symbol") or match.group("unit")).lower()
+        amount = {"value": _parse_number(match.group("value") or match.group("value_first")), "currency": CURRENCIES[unit]}
+        if amount not in values["amounts"]:
+            values["amounts"].append(amount)
+
+    for match in ID_PATTERN.finditer(text):
+        entity_id = match.group(0).upper()
+        ids = values[ID_KINDS[entity_id[0]]]
+        if entity_id not in ids:
+            ids.append(entity_id)
+
+    for match in ITEM_PATTERN.finditer(text):
+        item = match.group("item").strip().lower()
+        if item not in NOT_ITEMS and not NOT_ITEM_WORDS.search(item) and item not in values["items"]:
+            values["items"].append(item)
+
+    return Entities(**values)
+
+
+def turn_entities() -> Entities:
+    """Entities of the message the current turn is answering (empty outside an entity_scope)"""
+    return _current_entities.get() or Entities()
+
+
+def entities_for(text: str) -> Entities:
+    """Entities in a tool's own input, backed by the turn's for anything the input leaves out"""
+    return extract_entities(text or "").backed_by(turn_entities())
+
+
+@contextmanager
+def entity_scope(texts):
+    """Extract the turn's entities from the customer's message parts once; yields the Entities"""
+    entities = extract_entities("\n".join(texts))
+    token = _current_entities.set(entities)
+    try:
+        yield entities
+    finally:
+        _current_entities.reset(token)
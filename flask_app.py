@@ -1,22 +1,43 @@
-from flask import Flask, render_template, request, jsonify, session, send_from_directory, url_for
+from flask import Flask, render_template, request, jsonify, session, send_from_directory, url_for, Response
 import os
-import base64
-from PIL import Image
-import io
+import time
 import uuid
-import tempfile
-import assemblyai as aai
+
+from streaming import QueueCallbackHandler, action_thought, drain_events, sse_event
+from job_queue import JobQueue, JobQueueFull
+from config import get_int_setting, get_setting
+from image_pipeline import ImagePipeline
+from cache_store import TieredCache, content_hash
+from model_clients import model_clients, use_local_clients, VISION_MODEL
+from transcription import buffer_audio, run_transcription, TRANSCRIPTION_CONFIG_VERSION
+from session_store import create_session_interface
+from conversation_memory import build_chat_history, compact_memory
+from intent_router import IntentRouter
+from tool_selection import select_tool_groups
+from tools import lookup_scope
+from observation_budget import observation_scope
+from entity_extraction import entity_scope
+from turn_accounting import TurnAccounting, TurnLog
 
 # Initialize Flask app with explicit static folder configuration
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 app.secret_key = 'your-secret-key-here'  # Change this in production
 
-# Configure AssemblyAI with API key from environment
-try:
-    from config import load_assemblyai_api_key
-    aai.settings.api_key = load_assemblyai_api_key()
-except Exception as e:
-    print(f"Warning: AssemblyAI API key not loaded: {e}")
+# Keep conversations on the server; the cookie only carries an opaque session id
+session_interface = create_session_interface(
+    get_setting("SESSION_BACKEND", "memory"),
+    ttl_seconds=get_int_setting("SESSION_TTL_SECONDS", 86400),
+    max_entries=get_int_setting("SESSION_MAX_ENTRIES", 10000),
+    sqlite_path=get_setting("SESSION_SQLITE_PATH", "sessions.db")
+)
+if session_interface:
+    app.session_interface = session_interface
+
+# Model clients are built once per worker and warmed up at startup
+if get_setting("MODEL_CLIENTS", "remote") == "local":
+    # Simulated upstream latency makes the stand-ins usable for load tests
+    use_local_clients(latency_seconds=get_int_setting("LOCAL_CLIENT_LATENCY_MS", 0) / 1000)
+model_clients.warm_up_in_background()
 
 # Add route to serve static files explicitly (fallback)
 @app.route('/static/<filename>')
@@ -30,43 +51,28 @@ def test_image():
 
 # Import agent after Flask setup to avoid circular imports
 try:
-    from agent_core import agent
-    from langchain_core.messages import HumanMessage, AIMessage
+    from agent_core import agent, get_scoped_agent, llm_cache, TURN_OBSERVATION_TOKEN_BUDGET
     AGENT_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Agent not available: {e}")
     AGENT_AVAILABLE = False
+    llm_cache = None
+    TURN_OBSERVATION_TOKEN_BUDGET = 0
 
 # --- Enhanced Image Analysis with Real AI Vision ---
-def analyze_image_content(image):
-    """
-    Real image analysis using Google Gemini Vision API for customer service evidence.
-    Analyzes actual uploaded images to extract relevant information.
-    """
-    try:
-        # Import Google Generative AI for vision
-        import google.generativeai as genai
-        from config import load_api_key
-        
-        # Load API key (same as used for the chat agent)
-        load_api_key()
-        
-        # Configure Gemini for vision analysis
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Convert PIL image to bytes for API
-        img_buffer = io.BytesIO()
-        image.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-        
-        # Prepare the image for Gemini
-        image_data = {
-            'mime_type': 'image/png',
-            'data': img_buffer.getvalue()
-        }
-        
-        # Detailed prompt for food delivery analysis
-        analysis_prompt = """
+# Bump whenever the analysis prompt or output format changes so cached analyses are not reused
+VISION_PROMPT_VERSION = 'v1'
+
+# Repeat uploads of the same photo (resends, retries) are answered from this cache
+vision_cache = TieredCache(
+    "vision",
+    max_entries=get_int_setting("VISION_CACHE_MAX_ENTRIES", 512),
+    ttl_seconds=get_int_setting("VISION_CACHE_TTL_SECONDS", 7 * 86400),
+    disk_path=get_setting("VISION_CACHE_PATH", os.path.join("cache", "vision_cache.db")),
+    max_disk_bytes=get_int_setting("VISION_CACHE_MAX_DISK_BYTES", 50 * 1024 * 1024)
+)
+
+VISION_ANALYSIS_PROMPT = """
 You are an AI assistant for Grab food delivery service analyzing customer complaint images. 
 
 Analyze this image and provide a detailed assessment for customer service purposes. Focus on:
@@ -92,216 +98,685 @@ Provide your analysis in this exact JSON format:
 
 Analyze the actual image content - don't make up scenarios. Base your assessment only on what you can see.
 """
+
+def vision_request(ingested_image):
+    """Cache key and Gemini request contents for an ingested image"""
+    # The normalized model image is deterministic for identical uploads
+    cache_key = content_hash(VISION_MODEL, VISION_PROMPT_VERSION, ingested_image['model_bytes'])
+    # Prepare the image for Gemini (already encoded by the ingestion pipeline)
+    image_data = {
+        'mime_type': ingested_image['model_mime_type'],
+        'data': ingested_image['model_bytes']
+    }
+    return cache_key, [VISION_ANALYSIS_PROMPT, image_data]
+
+def cached_image_analysis(cache_key):
+    cached_analysis = vision_cache.get(cache_key)
+    if cached_analysis is not None:
+        cached_analysis['image_metadata']['cache_hit'] = True
+    return cached_analysis
+
+def analyze_image_content(ingested_image):
+    """
+    Real image analysis using Google Gemini Vision API for customer service evidence.
+    Analyzes actual uploaded images to extract relevant information.
+    Takes the output of image_pipeline.ingest_image and sends its model-sized JPEG.
+    """
+    cache_key, contents = vision_request(ingested_image)
+    cached_analysis = cached_image_analysis(cache_key)
+    if cached_analysis is not None:
+        return cached_analysis
+    
+    try:
+        # Shared Gemini vision client (configured once per worker)
+        model = model_clients.get("vision")
         
         # Get analysis from Gemini Vision
-        response = model.generate_content([analysis_prompt, image_data])
-        analysis_text = response.text.strip()
-        
-        # Try to parse JSON response
-        import json
-        try:
-            # Extract JSON from response (in case there's extra text)
-            start = analysis_text.find('{')
-            end = analysis_text.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = analysis_text[start:end]
-                analysis_data = json.loads(json_str)
-            else:
-                raise ValueError("No valid JSON found")
-                
-        except (json.JSONDecodeError, ValueError):
-            # Fallback: parse the text response manually
-            analysis_data = {
-                "issue_type": "general_complaint",
-                "description": f"AI Analysis: {analysis_text[:200]}...",
-                "evidence": {
-                    "condition": "requires human review",
-                    "accuracy": "image uploaded for complaint",
-                    "damage_level": "moderate",
-                    "compensation_recommended": "standard resolution"
-                },
-                "confidence": 0.75
-            }
-        
-        # Format for return
-        from datetime import datetime
-        return {
-            "analysis": analysis_data["description"],
-            "evidence": analysis_data["evidence"],
-            "image_metadata": {
-                "dimensions": f"{image.size[0]}x{image.size[1]}",
-                "analyzed_at": datetime.now().isoformat(),
-                "analysis_confidence": analysis_data.get("confidence", 0.8),
-                "analysis_type": "real_ai_vision"
-            }
-        }
+        response = model.generate_content(contents)
+        return parse_image_analysis(response.text, ingested_image, cache_key)
         
     except Exception as e:
         print(f"Vision API error: {e}")
-        # Fallback to basic analysis
-        from datetime import datetime
-        return {
-            "analysis": f"Image uploaded by customer. Technical analysis unavailable. Manual review recommended for: {e}",
+        return fallback_image_analysis(ingested_image, e)
+
+def parse_image_analysis(response_text, ingested_image, cache_key):
+    """Turn Gemini's answer into the image analysis record and cache it"""
+    analysis_text = response_text.strip()
+    
+    # Try to parse JSON response
+    import json
+    try:
+        # Extract JSON from response (in case there's extra text)
+        start = analysis_text.find('{')
+        end = analysis_text.rfind('}') + 1
+        if start >= 0 and end > start:
+            json_str = analysis_text[start:end]
+            analysis_data = json.loads(json_str)
+        else:
+            raise ValueError("No valid JSON found")
+            
+    except (json.JSONDecodeError, ValueError):
+        # Fallback: parse the text response manually
+        analysis_data = {
+            "issue_type": "general_complaint",
+            "description": f"AI Analysis: {analysis_text[:200]}...",
             "evidence": {
-                "condition": "customer provided visual evidence",
-                "accuracy": "requires manual verification", 
+                "condition": "requires human review",
+                "accuracy": "image uploaded for complaint",
                 "damage_level": "moderate",
-                "compensation_recommended": "standard customer service resolution"
+                "compensation_recommended": "standard resolution"
             },
-            "image_metadata": {
-                "dimensions": f"{image.size[0]}x{image.size[1]}",
-                "analyzed_at": datetime.now().isoformat(),
-                "analysis_confidence": 0.6,
-                "analysis_type": "fallback_analysis"
-            }
+            "confidence": 0.75
         }
+    
+    # Format for return
+    from datetime import datetime
+    image_analysis = {
+        "analysis": analysis_data["description"],
+        "evidence": analysis_data["evidence"],
+        "image_metadata": {
+            "dimensions": ingested_image["source_dimensions"],
+            "analyzed_at": datetime.now().isoformat(),
+            "analysis_confidence": analysis_data.get("confidence", 0.8),
+            "analysis_type": "real_ai_vision"
+        }
+    }
+    # Only real model answers are cached; fallback analyses should be retried next time
+    vision_cache.set(cache_key, image_analysis)
+    return image_analysis
+
+def fallback_image_analysis(ingested_image, error):
+    # Fallback to basic analysis
+    from datetime import datetime
+    return {
+        "analysis": f"Image uploaded by customer. Technical analysis unavailable. Manual review recommended for: {error}",
+        "evidence": {
+            "condition": "customer provided visual evidence",
+            "accuracy": "requires manual verification", 
+            "damage_level": "moderate",
+            "compensation_recommended": "standard customer service resolution"
+        },
+        "image_metadata": {
+            "dimensions": ingested_image["source_dimensions"],
+            "analyzed_at": datetime.now().isoformat(),
+            "analysis_confidence": 0.6,
+            "analysis_type": "fallback_analysis"
+        }
+    }
 
 @app.route('/')
 def index():
-    if 'messages' not in session:
-        session['messages'] = []
-    if 'memory' not in session:
-        session['memory'] = []
+    ensure_session_state()
     return render_template('index.html')
 
-@app.route('/send_message', methods=['POST'])
-def send_message():
-    try:
-        user_prompt = request.form.get('message', '').strip()
-        uploaded_file = request.files.get('image')
-        
-        if not user_prompt:
-            return jsonify({'error': 'Please enter a message'}), 400
-        
-        # Initialize session data if not exists
-        if 'messages' not in session:
-            session['messages'] = []
-        if 'memory' not in session:
-            session['memory'] = []
-        
-        # Process user message
-        user_message = {
-            'role': 'user', 
-            'content': user_prompt,
-            'id': str(uuid.uuid4())
-        }
-        
-        agent_input_content = [user_prompt]
-        image_description = None
-        
-        # Handle image upload
-        if uploaded_file and uploaded_file.filename:
-            try:
-                image = Image.open(uploaded_file.stream)
-                # Convert image to base64 for display
-                img_buffer = io.BytesIO()
-                image.save(img_buffer, format='PNG')
-                img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-                
-                # Enhanced image analysis
-                image_analysis = analyze_image_content(image)
-                image_description = image_analysis["analysis"]
-                
-                user_message['image'] = img_base64
-                user_message['image_description'] = image_description
-                user_message['image_analysis'] = image_analysis
-                user_message['has_image'] = True
-                
-                # Add detailed image context to agent input
-                agent_input_content.append(f"Image Evidence: {image_description}")
-                agent_input_content.append(f"Evidence Details: {image_analysis['evidence']}")
-                
-            except Exception as e:
-                print(f"Error processing image: {e}")
-                user_message['image_error'] = str(e)
-        
-        session['messages'].append(user_message)
-        
-        # Get agent response
+def ensure_session_state(state=None):
+    """
+    Make sure the conversation keys exist in the session.
+    state defaults to the Flask session; the ASGI endpoints (asgi_app.py) pass their own dict.
+    """
+    state = session if state is None else state
+    if 'messages' not in state:
+        state['messages'] = []
+    if 'memory' not in state:
+        state['memory'] = []
+    if 'memory_summary' not in state:
+        state['memory_summary'] = []
+    if 'conversation_id' not in state:
+        state['conversation_id'] = str(uuid.uuid4())
+
+def build_user_turn(user_prompt, image_bytes=None, accounting=None):
+    """
+    Build the user message for the chat log and the content sent to the agent.
+    Runs the image ingestion pipeline and vision analysis when an image is attached.
+    Their time is added to the turn's accounting as the image and vision stages.
+    """
+    accounting = accounting or TurnAccounting()
+    user_message = new_user_message(user_prompt)
+    agent_input_content = [user_prompt]
+    
+    # Handle image upload
+    if image_bytes:
         try:
-            if not AGENT_AVAILABLE:
-                # Fallback response when agent is not available
-                final_output = "I'm sorry, but the AI agent is currently not available. This appears to be a technical issue. Please try again later or contact support."
-                reasoning_text = "**System Status:** AI agent is currently unavailable due to missing dependencies."
-            else:
-                # Convert session memory to proper format for agent
-                chat_history = []
-                for msg in session['memory']:
-                    if msg['role'] == 'user':
-                        chat_history.append(HumanMessage(content=msg['content']))
-                    else:
-                        chat_history.append(AIMessage(content=msg['content']))
-                
-                response = agent.invoke({
-                    "input": agent_input_content,
-                    "chat_history": chat_history
-                })
-                
-                final_output = response['output']
-                intermediate_steps = response.get('intermediate_steps', [])
-                
-                # Format reasoning
-                reasoning_text = ""
-                for step in intermediate_steps:
-                    action, observation = step
-                    thought = action.log.strip().split('Action:')[0].strip()
-                    action_str = f"Action: {action.tool} (Input: {action.tool_input})"
-                    observation_str = f"Observation: {observation}"
-                    reasoning_text += f"**Thought:** {thought}\n\n**{action_str}**\n\n**{observation_str}**\n\n---\n\n"
-            
-            # Create assistant message
-            assistant_message = {
-                'role': 'assistant',
-                'content': final_output,
-                'reasoning': reasoning_text,
-                'id': str(uuid.uuid4())
-            }
+            # Decode once, downscale, and encode the thumbnail and model image off the GIL
+            with accounting.stage("image"):
+                ingested_image = image_pipeline.ingest(image_bytes)
+            print(f"Image ingested {ingested_image['source_dimensions']} -> {ingested_image['dimensions']}: {ingested_image['timings']}")
             
-            session['messages'].append(assistant_message)
+            # Enhanced image analysis
+            with accounting.stage("vision"):
+                image_analysis = analyze_image_content(ingested_image)
+            attach_image_analysis(user_message, agent_input_content, ingested_image, image_analysis)
             
-            # Update memory (text only)
-            session['memory'].append({'role': 'user', 'content': user_prompt})
-            if 'image_analysis' in user_message:
-                # Store comprehensive image context in memory
-                image_context = f"""Image Evidence Analyzed:
+        except Exception as e:
+            print(f"Error processing image: {e}")
+            user_message['image_error'] = str(e)
+    
+    return user_message, agent_input_content
+
+def new_user_message(user_prompt):
+    return {
+        'role': 'user', 
+        'content': user_prompt,
+        'id': str(uuid.uuid4())
+    }
+
+def attach_image_analysis(user_message, agent_input_content, ingested_image, image_analysis):
+    """Add the chat thumbnail and vision analysis to the user message and the agent input"""
+    image_description = image_analysis["analysis"]
+    
+    user_message['image'] = ingested_image['display_base64']
+    user_message['image_mime_type'] = ingested_image['display_mime_type']
+    user_message['image_timings'] = ingested_image['timings']
+    user_message['image_description'] = image_description
+    user_message['image_analysis'] = image_analysis
+    user_message['has_image'] = True
+    
+    # Add detailed image context to agent input
+    agent_input_content.append(f"Image Evidence: {image_description}")
+    agent_input_content.append(f"Evidence Details: {image_analysis['evidence']}")
+
+def format_reasoning(intermediate_steps, observations=None):
+    """
+    Format the agent's intermediate steps as markdown for the reasoning panel.
+    observations (the turn's ObservationLog) restores tool outputs the agent only saw truncated.
+    """
+    reasoning_text = ""
+    for step in intermediate_steps:
+        action, observation = step
+        if observations is not None:
+            observation = observations.full_output(observation)
+        thought = action_thought(action)
+        action_str = f"Action: {action.tool} (Input: {action.tool_input})"
+        observation_str = f"Observation: {observation}"
+        if thought:
+            reasoning_text += f"**Thought:** {thought}\n\n"
+        reasoning_text += f"**{action_str}**\n\n**{observation_str}**\n\n---\n\n"
+    return reasoning_text
+
+def prepare_agent_turn(agent_input_content, memory, memory_summary):
+    """
+    Pick the executor and build the inputs for one agent turn.
+    Returns (turn_agent, inputs, history_stats); turn_agent is None when the agent is unavailable.
+    """
+    # Only the newest turns that fit the token budget are sent; older ones go in as a summary
+    chat_history, history_stats = build_chat_history(
+        memory, memory_summary, MEMORY_TOKEN_BUDGET, MEMORY_SUMMARY_TOKEN_BUDGET
+    )
+    print(f"Chat history: {history_stats}")
+    
+    inputs = {
+        "input": agent_input_content,
+        "chat_history": chat_history
+    }
+    if not AGENT_AVAILABLE:
+        return None, inputs, history_stats
+    
+    turn_agent = agent
+    if TOOL_SCOPING_ENABLED:
+        # Recent customer messages count too, so follow-ups like "it was ₹800" keep their tools
+        recent_requests = [entry['content'] for entry in memory if entry['role'] == 'user'][-2:]
+        tool_groups = select_tool_groups("\n".join(recent_requests + list(agent_input_content)))
+        print(f"Tool groups: {', '.join(tool_groups) or 'all tools'}")
+        turn_agent = get_scoped_agent(tool_groups)
+    return turn_agent, inputs, history_stats
+
+def agent_unavailable_reply():
+    # Fallback response when agent is not available
+    final_output = "I'm sorry, but the AI agent is currently not available. This appears to be a technical issue. Please try again later or contact support."
+    reasoning_text = "**System Status:** AI agent is currently unavailable due to missing dependencies."
+    return final_output, reasoning_text
+
+def run_agent_turn(agent_input_content, memory, memory_summary, callbacks=None, accounting=None):
+    """
+    Run one agent turn against the given conversation memory and rolling summary.
+    Returns the final output, the formatted reasoning text and the history token stats.
+    LLM calls, tokens and tool latency are counted on accounting when it is given.
+    """
+    turn_agent, inputs, history_stats = prepare_agent_turn(agent_input_content, memory, memory_summary)
+    if turn_agent is None:
+        return (*agent_unavailable_reply(), history_stats)
+    
+    callbacks = list(callbacks or []) + ([accounting] if accounting else [])
+    # Repeated sandbox lookups within the turn (customer profile, order investigation...) are cached,
+    # the turn's tool outputs share one observation token budget, and amounts and IDs in the
+    # customer's message are parsed once for every tool
+    with lookup_scope() as lookups, observation_scope(TURN_OBSERVATION_TOKEN_BUDGET) as observations, \
+            entity_scope(agent_input_content) as entities:
+        print(f"Turn entities: {entities.to_dict()}")
+        response = turn_agent.invoke(inputs, config={"callbacks": callbacks} if callbacks else None)
+    
+    final_output = response['output']
+    intermediate_steps = response.get('intermediate_steps', [])
+    reasoning_text = format_reasoning(intermediate_steps, observations) + lookup_trace(lookups) + observation_trace(observations)
+    return final_output, reasoning_text, history_stats
+
+def lookup_trace(lookups):
+    """Reasoning-panel line with the turn's sandbox lookup cache hits"""
+    if lookups is None:
+        return ""
+    stats = lookups.stats()
+    if not stats['hits'] and not stats['misses']:
+        return ""
+    print(f"Sandbox lookups: {stats}")
+    trace = f"**Sandbox lookups:** {stats['hits']} served from the turn cache, {stats['misses']} fetched"
+    if stats['hits_by_lookup']:
+        trace += " (" + ", ".join(f"{name} ×{count}" for name, count in stats['hits_by_lookup'].items()) + ")"
+    if stats['invalidations']:
+        trace += f", cache cleared {stats['invalidations']}× by sandbox updates"
+    return trace + "\n\n"
+
+def close_turn(accounting, conversation_id, endpoint, route='agent'):
+    """Finish a turn's accounting, append it to the turn log and return its timings for the response"""
+    timings = accounting.finish()
+    turn_log.write(dict(conversation_id=conversation_id, endpoint=endpoint, route=route, **timings))
+    return timings
+
+def observation_trace(observations):
+    """Reasoning-panel line with the tokens the observation budget kept out of the scratchpad"""
+    stats = observations.stats()
+    if not stats['shortened']:
+        return ""
+    print(f"Observation budget: {stats}")
+    return (f"**Observation budget:** {stats['shortened']} tool outputs shortened for the agent, "
+            f"~{stats['tokens_saved']} tokens saved per later step (full outputs shown above)\n\n")
+
+def build_assistant_message(final_output, reasoning_text, history_stats=None):
+    return {
+        'role': 'assistant',
+        'content': final_output,
+        'reasoning': reasoning_text,
+        'history': history_stats,
+        'id': str(uuid.uuid4())
+    }
+
+def record_turn(messages, memory_entries, state=None):
+    """Append a finished turn to the session and compact memory to its token budget"""
+    state = session if state is None else state
+    state['messages'].extend(messages)
+    state['memory'], state['memory_summary'] = compact_memory(
+        state['memory'] + memory_entries, state['memory_summary'],
+        MEMORY_TOKEN_BUDGET, MEMORY_SUMMARY_TOKEN_BUDGET
+    )
+    if state is session:
+        session.modified = True
+
+def memory_entries_for_turn(user_message, final_output):
+    """Text-only memory entries recorded for one completed turn"""
+    entries = [{'role': 'user', 'content': user_message['content']}]
+    if 'image_analysis' in user_message:
+        # Store comprehensive image context in memory
+        image_context = f"""Image Evidence Analyzed:
 - Description: {user_message['image_description']}
 - Evidence: {user_message['image_analysis']['evidence']}
 - Analysis Confidence: {user_message['image_analysis']['image_metadata']['analysis_confidence']:.1%}
 - Analyzed at: {user_message['image_analysis']['image_metadata']['analyzed_at']}"""
-                session['memory'].append({'role': 'system', 'content': image_context})
-            session['memory'].append({'role': 'assistant', 'content': final_output})
-            
-            session.modified = True
-            
+        entries.append({'role': 'system', 'content': image_context})
+    entries.append({'role': 'assistant', 'content': final_output})
+    return entries
+
+# Streamed and queued turns complete after the request's session has already been
+# saved, so they are parked here per conversation and merged into the session on
+# that conversation's next request. Parking happens under the job queue's lock as the
+# job leaves its session queue, so a turn is either a predecessor of the next job or
+# parked, never both. Turns of conversations that never come back expire.
+pending_turns = {}
+PENDING_TURN_TTL_SECONDS = get_int_setting("PENDING_TURN_TTL_SECONDS", get_int_setting("SESSION_TTL_SECONDS", 86400))
+
+# Per-session chat history budget (estimated tokens); older turns are kept as a rolling summary
+MEMORY_TOKEN_BUDGET = get_int_setting("MEMORY_TOKEN_BUDGET", 1500)
+MEMORY_SUMMARY_TOKEN_BUDGET = get_int_setting("MEMORY_SUMMARY_TOKEN_BUDGET", 300)
+
+# Each turn's agent only sees the tool groups its messages call for (TOOL_SCOPING=off for all tools)
+TOOL_SCOPING_ENABLED = get_setting("TOOL_SCOPING", "on") == "on"
+
+# Tracking questions, greetings and clear requests are answered without the ReAct loop
+FAST_PATH_ENABLED = get_setting("FAST_PATH_ROUTER", "on") == "on"
+intent_router = IntentRouter()
+
+# One JSON line per turn with its LLM calls, tokens and stage latencies (TURN_LOG=off to disable)
+turn_log = TurnLog(
+    get_setting("TURN_LOG_PATH", os.path.join("logs", "turns.jsonl")) if get_setting("TURN_LOG", "on") == "on" else None
+)
+
+# Image decoding and encoding run in separate processes
+image_pipeline = ImagePipeline(max_workers=get_int_setting("IMAGE_WORKERS", 2))
+
+def park_finished_turn(job):
+    """JobQueue on_finish hook (runs under job_queue.lock): park the turn for its session"""
+    now = time.time()
+    for conversation_id in [cid for cid, turns in pending_turns.items() if turns[-1][2] < now - PENDING_TURN_TTL_SECONDS]:
+        del pending_turns[conversation_id]
+    result = job['result']
+    if result:
+        pending_turns.setdefault(job['session_id'], []).append(
+            ([result['user_message'], result['assistant_message']], result['memory_entries'], now)
+        )
+
+# Agent turns run on a bounded worker pool rather than on the web request threads
+job_queue = JobQueue(
+    "Agent",
+    max_workers=get_int_setting("AGENT_JOB_WORKERS", 4),
+    max_queued=get_int_setting("AGENT_JOB_MAX_QUEUED", 100),
+    on_finish=park_finished_turn
+)
+
+# Transcriptions get their own pool so voice notes never wait behind agent turns
+transcription_jobs = JobQueue(
+    "Transcription",
+    max_workers=get_int_setting("TRANSCRIPTION_WORKERS", 4),
+    max_queued=get_int_setting("TRANSCRIPTION_MAX_QUEUED", 100)
+)
+AUDIO_MEMORY_LIMIT_BYTES = get_int_setting("AUDIO_MEMORY_LIMIT_BYTES", 4 * 1024 * 1024)
+AUDIO_MAX_BYTES = get_int_setting("AUDIO_MAX_BYTES", 50 * 1024 * 1024)
+transcription_cache = TieredCache(
+    "transcription",
+    max_entries=get_int_setting("TRANSCRIPTION_CACHE_MAX_ENTRIES", 512),
+    ttl_seconds=get_int_setting("TRANSCRIPTION_CACHE_TTL_SECONDS", 7 * 86400),
+    disk_path=get_setting("TRANSCRIPTION_CACHE_PATH", os.path.join("cache", "transcription_cache.db"))
+)
+
+def execute_turn(events, conversation_id, user_prompt, image_bytes, memory_snapshot, memory_summary, predecessors=(),
+                 endpoint='job'):
+    """
+    Job body for one agent turn: builds the user message and runs the agent with progress
+    pushed onto the event log. The job queue parks the result for the session when it finishes.
+    """
+    # Turns from the same conversation queued ahead of this one have finished by now
+    # (per-session ordering), so their replies belong in this turn's history
+    memory = list(memory_snapshot)
+    for job in predecessors:
+        if job['result']:
+            memory.extend(job['result']['memory_entries'])
+    
+    accounting = TurnAccounting()
+    user_message, agent_input_content = build_user_turn(user_prompt, image_bytes, accounting)
+    events.put(("user_message", user_message))
+    
+    final_output, reasoning_text, history_stats = run_agent_turn(
+        agent_input_content, memory, memory_summary,
+        callbacks=[QueueCallbackHandler(events)], accounting=accounting
+    )
+    assistant_message = build_assistant_message(final_output, reasoning_text, history_stats)
+    memory_entries = memory_entries_for_turn(user_message, final_output)
+    
+    timings = close_turn(accounting, conversation_id, endpoint)
+    events.put(("done", {'success': True, 'assistant_message': assistant_message, 'timings': timings}))
+    return {
+        'user_message': user_message,
+        'assistant_message': assistant_message,
+        'timings': timings,
+        'memory_entries': memory_entries
+    }
+
+def execute_transcription(events, conversation_id, transcriber, audio_buffer, cache_key):
+    """Job body for a queued transcription; its time goes into the turn log"""
+    accounting = TurnAccounting()
+    with accounting.stage("transcription"):
+        result = run_transcription(transcriber, audio_buffer, transcription_cache, cache_key)
+    result = dict(result, timings=close_turn(accounting, conversation_id, 'transcribe_audio', route='transcription'))
+    events.put(("done", dict(result, success=True)))
+    return result
+
+def reset_conversation(state=None):
+    state = session if state is None else state
+    with job_queue.lock:
+        pending_turns.pop(state.get('conversation_id'), None)
+    state['messages'] = []
+    state['memory'] = []
+    state['memory_summary'] = []
+    if state is session:
+        session.modified = True
+
+def try_fast_path(user_prompt, has_image, state=None):
+    """
+    Answer cheap intents (tracking, greetings, clear requests) without the agent.
+    Updates the session and returns (user_message, assistant_message, timings), or None
+    when the message needs the full agent.
+    """
+    state = session if state is None else state
+    if not FAST_PATH_ENABLED:
+        return None
+    
+    accounting = TurnAccounting()
+    # Like submit_turn_job, hold the queue lock from the check to the session write, so a turn
+    # queued or finished in between cannot land before or after this one out of order
+    with job_queue.lock:
+        # Never jump ahead of agent turns still queued for this conversation
+        if job_queue.active_jobs(state['conversation_id']):
+            return None
+        
+        route = intent_router.route(user_prompt, has_image)
+        if not route:
+            return None
+        
+        user_message = new_user_message(user_prompt)
+        assistant_message = build_assistant_message(route['output'], route['reasoning'])
+        assistant_message['route'] = route['intent']
+        
+        # Turns that finished since this request started come before the routed one
+        merge_pending_turns(state)
+        if route['intent'] == 'clear_conversation':
+            reset_conversation(state)
+            assistant_message['cleared'] = True
+        else:
+            record_turn([user_message, assistant_message], memory_entries_for_turn(user_message, route['output']), state)
+    
+    timings = close_turn(accounting, state['conversation_id'], 'fast_path', route=route['intent'])
+    return user_message, assistant_message, timings
+
+def submit_turn_job():
+    """
+    Validate the chat request and queue its agent turn.
+    Returns (job, fast_path, error_response); exactly one of them is set.
+    fast_path is the (user_message, assistant_message, timings) of a routed reply.
+    """
+    user_prompt = request.form.get('message', '').strip()
+    uploaded_file = request.files.get('image')
+    
+    if not user_prompt:
+        return None, None, (jsonify({'error': 'Please enter a message'}), 400)
+    
+    ensure_session_state()
+    conversation_id = session['conversation_id']
+    
+    # The upload stream is closed once the request ends, so read it up front
+    image_bytes = uploaded_file.read() if uploaded_file and uploaded_file.filename else None
+    
+    fast_path = try_fast_path(user_prompt, image_bytes is not None)
+    if fast_path:
+        return None, fast_path, None
+    
+    try:
+        # A turn finishing between the merge and the predecessor snapshot would be in
+        # neither (or both), so take them together under the queue lock
+        with job_queue.lock:
+            merge_pending_turns(session)
+            job = job_queue.submit(
+                conversation_id, execute_turn,
+                conversation_id, user_prompt, image_bytes, list(session['memory']),
+                list(session['memory_summary']), job_queue.active_jobs(conversation_id),
+                endpoint=request.endpoint
+            )
+    except JobQueueFull as e:
+        return None, None, (jsonify({'error': str(e)}), 503)
+    
+    return job, None, None
+
+@app.before_request
+def merge_streamed_turns():
+    merge_pending_turns(session)
+
+def merge_pending_turns(state):
+    conversation_id = state.get('conversation_id')
+    if not conversation_id:
+        return
+    with job_queue.lock:
+        turns = pending_turns.pop(conversation_id, [])
+    if not turns:
+        return
+    ensure_session_state(state)
+    for messages, memory_entries, _ in turns:
+        record_turn(messages, memory_entries, state)
+
+@app.route('/send_message', methods=['POST'])
+def send_message():
+    """
+    Synchronous chat: the turn still runs on the job queue, in order with the session's
+    other turns, and the request waits for its result.
+    """
+    try:
+        job, fast_path, error_response = submit_turn_job()
+        if error_response:
+            return error_response
+        if fast_path:
             return jsonify({
                 'success': True,
-                'user_message': user_message,
-                'assistant_message': assistant_message
+                'user_message': fast_path[0],
+                'assistant_message': fast_path[1],
+                'timings': fast_path[2]
             })
-            
-        except Exception as e:
-            print(f"Agent error: {e}")
-            return jsonify({'error': f'Agent processing error: {str(e)}'}), 500
+        
+        job_queue.wait(job)
+        if job['status'] != 'done':
+            return jsonify({'error': f"Agent processing error: {job['error']}"}), 500
+        
+        # The finished turn is parked for the session; record it before this response saves it
+        merge_pending_turns(session)
+        result = job['result']
+        return jsonify({
+            'success': True,
+            'user_message': result['user_message'],
+            'assistant_message': result['assistant_message'],
+            'timings': result['timings']
+        })
             
     except Exception as e:
         print(f"Request error: {e}")
         return jsonify({'error': f'Request processing error: {str(e)}'}), 500
 
+@app.route('/send_message_stream', methods=['POST'])
+def send_message_stream():
+    """
+    Streaming variant of /send_message.
+    Emits Server-Sent-Events for the user message, every agent Thought/Action/Observation,
+    LLM tokens as they are generated, and finally the completed assistant message.
+    """
+    job, fast_path, error_response = submit_turn_job()
+    if error_response:
+        return error_response
+    if fast_path:
+        user_message, assistant_message, timings = fast_path
+        return Response(
+            [sse_event("user_message", user_message),
+             sse_event("done", {'success': True, 'assistant_message': assistant_message, 'timings': timings})],
+            mimetype='text/event-stream'
+        )
+    
+    return Response(
+        drain_events(job['events']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/send_message_async', methods=['POST'])
+def send_message_async():
+    """
+    Queue the turn and return its job id immediately.
+    Poll /jobs/<job_id> for the result or read /jobs/<job_id>/stream for live progress.
+    """
+    job, fast_path, error_response = submit_turn_job()
+    if error_response:
+        return error_response
+    if fast_path:
+        # Answered by the router; nothing to poll
+        return jsonify({
+            'success': True,
+            'user_message': fast_path[0],
+            'assistant_message': fast_path[1],
+            'timings': fast_path[2]
+        })
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status_url': url_for('get_job', job_id=job['id']),
+        'stream_url': url_for('stream_job', job_id=job['id'])
+    }), 202
+
+def find_session_job(job_id):
+    """Look up a job, only if it belongs to the current conversation"""
+    job = job_queue.get_job(job_id)
+    if not job or job['session_id'] != session.get('conversation_id'):
+        return None
+    return job
+
+@app.route('/jobs')
+def list_jobs():
+    """Queue-wide stats for monitoring, plus the wait and run times of this session's jobs"""
+    return jsonify({
+        'stats': job_queue.stats(),
+        'jobs': [
+            job_queue.describe(job, include_result=False)
+            for job in job_queue.session_jobs(session.get('conversation_id'))
+        ]
+    })
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = find_session_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_queue.describe(job))
+
+@app.route('/jobs/<job_id>/stream')
+def stream_job(job_id):
+    job = find_session_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return Response(
+        drain_events(job['events']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/clear_conversation', methods=['POST'])
 def clear_conversation():
-    session['messages'] = []
-    session['memory'] = []
-    session.modified = True
+    reset_conversation()
     return jsonify({'success': True})
 
 @app.route('/get_messages')
 def get_messages():
     return jsonify(session.get('messages', []))
 
+@app.route('/cache_stats')
+def cache_stats():
+    """Hit/miss metrics for the result caches"""
+    return jsonify({
+        'vision': vision_cache.stats(),
+        'transcription': transcription_cache.stats(),
+        'llm': llm_cache.stats() if llm_cache else None
+    })
+
+@app.route('/router_stats')
+def router_stats():
+    """Fast-path router hit rate and the agent LLM calls it saved"""
+    return jsonify(intent_router.stats())
+
+@app.route('/session_stats')
+def session_stats():
+    """Server-side session storage usage, including the current session's stored bytes"""
+    if not session_interface:
+        return jsonify({'backend': 'cookie'})
+    stats = session_interface.backend.stats()
+    stats['current_session_bytes'] = session_interface.backend.size_of(session.sid)
+    return jsonify(stats)
+
 @app.route('/transcribe_audio', methods=['POST'])
 def transcribe_audio():
     """
-    Transcribe uploaded audio using AssemblyAI speech-to-text API
+    Transcribe uploaded audio using AssemblyAI speech-to-text API.
+    Previously transcribed clips are answered from the cache; anything else is queued
+    as a background job and the response (202) carries the URL to poll for the text.
     """
     try:
         if 'audio' not in request.files:
@@ -310,43 +785,40 @@ def transcribe_audio():
         audio_file = request.files['audio']
         if audio_file.filename == '':
             return jsonify({'success': False, 'error': 'No audio file selected'}), 400
-            
-        # Save uploaded audio to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            audio_file.save(temp_file.name)
-            temp_file_path = temp_file.name
-            
+        
+        ensure_session_state()
+        
+        # Short voice notes stay in memory; long recordings spill to a temporary file
+        audio_buffer, audio_hash, audio_size = buffer_audio(
+            audio_file.stream,
+            memory_limit=AUDIO_MEMORY_LIMIT_BYTES,
+            max_bytes=AUDIO_MAX_BYTES
+        )
+        
+        cache_key = content_hash(TRANSCRIPTION_CONFIG_VERSION, audio_hash)
+        cached_transcript = transcription_cache.get(cache_key)
+        if cached_transcript is not None:
+            audio_buffer.close()
+            return jsonify(dict(cached_transcript, success=True, cached=True))
+        
         try:
-            # Configure AssemblyAI transcription
-            config = aai.TranscriptionConfig(
-                speech_model=aai.SpeechModel.universal,
-                language_detection=True,  # Auto-detect language
-                punctuate=True,  # Add punctuation
-                format_text=True  # Format text properly
+            job = transcription_jobs.submit(
+                session['conversation_id'], execute_transcription,
+                session['conversation_id'], model_clients.get("transcriber"), audio_buffer, cache_key
             )
-            
-            # Transcribe the audio
-            transcriber = aai.Transcriber(config=config)
-            transcript = transcriber.transcribe(temp_file_path)
-            
-            if transcript.status == "error":
-                return jsonify({
-                    'success': False, 
-                    'error': f'Transcription failed: {transcript.error}'
-                }), 500
-                
-            # Return successful transcription
-            return jsonify({
-                'success': True,
-                'text': transcript.text,
-                'confidence': transcript.confidence if hasattr(transcript, 'confidence') else 0.9
-            })
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-                
+        except JobQueueFull as e:
+            audio_buffer.close()
+            return jsonify({'success': False, 'error': str(e)}), 503
+        
+        return jsonify({
+            'success': True,
+            'pending': True,
+            'job_id': job['id'],
+            'status_url': url_for('get_transcription', job_id=job['id'])
+        }), 202
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
     except Exception as e:
         print(f"Transcription error: {e}")
         return jsonify({
@@ -354,5 +826,13 @@ def transcribe_audio():
             'error': f'Transcription processing error: {str(e)}'
         }), 500
 
+@app.route('/transcriptions/<job_id>')
+def get_transcription(job_id):
+    """Status of a queued transcription; carries the text once it is done"""
+    job = transcription_jobs.get_job(job_id)
+    if not job or job['session_id'] != session.get('conversation_id'):
+        return jsonify({'success': False, 'error': 'Transcription not found'}), 404
+    return jsonify(transcription_jobs.describe(job))
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
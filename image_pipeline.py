@@ -0,0 +1,165 @@
+# image_pipeline.py
+# Single-pass ingestion of uploaded evidence photos: bounded decode, downscale, encode once per output
+
+import asyncio
+import base64
+import io
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+# Uploads larger than this are rejected before any pixel data is decoded
+MAX_SOURCE_PIXELS = 50_000_000
+
+# Working pixel budget: larger images are reduced to roughly this size right after decoding
+MAX_WORKING_PIXELS = 4_000_000
+
+# Longest side of the image sent to the vision model and of the chat thumbnail
+MODEL_MAX_SIDE = 1024
+DISPLAY_MAX_SIDE = 480
+
+MODEL_JPEG_QUALITY = 85
+DISPLAY_WEBP_QUALITY = 70
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _fit(size: tuple, max_side: int) -> tuple:
+    width, height = size
+    scale = min(1.0, max_side / max(width, height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def ingest_image(image_bytes: bytes) -> dict:
+    """
+    Decode an uploaded image once and produce both outputs from the same pixels.
+
+    Returns the model-sized JPEG, a WebP display thumbnail (base64), the source and
+    working dimensions, and per-stage timings in milliseconds.
+    Raises ValueError for unreadable or oversized images.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+    except Exception as e:
+        raise ValueError(f"Unsupported image: {e}")
+    source_size = image.size
+    if source_size[0] * source_size[1] > MAX_SOURCE_PIXELS:
+        raise ValueError(
+            f"Image is {source_size[0]}x{source_size[1]}, larger than the {MAX_SOURCE_PIXELS:,} pixel limit"
+        )
+    timings["open_ms"] = _elapsed_ms(start)
+
+    # JPEG can decode directly at 1/2, 1/4 or 1/8 scale, which skips most of the IDCT work
+    start = time.perf_counter()
+    if image.format == "JPEG":
+        image.draft("RGB", _fit(source_size, MODEL_MAX_SIDE))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    timings["decode_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    width, height = image.size
+    if width * height > MAX_WORKING_PIXELS:
+        factor = int((width * height / MAX_WORKING_PIXELS) ** 0.5) + 1
+        image = image.reduce(factor)
+    model_image = image.copy()
+    model_image.thumbnail((MODEL_MAX_SIDE, MODEL_MAX_SIDE), Image.Resampling.LANCZOS)
+    display_image = model_image.copy()
+    display_image.thumbnail((DISPLAY_MAX_SIDE, DISPLAY_MAX_SIDE), Image.Resampling.BILINEAR)
+    timings["resize_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    model_buffer = io.BytesIO()
+    model_image.save(model_buffer, format="JPEG", quality=MODEL_JPEG_QUALITY, optimize=True)
+    timings["encode_model_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    display_buffer = io.BytesIO()
+    display_image.save(display_buffer, format="WEBP", quality=DISPLAY_WEBP_QUALITY)
+    timings["encode_display_ms"] = _elapsed_ms(start)
+
+    timings["total_ms"] = round(sum(timings.values()), 2)
+
+    return {
+        "model_bytes": model_buffer.getvalue(),
+        "model_mime_type": "image/jpeg",
+        "display_base64": base64.b64encode(display_buffer.getvalue()).decode(),
+        "display_mime_type": "image/webp",
+        "source_dimensions": f"{source_size[0]}x{source_size[1]}",
+        "dimensions": f"{model_image.size[0]}x{model_image.size[1]}",
+        "upload_bytes": len(image_bytes),
+        "timings": timings
+    }
+
+
+class ImagePipeline:
+    """
+    Runs ingest_image in a process pool so the CPU-heavy decode/encode work does not
+    hold the GIL that the web worker threads share. Falls back to running inline
+    if the pool cannot be used.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None and self.max_workers > 0:
+                # spawn avoids forking a process that already runs Flask and agent threads
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self.executor
+
+    def ingest(self, image_bytes: bytes) -> dict:
+        executor = self._get_executor()
+        if executor is None:
+            return ingest_image(image_bytes)
+
+        start = time.perf_counter()
+        try:
+            result = executor.submit(ingest_image, image_bytes).result()
+        except BrokenProcessPool as e:
+            print(f"Image pool unavailable, processing inline: {e}")
+            with self.lock:
+                self.executor = None
+            return ingest_image(image_bytes)
+
+        # Time spent queueing for a worker and shipping bytes between processes
+        result["timings"]["pool_overhead_ms"] = round(
+            _elapsed_ms(start) - result["timings"]["total_ms"], 2
+        )
+        return result
+
+    async def ingest_async(self, image_bytes: bytes) -> dict:
+        """ingest() for the asyncio endpoints: awaits the pool without blocking the event loop"""
+        executor = self._get_executor()
+        if executor is None:
+            return await asyncio.to_thread(ingest_image, image_bytes)
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wrap_future(executor.submit(ingest_image, image_bytes))
+        except BrokenProcessPool as e:
+            print(f"Image pool unavailable, processing inline: {e}")
+            with self.lock:
+                self.executor = None
+            return await asyncio.to_thread(ingest_image, image_bytes)
+
+        result["timings"]["pool_overhead_ms"] = round(
+            _elapsed_ms(start) - result["timings"]["total_ms"], 2
+        )
+        return result
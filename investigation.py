@@ -0,0 +1,106 @@
+# investigation.py
+# Batched "investigate" action: runs several read-only tool lookups in parallel and
+# returns one combined observation, so the agent spends one ReAct step instead of N
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_LOOKUPS = 8
+
+
+def is_read_only(tool) -> bool:
+    """Tools are annotated in agent_core with metadata={'read_only': ...}; unannotated tools count as mutating"""
+    return bool((tool.metadata or {}).get("read_only"))
+
+
+def parse_investigation_request(request: str) -> list:
+    """
+    Split 'tool_a: input; tool_b: input' (';' or newline separated) into (tool_name, tool_input) pairs.
+    A lookup without ':' gets an empty input.
+    """
+    lookups = []
+    for part in request.replace("\n", ";").split(";"):
+        part = part.strip().strip("'\"`")
+        if not part:
+            continue
+        name, _, tool_input = part.partition(":")
+        lookups.append((name.strip().strip("()"), tool_input.strip().strip("'\"")))
+    return lookups
+
+
+def normalize_lookups(lookups) -> list:
+    """
+    (tool_name, tool_input) pairs from the investigate tool's typed lookups
+    ([{'tool': ..., 'args': {...}}], see tool_schemas.InvestigateInput) or from a request string
+    """
+    if isinstance(lookups, str):
+        return parse_investigation_request(lookups)
+    pairs = []
+    for lookup in lookups:
+        if hasattr(lookup, "model_dump"):
+            lookup = lookup.model_dump()
+        pairs.append((lookup["tool"], lookup.get("args") or {}))
+    return pairs
+
+
+def format_lookup_input(tool_input) -> str:
+    if isinstance(tool_input, dict):
+        return ", ".join(str(value) for value in tool_input.values())
+    return str(tool_input)
+
+
+class Investigator:
+    """
+    Fans read-only lookups out across a shared thread pool. Mutating tools (refunds,
+    vouchers, driver contact, logging...) are refused so they keep their own ReAct step.
+    """
+
+    def __init__(self, tools: list, max_workers: int = 8):
+        self.tools = {tool.name: tool for tool in tools if is_read_only(tool)}
+        self.mutating = {tool.name for tool in tools if not is_read_only(tool)}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="investigate")
+
+    def describe(self) -> str:
+        return ", ".join(sorted(self.tools))
+
+    def _lookup(self, name: str, tool_input, callbacks=None):
+        start = time.perf_counter()
+        try:
+            result = self.tools[name].run(tool_input, verbose=False, callbacks=callbacks)
+        except Exception as e:
+            result = f"Lookup failed: {e}"
+        return result, (time.perf_counter() - start) * 1000
+
+    def investigate(self, lookups, callbacks=None) -> str:
+        """
+        Run the lookups and combine their results. StructuredTool passes the investigate run's
+        child callbacks, so each lookup reaches the turn's accounting and stream as its own tool run.
+        """
+        lookups = normalize_lookups(lookups)
+        if not lookups:
+            return f"No lookups given. Read-only tools: {self.describe()}"
+
+        sections = []
+        futures = []
+        for name, tool_input in lookups[:MAX_LOOKUPS]:
+            if name in self.tools:
+                # Each lookup runs in a copy of this turn's context so it shares the sandbox lookup cache
+                context = contextvars.copy_context()
+                future = self.executor.submit(context.run, self._lookup, name, tool_input, callbacks)
+                futures.append((name, tool_input, future))
+            elif name in self.mutating:
+                sections.append(f"[{name}] Not run: this tool changes state, call it on its own.")
+            else:
+                sections.append(f"[{name}] Unknown tool. Read-only tools: {self.describe()}")
+        if len(lookups) > MAX_LOOKUPS:
+            sections.append(f"Only the first {MAX_LOOKUPS} lookups were run.")
+
+        start = time.perf_counter()
+        results = []
+        for name, tool_input, future in futures:
+            result, elapsed_ms = future.result()
+            results.append(f"[{name}({format_lookup_input(tool_input)})] ({elapsed_ms:.0f} ms)\n{result}")
+        print(f"--- Investigated {len(futures)} lookups in parallel in {(time.perf_counter() - start) * 1000:.0f} ms ---")
+
+        return "\n\n".join(results + sections)
@@ -0,0 +1,179 @@
+# job_queue.py
+# Bounded worker pool for agent turns with per-session ordering and job-status tracking
+
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from streaming import STREAM_END, EventLog
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds the maximum number of waiting jobs"""
+
+
+class JobQueue:
+    """
+    Runs agent turns on a fixed-size thread pool instead of the web request thread.
+
+    Jobs from the same session run strictly one after another: only the head of each
+    session's queue is handed to the pool, and the next one is dispatched when it finishes.
+    Every job has an event log that each reader replays from the start, so its progress can
+    be streamed at any time, and the job table records queue wait and run time for monitoring.
+
+    on_finish(job), if given, is called under the queue lock as a finished job leaves its
+    session's queue. Callers that hold the lock (it is reentrant) see every job either still
+    active or already handed to on_finish, never in between.
+    """
+
+    def __init__(self, name: str = "Agent", max_workers: int = 4, max_queued: int = 100,
+                 retention_seconds: int = 600, on_finish=None):
+        self.name = name
+        self.on_finish = on_finish
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name.lower()}-job")
+        self.jobs = {}
+        self.tasks = {}
+        self.session_queues = {}
+        self.lock = threading.RLock()
+        self.totals = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0,
+                       "wait_seconds": 0.0, "run_seconds": 0.0}
+
+    def submit(self, session_id: str, func, *args, **kwargs) -> dict:
+        """
+        Queue func(events, *args, **kwargs) for the given session and return the job record.
+        Raises JobQueueFull if too many jobs are already waiting.
+        """
+        with self.lock:
+            self._purge_finished()
+            if self._queued_count() >= self.max_queued:
+                self.totals["rejected"] += 1
+                raise JobQueueFull(f"{self.name} job queue is full ({self.max_queued} jobs waiting)")
+
+            job = {
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "status": "queued",
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "events": EventLog(),
+                "finished": threading.Event()
+            }
+            self.jobs[job["id"]] = job
+            self.tasks[job["id"]] = (func, args, kwargs)
+            self.totals["submitted"] += 1
+
+            # Only one job per session is in the pool at a time; the rest wait their turn
+            session_queue = self.session_queues.setdefault(session_id, deque())
+            session_queue.append(job["id"])
+            if len(session_queue) == 1:
+                self.executor.submit(self._run, job["id"])
+
+        return job
+
+    def _run(self, job_id: str):
+        job = self.jobs[job_id]
+        func, args, kwargs = self.tasks.pop(job_id)
+        job["started_at"] = time.time()
+        job["status"] = "running"
+
+        try:
+            job["result"] = func(job["events"], *args, **kwargs)
+            job["status"] = "done"
+        except Exception as e:
+            print(f"{self.name} job {job_id} failed: {e}")
+            job["error"] = str(e)
+            job["status"] = "error"
+            job["events"].put(("error", {"error": f"{self.name} processing error: {str(e)}"}))
+        finally:
+            job["finished_at"] = time.time()
+            job["events"].put(STREAM_END)
+            self._finish(job)
+            job["finished"].set()
+
+    def _finish(self, job: dict):
+        with self.lock:
+            self.totals["completed" if job["status"] == "done" else "failed"] += 1
+            self.totals["wait_seconds"] += job["started_at"] - job["submitted_at"]
+            self.totals["run_seconds"] += job["finished_at"] - job["started_at"]
+
+            if self.on_finish:
+                self.on_finish(job)
+            session_queue = self.session_queues[job["session_id"]]
+            session_queue.popleft()
+            if session_queue:
+                self.executor.submit(self._run, session_queue[0])
+            else:
+                del self.session_queues[job["session_id"]]
+
+    def _queued_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job["status"] == "queued")
+
+    def _purge_finished(self):
+        """Drop finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def wait(self, job: dict, timeout: float = None) -> bool:
+        """Block until the job has finished; False if timeout ran out first"""
+        return job["finished"].wait(timeout)
+
+    def session_jobs(self, session_id: str) -> list:
+        """Snapshot of every job the session still has in the table, oldest first"""
+        with self.lock:
+            return [job for job in self.jobs.values() if job["session_id"] == session_id]
+
+    def active_jobs(self, session_id: str) -> list:
+        """Jobs of a session that are queued or running, oldest first"""
+        with self.lock:
+            return [self.jobs[job_id] for job_id in self.session_queues.get(session_id, [])]
+
+    def describe(self, job: dict, include_result: bool = True) -> dict:
+        """JSON-safe view of a job record"""
+        now = time.time()
+        started = job["started_at"]
+        finished = job["finished_at"]
+        result = job["result"] if include_result else None
+
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "submitted_at": job["submitted_at"],
+            "wait_seconds": round((started or now) - job["submitted_at"], 3),
+            "run_seconds": round((finished or now) - started, 3) if started else None,
+            "result": {key: value for key, value in result.items() if key != "memory_entries"} if result else None,
+            "error": job["error"]
+        }
+
+    def stats(self) -> dict:
+        with self.lock:
+            statuses = [job["status"] for job in self.jobs.values()]
+            finished = self.totals["completed"] + self.totals["failed"]
+
+            return {
+                "workers": self.max_workers,
+                "queue_depth": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "max_queued": self.max_queued,
+                "submitted": self.totals["submitted"],
+                "completed": self.totals["completed"],
+                "failed": self.totals["failed"],
+                "rejected": self.totals["rejected"],
+                "avg_wait_seconds": round(self.totals["wait_seconds"] / finished, 3) if finished else 0.0,
+                "avg_run_seconds": round(self.totals["run_seconds"] / finished, 3) if finished else 0.0
+            }
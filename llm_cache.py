@@ -0,0 +1,164 @@
+# llm_cache.py
+# LangChain cache for the agent's Gemini calls: TieredCache storage plus single-flight coalescing
+
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from cache_store import TieredCache, content_hash
+from config import get_int_setting, get_setting
+
+# Bump when the prompt format changes in a way the cached generations should not survive
+LLM_CACHE_VERSION = 'v1'
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so re-indented or re-spaced prompts share a cache entry"""
+    return " ".join(prompt.split())
+
+
+class CoalescingLLMCache(BaseCache):
+    """
+    LangChain calls lookup() before every LLM request and update() after a successful one.
+    A lookup miss makes the caller the leader for that key; identical requests arriving
+    while the leader is in flight wait for its update() instead of calling Gemini again.
+    If the leader's call fails, abandon() (called by models built with
+    releases_failed_calls) wakes the waiters at once so they make their own call;
+    wait_seconds only bounds the wait on a leader that hangs.
+    """
+
+    def __init__(self, cache: TieredCache, wait_seconds: float = 60.0):
+        self.cache = cache
+        self.wait_seconds = wait_seconds
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.metrics = {"coalesced": 0, "coalesce_timeouts": 0, "upstream_calls": 0, "latency_saved_ms": 0.0}
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return content_hash(LLM_CACHE_VERSION, llm_string, normalize_prompt(prompt))
+
+    def _decode(self, entry):
+        return [loads(generation) for generation in entry["generations"]]
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = self._key(prompt, llm_string)
+        entry = self.cache.get(key)
+        if entry is not None:
+            with self.lock:
+                self.metrics["latency_saved_ms"] += entry["latency_ms"]
+            return self._decode(entry)
+
+        with self.lock:
+            flight = self.in_flight.get(key)
+            if flight is None:
+                # Leader: remember when the upstream call started so update() can time it
+                self.in_flight[key] = {"event": threading.Event(), "started": time.perf_counter()}
+                self.metrics["upstream_calls"] += 1
+                return None
+
+        waited_from = time.perf_counter()
+        if not flight["event"].wait(self.wait_seconds):
+            with self.lock:
+                self.metrics["coalesce_timeouts"] += 1
+                self.metrics["upstream_calls"] += 1
+            return None
+
+        entry = self.cache.get(key)
+        if entry is None:
+            with self.lock:
+                self.metrics["upstream_calls"] += 1
+            return None
+        waited_ms = (time.perf_counter() - waited_from) * 1000
+        with self.lock:
+            self.metrics["coalesced"] += 1
+            self.metrics["latency_saved_ms"] += max(entry["latency_ms"] - waited_ms, 0.0)
+        return self._decode(entry)
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        key = self._key(prompt, llm_string)
+        with self.lock:
+            flight = self.in_flight.pop(key, None)
+        latency_ms = (time.perf_counter() - flight["started"]) * 1000 if flight else 0.0
+
+        self.cache.set(key, {
+            "generations": [dumps(generation) for generation in return_val],
+            "latency_ms": round(latency_ms, 1)
+        })
+        if flight:
+            flight["event"].set()
+
+    def abandon(self, prompt: str, llm_string: str):
+        """The in-flight call for this prompt failed: drop its entry and release its waiters"""
+        key = self._key(prompt, llm_string)
+        with self.lock:
+            flight = self.in_flight.pop(key, None)
+        if flight:
+            flight["event"].set()
+
+    def clear(self, **kwargs):
+        with self.cache.lock:
+            self.cache.memory.clear()
+        if self.cache.disk_path:
+            self.cache._disk().execute("DELETE FROM cache")
+
+    def stats(self) -> dict:
+        metrics = self.cache.stats()
+        with self.lock:
+            metrics.update(self.metrics)
+            metrics["in_flight"] = len(self.in_flight)
+        metrics["latency_saved_ms"] = round(metrics["latency_saved_ms"], 1)
+        # A coalesced waiter misses once before its hit, so count requests as hits + upstream calls
+        hits = metrics["memory_hits"] + metrics["disk_hits"]
+        requests = hits + metrics["upstream_calls"]
+        metrics["hit_ratio"] = round(hits / requests, 3) if requests else 0.0
+        return metrics
+
+
+def releases_failed_calls(model_class):
+    """
+    Subclass of a LangChain chat model whose failed calls abandon their CoalescingLLMCache
+    entry. BaseCache has no error hook, so the release wraps the model's cached call.
+    """
+    class Model(model_class):
+        def _generate_with_cache(self, messages, stop=None, run_manager=None, **kwargs):
+            try:
+                return super()._generate_with_cache(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except BaseException:
+                self._abandon_flight(messages, stop, kwargs)
+                raise
+
+        async def _agenerate_with_cache(self, messages, stop=None, run_manager=None, **kwargs):
+            try:
+                return await super()._agenerate_with_cache(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except BaseException:
+                self._abandon_flight(messages, stop, kwargs)
+                raise
+
+        def _abandon_flight(self, messages, stop, kwargs):
+            if isinstance(self.cache, CoalescingLLMCache):
+                self.cache.abandon(dumps(messages), self._get_llm_string(stop=stop, **kwargs))
+
+    Model.__name__ = Model.__qualname__ = model_class.__name__
+    return Model
+
+
+def build_llm_cache():
+    """
+    Cache for the agent LLM, configured from LLM_CACHE_* settings.
+    Returns None when LLM_CACHE=off.
+    """
+    if get_setting("LLM_CACHE", "on") != "on":
+        return None
+    disk_path = get_setting("LLM_CACHE_PATH", "")
+    return CoalescingLLMCache(
+        TieredCache(
+            "llm",
+            max_entries=get_int_setting("LLM_CACHE_MAX_ENTRIES", 1024),
+            ttl_seconds=get_int_setting("LLM_CACHE_TTL_SECONDS", 3600),
+            disk_path=disk_path or None,
+            max_disk_bytes=get_int_setting("LLM_CACHE_MAX_DISK_BYTES", 50 * 1024 * 1024)
+        ),
+        wait_seconds=get_int_setting("LLM_CACHE_WAIT_SECONDS", 60)
+    )
@@ -0,0 +1,203 @@
+# message_features.py
+# One precompiled keyword and slang matcher for the classifier tools in tools.py. Each message is
+# scanned once; the tools read the resulting MessageFeatures instead of re-lowercasing the text
+# and running their own `any(word in text ...)` loops.
+
+import re
+from functools import lru_cache
+
+# Keywords keep the old substring semantics: "spill" also hits "spilled", "rs" hits "hours".
+
+# analyze_customer_situation
+TRACKING_TERMS = ("where", "status", "driver", "eta", "time", "location")
+PROBLEM_TERMS = ("spill", "wrong", "damage", "cold", "missing", "terrible", "awful", "bad", "broken", "packaging")
+EVIDENCE_TERMS = ("spill", "damage", "wrong", "packaging", "quality", "broken", "mess", "bad")
+
+# Issue rules are checked in order; the first rule with a hit names the issue
+SITUATION_ISSUES = (
+    ("spilled_food", ("spill", "damage", "leak", "mess")),
+    ("wrong_order", ("wrong", "different", "mistake")),
+    ("packaging_issue", ("packaging", "broken", "damaged")),
+    ("cold_food", ("cold", "lukewarm")),
+    ("missing_items", ("missing", "forgot")),
+    ("quality_issue", ("quality", "bad", "terrible")),
+)
+
+# provide_generic_solution
+SOLUTION_ISSUES = (
+    ("spilled_food", ("spill", "damage", "leak", "mess")),
+    ("wrong_order", ("wrong", "different", "not what", "mistake")),
+    ("late_delivery", ("late", "delay", "slow", "waiting")),
+    ("cold_food", ("cold", "lukewarm", "not hot")),
+    ("missing_items", ("missing", "forgot", "didn't get")),
+)
+
+# request_visual_evidence
+EVIDENCE_REQUEST_ISSUES = (
+    ("spilled_food", ("spill", "damage", "mess", "leak")),
+    ("wrong_order", ("wrong", "different", "mistake")),
+    ("packaging", ("packaging", "broken", "container")),
+    ("quality", ("quality", "bad", "terrible", "awful")),
+)
+
+# negotiate_fair_compensation
+COMPENSATION_ISSUES = (
+    ("wrong_order", ("wrong", "incorrect", "different")),
+    ("quality_issue", ("spilled", "damaged", "cold", "soggy")),
+    ("delivery_delay", ("late", "delay", "waiting")),
+    ("missing_items", ("missing", "incomplete")),
+)
+
+# log_customer_feedback (labels are the logged category names)
+FEEDBACK_ISSUES = (
+    ("Delivery Handling", ("spill", "damage", "mess")),
+    ("Order Accuracy", ("wrong", "different", "mistake")),
+    ("Packaging Quality", ("packaging", "container")),
+    ("Food Quality", ("quality", "food", "taste")),
+    ("Delivery Timeliness", ("late", "delay", "time")),
+)
+
+# orchestrate_resolution_plan
+SEVERITY_LEVELS = (
+    ("critical", ("spilled", "poisoned", "allergic", "sick", "emergency")),
+    ("high", ("wrong order", "missing", "damaged", "terrible", "awful", "disgusted")),
+    ("medium", ("cold", "late", "delayed", "poor quality", "disappointed")),
+)
+EMOTIONS = (
+    ("high_anger", ("angry", "furious", "outraged", "disgusted")),
+    ("frustration", ("frustrated", "annoyed", "disappointed")),
+)
+REPEAT_TERMS = ("again", "always", "every time", "repeatedly")
+
+# gather_compensation_details
+QUERY_SEVERITY = (
+    ("high", ("completely wrong", "terrible", "disgusting", "awful", "horrible")),
+    ("low", ("slightly", "minor", "small", "bit")),
+)
+CURRENCY_TERMS = ("₹", "rs", "rupees")
+
+# collect_evidence
+ORDER_INFO_TERMS = ("order", "paid", "rupees", "rs", "$", "restaurant", "kitchen")
+ISSUE_INFO_TERMS = ("wrong", "late", "delay", "cold", "missing", "quality", "spilled")
+
+# handle_edge_cases
+HUMOR_TERMS = ("lol", "haha", "😂", "😅", "funny", "joke", "kidding")
+VAGUE_TERMS = ("bad", "terrible", "awful", "horrible", "not good", "disappointing")
+QUESTION_TERMS = ("what", "when", "where", "how", "why")
+SLANG = {
+    "food is trash": "poor quality food",
+    "driver is sus": "suspicious driver behavior",
+    "this is cap": "this seems wrong",
+    "no cap": "honestly",
+    "bet": "okay/sure",
+    "fire food": "excellent food",
+    "mid": "mediocre/average",
+    "lowkey": "somewhat/kind of",
+    "highkey": "very/really",
+    "slaps": "really good",
+    "bussin": "really good/delicious",
+    "periodt": "end of discussion"
+}
+
+INTENTS = (
+    ("tracking", TRACKING_TERMS),
+    ("problem", PROBLEM_TERMS),
+    ("humor", HUMOR_TERMS),
+    ("question", QUESTION_TERMS),
+    ("repeat", REPEAT_TERMS),
+    ("amount", CURRENCY_TERMS),
+)
+
+RULE_SETS = (
+    SITUATION_ISSUES, SOLUTION_ISSUES, EVIDENCE_REQUEST_ISSUES, COMPENSATION_ISSUES, FEEDBACK_ISSUES,
+    SEVERITY_LEVELS, EMOTIONS, QUERY_SEVERITY, INTENTS,
+)
+TERM_LISTS = (EVIDENCE_TERMS, ORDER_INFO_TERMS, ISSUE_INFO_TERMS, VAGUE_TERMS, tuple(SLANG))
+
+
+def _vocabulary():
+    terms = set()
+    for rules in RULE_SETS:
+        for _, rule_terms in rules:
+            terms.update(rule_terms)
+    for term_list in TERM_LISTS:
+        terms.update(term_list)
+    return terms
+
+
+def _trie_pattern(terms) -> str:
+    """
+    Regex for a set of literals shaped like a trie ("spill(?:ed)?"), so each position is tried
+    against one branch per first character and the longest keyword starting there wins.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        ends_here = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+VOCABULARY = frozenset(_vocabulary())
+# Zero-width lookahead so overlapping keywords are found; finditer tries every position once
+KEYWORD_PATTERN = re.compile("(?=(" + _trie_pattern(VOCABULARY) + "))")
+# A hit on "spilled" is also a hit on "spill": every keyword's vocabulary prefixes
+PREFIX_HITS = {
+    term: frozenset(other for other in VOCABULARY if term.startswith(other))
+    for term in VOCABULARY
+}
+SLANG_PATTERN = re.compile("|".join(re.escape(slang) for slang in sorted(SLANG, key=len, reverse=True)))
+
+
+class MessageFeatures:
+    """
+    Everything the classifier tools look for in one message: the keywords it contains, the
+    intents, severity and emotion hits derived from them, and the message with slang rewritten.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.word_count = len(text.split())
+
+        hits = set()
+        for match in KEYWORD_PATTERN.finditer(self.lower):
+            hits.update(PREFIX_HITS[match.group(1)])
+        self.hits = frozenset(hits)
+
+        self.intents = frozenset(label for label, terms in INTENTS if self.has(terms))
+        self.severity = self.classify(SEVERITY_LEVELS)
+        self.severity_hits = tuple(term for _, terms in SEVERITY_LEVELS for term in terms if term in self.hits)
+        self.emotions = tuple(label for label, terms in EMOTIONS if self.has(terms))
+
+        self.slang = tuple(slang for slang in SLANG if slang in self.hits)
+        self.translated = SLANG_PATTERN.sub(lambda match: SLANG[match.group(0)], self.lower) if self.slang else self.lower
+
+    def has(self, terms) -> bool:
+        """True if the message contains any of the terms (all must be in the vocabulary)"""
+        return not self.hits.isdisjoint(terms)
+
+    def classify(self, rules, default=None):
+        """Label of the first (label, terms) rule the message hits"""
+        for label, terms in rules:
+            if self.has(terms):
+                return label
+        return default
+
+
+@lru_cache(maxsize=2048)
+def message_features(text: str) -> MessageFeatures:
+    """Features for a message; the agent often passes the same text to several tools in a turn"""
+    return MessageFeatures(text or "")
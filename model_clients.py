@@ -0,0 +1,163 @@
+# model_clients.py
+# Process-wide registry of reusable model clients (Gemini vision, AssemblyAI transcription)
+
+import asyncio
+import json
+import threading
+import time
+
+from config import load_api_key, load_assemblyai_api_key
+
+VISION_MODEL = 'gemini-1.5-flash'
+
+
+def build_vision_model():
+    import google.generativeai as genai
+
+    genai.configure(api_key=load_api_key())
+    return genai.GenerativeModel(VISION_MODEL)
+
+
+def build_transcriber():
+    import assemblyai as aai
+
+    aai.settings.api_key = load_assemblyai_api_key()
+    config = aai.TranscriptionConfig(
+        speech_model=aai.SpeechModel.universal,
+        language_detection=True,  # Auto-detect language
+        punctuate=True,  # Add punctuation
+        format_text=True  # Format text properly
+    )
+    return aai.Transcriber(config=config)
+
+
+def warm_vision_model(model):
+    """Open the connection to the Gemini API so the first upload does not pay for it"""
+    import google.generativeai as genai
+
+    genai.get_model(f"models/{VISION_MODEL}")
+
+
+class LocalVisionModel:
+    """Stand-in for genai.GenerativeModel that answers instantly without network access"""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    def generate_content(self, contents):
+        time.sleep(self.latency_seconds)
+        return self._response()
+
+    async def generate_content_async(self, contents):
+        await asyncio.sleep(self.latency_seconds)
+        return self._response()
+
+    def _response(self):
+        analysis = {
+            "issue_type": "food_damage",
+            "description": "Local test analysis: food container appears opened with visible spillage.",
+            "evidence": {
+                "condition": "spilled",
+                "accuracy": "items match a typical food order",
+                "damage_level": "moderate",
+                "compensation_recommended": "replacement or partial voucher"
+            },
+            "confidence": 0.9
+        }
+        return type("LocalVisionResponse", (), {"text": json.dumps(analysis)})()
+
+
+class LocalTranscriber:
+    """
+    Stand-in for aai.Transcriber for tests and load runs.
+    Returns a fixed transcript after a simulated per-request latency.
+    """
+
+    def __init__(self, text: str = "My order arrived cold and the drink was spilled.", latency_seconds: float = 0.0):
+        self.text = text
+        self.latency_seconds = latency_seconds
+
+    def transcribe(self, audio):
+        time.sleep(self.latency_seconds)
+        return self._transcript()
+
+    async def transcribe_async(self, audio):
+        await asyncio.sleep(self.latency_seconds)
+        return self._transcript()
+
+    def _transcript(self):
+        return type("LocalTranscript", (), {
+            "status": "completed",
+            "text": self.text,
+            "confidence": 0.95,
+            "error": None
+        })()
+
+
+class ModelClientRegistry:
+    """
+    Builds each client once per worker process and hands out the same instance
+    to every request, so connection pools and auth setup are reused.
+    Tests and load runs can replace any client with override().
+    """
+
+    def __init__(self):
+        self.factories = {}
+        self.warmers = {}
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def register(self, name: str, factory, warmer=None):
+        self.factories[name] = factory
+        if warmer:
+            self.warmers[name] = warmer
+
+    def get(self, name: str):
+        client = self.clients.get(name)
+        if client is None:
+            with self.lock:
+                client = self.clients.get(name)
+                if client is None:
+                    client = self.factories[name]()
+                    self.clients[name] = client
+        return client
+
+    def override(self, name: str, client):
+        """Replace a client (e.g. with a local stand-in); skips the real factory entirely"""
+        with self.lock:
+            self.clients[name] = client
+            self.warmers.pop(name, None)
+
+    def reset(self, name: str = None):
+        with self.lock:
+            if name:
+                self.clients.pop(name, None)
+            else:
+                self.clients.clear()
+
+    def warm_up(self):
+        """Build every registered client and run its warm-up call; failures are only logged"""
+        for name in self.factories:
+            try:
+                start = time.perf_counter()
+                client = self.get(name)
+                warmer = self.warmers.get(name)
+                if warmer:
+                    warmer(client)
+                print(f"✓ {name} client ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+            except Exception as e:
+                print(f"Warning: {name} client warm-up failed: {e}")
+
+    def warm_up_in_background(self):
+        threading.Thread(target=self.warm_up, name="model-client-warmup", daemon=True).start()
+
+
+model_clients = ModelClientRegistry()
+model_clients.register("vision", build_vision_model, warm_vision_model)
+model_clients.register("transcriber", build_transcriber)
+
+
+def use_local_clients(latency_seconds: float = 0.0):
+    """Swap every external model client for its local stand-in"""
+    model_clients.override("vision", LocalVisionModel(latency_seconds))
+    model_clients.override("transcriber", LocalTranscriber(latency_seconds=latency_seconds))
@@ -0,0 +1,181 @@
+# observation_budget.py
+# Caps how much of each tool output goes back into the agent scratchpad. Every observation is
+# re-sent on each later step of the turn, so long outputs cost tokens quadratically in step count.
+
+import json
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from conversation_memory import estimate_tokens
+
+# Once a turn's budget is spent, later observations still get this many tokens
+MIN_OBSERVATION_TOKENS = 60
+CHARS_PER_TOKEN = 4
+
+RULE_LINE = re.compile(r"^\s*[=\-_~*]{3,}\s*$")
+BLANK_RUN = re.compile(r"\n\s*\n(\s*\n)+")
+SECTION_BREAK = re.compile(r"\n\s*\n")
+
+_current_log = ContextVar("observation_log", default=None)
+
+
+def _compact_json(text: str) -> str:
+    """Rewrite embedded pretty-printed JSON objects (e.g. merchant menus) on one line"""
+    decoder = json.JSONDecoder()
+    parts = []
+    position = 0
+    while True:
+        start = text.find("{", position)
+        if start == -1:
+            parts.append(text[position:])
+            return "".join(parts)
+        try:
+            value, end = decoder.raw_decode(text, start)
+        except ValueError:
+            parts.append(text[position:start + 1])
+            position = start + 1
+            continue
+        parts.append(text[position:start])
+        parts.append(json.dumps(value, separators=(", ", ": "), ensure_ascii=False))
+        position = end
+
+
+def compact_observation(text: str) -> str:
+    """Lossless clean-up: one-line JSON, no ==== rules, no runs of blank lines"""
+    text = _compact_json(text)
+    text = "\n".join(line.rstrip() for line in text.splitlines() if not RULE_LINE.match(line))
+    return BLANK_RUN.sub("\n\n", text).strip()
+
+
+def _cut(line: str, max_tokens: int) -> str:
+    return line[:max(max_tokens, 0) * CHARS_PER_TOKEN].rstrip() + "…"
+
+
+def truncate_observation(text: str, max_tokens: int) -> str:
+    """
+    Fit a tool output into max_tokens (estimated). Outputs are blocks separated by blank
+    lines, each starting with a heading: every block keeps its heading, then block bodies
+    are filled in order until the budget runs out, with a count of the lines left out.
+    """
+    text = compact_observation(text)
+    total_tokens = estimate_tokens(text)
+    if total_tokens <= max_tokens:
+        return text
+
+    footer = f"[Observation truncated to ~{max_tokens} of ~{total_tokens} tokens]"
+    budget = max_tokens - estimate_tokens(footer)
+    sections = [block.splitlines() for block in SECTION_BREAK.split(text) if block.strip()]
+    kept = [[] for _ in sections]
+
+    # Headings first, so the agent still sees what each part of the output covered
+    for index, lines in enumerate(sections):
+        cost = estimate_tokens(lines[0])
+        if cost > budget:
+            if index == 0:
+                kept[0].append(_cut(lines[0], budget))
+            budget = 0
+            break
+        kept[index].append(lines[0])
+        budget -= cost
+
+    for index, lines in enumerate(sections):
+        if budget <= 0 or len(kept[index]) != 1:
+            break
+        for line in lines[1:]:
+            cost = estimate_tokens(line)
+            if cost > budget:
+                if budget >= 10:
+                    kept[index].append(_cut(line, budget))
+                budget = 0
+                break
+            kept[index].append(line)
+            budget -= cost
+
+    blocks = []
+    for lines, kept_lines in zip(sections, kept):
+        if not kept_lines:
+            continue
+        dropped = len(lines) - len(kept_lines)
+        blocks.append("\n".join(kept_lines + ([f"… {dropped} more line{'s' if dropped > 1 else ''}"] if dropped else [])))
+    dropped_sections = sum(1 for kept_lines in kept if not kept_lines)
+    if dropped_sections:
+        blocks.append(f"… {dropped_sections} more section{'s' if dropped_sections > 1 else ''}")
+    return "\n\n".join(blocks + [footer])
+
+
+class ObservationLog:
+    """One turn's observation token spend, plus the untruncated outputs for the reasoning panel"""
+
+    def __init__(self, turn_budget: int):
+        self.turn_budget = turn_budget
+        self.lock = threading.Lock()
+        self.spent = 0
+        self.shortened = 0
+        self.tokens_saved = 0
+        self.full_outputs = {}
+
+    def limit(self, tool_budget: int) -> int:
+        with self.lock:
+            remaining = self.turn_budget - self.spent
+        return max(min(tool_budget, remaining), MIN_OBSERVATION_TOKENS)
+
+    def record(self, observation: str, full_output: str):
+        observation_tokens = estimate_tokens(observation)
+        with self.lock:
+            self.spent += observation_tokens
+            if observation != full_output:
+                self.shortened += 1
+                self.tokens_saved += max(estimate_tokens(full_output) - observation_tokens, 0)
+                self.full_outputs[observation] = full_output
+
+    def full_output(self, observation):
+        """The tool's original output for an observation from this turn's intermediate steps"""
+        with self.lock:
+            return self.full_outputs.get(observation, observation)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "observation_tokens": self.spent,
+                "turn_budget": self.turn_budget,
+                "shortened": self.shortened,
+                "tokens_saved": self.tokens_saved
+            }
+
+
+def full_output(observation):
+    """Untruncated output for an observation made in the current scope (for progress streams)"""
+    log = _current_log.get()
+    return log.full_output(observation) if log else observation
+
+
+@contextmanager
+def observation_scope(turn_budget: int):
+    """Share one observation budget across the tool calls made inside the block (one agent turn)"""
+    log = ObservationLog(turn_budget)
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+def budgeted(func, max_tokens: int):
+    """
+    Wrap a tool function so its output is truncated to max_tokens, or to what is left of
+    the turn's budget inside an observation_scope, whichever is smaller.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        output = func(*args, **kwargs)
+        if not isinstance(output, str):
+            return output
+        log = _current_log.get()
+        observation = truncate_observation(output, log.limit(max_tokens) if log else max_tokens)
+        if log:
+            log.record(observation, output)
+        return observation
+    return wrapper
@@ -0,0 +1,171 @@
+# replay_llm.py
+# Record/replay stand-in for the agent's Gemini chat model, used for load and regression runs
+
+import json
+import os
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+from conversation_memory import estimate_tokens
+
+
+class CassetteExhausted(RuntimeError):
+    pass
+
+
+def load_cassette(path: str) -> dict:
+    """
+    A cassette is a JSON file: {"scenario": name, "turns": [customer messages...],
+    "responses": [LLM outputs in call order...]}. An output is the reply text, or
+    {"content": text, "tool_calls": [{"name": tool, "args": {...}}, ...]} for a step
+    that calls tools (several calls in one step run together).
+    """
+    with open(path, encoding="utf-8") as cassette_file:
+        return json.load(cassette_file)
+
+
+def save_cassette(path: str, scenario: str, turns: list, responses: list):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as cassette_file:
+        json.dump({"scenario": scenario, "turns": turns, "responses": responses}, cassette_file, indent=2, ensure_ascii=False)
+
+
+def count_tool_calls(response) -> int:
+    """Tool calls requested by one recorded output (text ReAct outputs pick at most one)"""
+    if isinstance(response, dict):
+        return len(response.get("tool_calls", []))
+    return int(any(line.strip().startswith("Action:") for line in response.splitlines()))
+
+
+def response_message(response, position: int) -> AIMessage:
+    if not isinstance(response, dict):
+        return AIMessage(content=response)
+    return AIMessage(
+        content=response.get("content", ""),
+        tool_calls=[
+            {"name": call["name"], "args": call.get("args", {}), "id": f"replay_{position}_{index}"}
+            for index, call in enumerate(response.get("tool_calls", []))
+        ]
+    )
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Answers each LLM call with the next recorded response from the loaded cassette,
+    after latency_seconds of simulated network time. Prompts are not matched, so tool
+    outputs that vary between runs do not break a replay. Keeps call, tool-call and
+    prompt-token counters for benchmarks; bound tool declarations count as prompt tokens.
+    """
+
+    latency_seconds: float = 0.0
+    streaming: bool = False
+
+    _responses: list = PrivateAttr(default_factory=list)
+    _position: int = PrivateAttr(default=0)
+    _cassette: str = PrivateAttr(default="")
+    _lock: object = PrivateAttr(default_factory=threading.Lock)
+    _counters: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, cassette_path: str = None, **kwargs):
+        super().__init__(**kwargs)
+        self.reset_stats()
+        if cassette_path:
+            self.load_cassette(cassette_path)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def load_cassette(self, path: str) -> dict:
+        cassette = load_cassette(path)
+        with self._lock:
+            self._responses = list(cassette["responses"])
+            self._position = 0
+            self._cassette = path
+        return cassette
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters = {"llm_calls": 0, "tool_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, remaining_responses=len(self._responses) - self._position)
+
+    def bind_tools(self, tools, **kwargs):
+        """Accept the agent's tool declarations; replayed outputs already name their tools"""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _next_response(self, messages, tools=None):
+        prompt = "\n".join(str(message.content) for message in messages)
+        if tools:
+            prompt += json.dumps(tools)
+        with self._lock:
+            if self._position >= len(self._responses):
+                raise CassetteExhausted(
+                    f"Cassette {self._cassette or '(none)'} has no response for LLM call {self._position + 1}"
+                )
+            response = self._responses[self._position]
+            position = self._position
+            self._position += 1
+            self._counters["llm_calls"] += 1
+            self._counters["tool_calls"] += count_tool_calls(response)
+            self._counters["prompt_tokens"] += estimate_tokens(prompt)
+            self._counters["completion_tokens"] += estimate_tokens(
+                json.dumps(response) if isinstance(response, dict) else response
+            )
+        time.sleep(self.latency_seconds)
+        return response_message(response, position)
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        message = self._next_response(messages, tools)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        message = self._next_response(messages, tools)
+        if message.tool_calls:
+            # Function-call steps arrive whole, like Gemini's
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+                    for index, call in enumerate(message.tool_calls)
+                ]
+            ))
+            return
+        for index, word in enumerate(message.content.split(" ")):
+            token = word if index == 0 else " " + word
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class CassetteRecorder(BaseCallbackHandler):
+    """Attach to the real chat model's callbacks to capture its outputs in call order"""
+
+    def __init__(self):
+        self.responses = []
+        self.lock = threading.Lock()
+
+    def on_llm_end(self, response, **kwargs):
+        with self.lock:
+            for generations in response.generations:
+                message = getattr(generations[0], "message", None)
+                tool_calls = getattr(message, "tool_calls", None)
+                if tool_calls:
+                    self.responses.append({
+                        "content": generations[0].text,
+                        "tool_calls": [{"name": call["name"], "args": call["args"]} for call in tool_calls]
+                    })
+                else:
+                    self.responses.append(generations[0].text)
@@ -0,0 +1,197 @@
+# session_store.py
+# Server-side session storage so the browser cookie only carries an opaque session id
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+def encode_session(data: dict) -> bytes:
+    """Compact binary encoding: compact JSON compressed with zlib"""
+    return zlib.compress(json.dumps(data, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def decode_session(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+class MemorySessionBackend:
+    """In-process LRU session store with a per-session TTL"""
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load(self, sid: str):
+        with self.lock:
+            entry = self.entries.get(sid)
+            if entry is None:
+                return None
+            blob, expires_at = entry
+            if expires_at < time.time():
+                del self.entries[sid]
+                return None
+            self.entries.move_to_end(sid)
+        return decode_session(blob)
+
+    def save(self, sid: str, data: dict) -> int:
+        blob = encode_session(data)
+        with self.lock:
+            self.entries[sid] = (blob, time.time() + self.ttl_seconds)
+            self.entries.move_to_end(sid)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return len(blob)
+
+    def delete(self, sid: str):
+        with self.lock:
+            self.entries.pop(sid, None)
+
+    def size_of(self, sid: str) -> int:
+        with self.lock:
+            entry = self.entries.get(sid)
+            return len(entry[0]) if entry else 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            sizes = [len(blob) for blob, _ in self.entries.values()]
+        return {
+            "backend": "memory",
+            "sessions": len(sizes),
+            "bytes_stored": sum(sizes),
+            "largest_session_bytes": max(sizes, default=0)
+        }
+
+
+class SQLiteSessionBackend:
+    """Local SQLite session store, shared by every worker process on the host"""
+
+    def __init__(self, path: str = "sessions.db", ttl_seconds: int = 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.local = threading.local()
+        self.connection().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "sid TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.connection().execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)")
+
+    def connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so keep one per thread
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def load(self, sid: str):
+        row = self.connection().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires_at >= ?", (sid, time.time())
+        ).fetchone()
+        return decode_session(row[0]) if row else None
+
+    def save(self, sid: str, data: dict) -> int:
+        blob = encode_session(data)
+        now = time.time()
+        conn = self.connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, size, expires_at) VALUES (?, ?, ?, ?)",
+            (sid, blob, len(blob), now + self.ttl_seconds)
+        )
+        conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+        return len(blob)
+
+    def delete(self, sid: str):
+        self.connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def size_of(self, sid: str) -> int:
+        row = self.connection().execute("SELECT size FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        return row[0] if row else 0
+
+    def stats(self) -> dict:
+        count, total, largest = self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(MAX(size), 0) FROM sessions WHERE expires_at >= ?",
+            (time.time(),)
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "sessions": count,
+            "bytes_stored": total,
+            "largest_session_bytes": largest
+        }
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface backed by a MemorySessionBackend or SQLiteSessionBackend.
+    The cookie holds only a random session id; the conversation lives on the server.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.backend.load(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        cookie_name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                self.backend.delete(session.sid)
+                response.delete_cookie(cookie_name, domain=domain, path=path)
+            return
+
+        if session.modified or session.new:
+            self.backend.save(session.sid, dict(session))
+
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                cookie_name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+
+def create_session_interface(backend_name: str, ttl_seconds: int, max_entries: int, sqlite_path: str):
+    """Build the configured session interface, or None to keep Flask's signed-cookie session"""
+    if backend_name == "cookie":
+        return None
+    if backend_name == "memory":
+        return ServerSideSessionInterface(MemorySessionBackend(ttl_seconds, max_entries))
+    if backend_name == "sqlite":
+        return ServerSideSessionInterface(SQLiteSessionBackend(sqlite_path, ttl_seconds))
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend_name}'. Use memory, sqlite or cookie.")
@@ -0,0 +1,138 @@
+# streaming.py
+# Server-Sent-Events support for pushing agent progress to the browser as it happens
+
+import json
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from observation_budget import full_output
+
+# Sentinel placed on the event log once the agent turn has finished
+STREAM_END = object()
+
+
+class EventLog:
+    """
+    Append-only event buffer for one job. Unlike a queue, reading does not consume events:
+    every reader replays the log from the start, so a finished job can be streamed again and
+    several readers can follow the same job. put() has the queue.Queue signature.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.changed = threading.Condition()
+
+    def put(self, item):
+        with self.changed:
+            self.items.append(item)
+            self.changed.notify_all()
+
+    def read(self, offset: int, timeout: float) -> list:
+        """Events from offset on, waiting up to timeout seconds for one if there are none yet"""
+        with self.changed:
+            if offset >= len(self.items):
+                self.changed.wait(timeout)
+            return self.items[offset:]
+
+
+def sse_event(event_type: str, data: dict) -> str:
+    """Format a single Server-Sent-Events frame"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event_type}\ndata: {payload}\n\n"
+
+
+def action_thought(action) -> str:
+    """Text the model wrote alongside a tool call (function-calling steps keep it in message_log)"""
+    message_log = getattr(action, "message_log", None)
+    if not message_log:
+        return action.log.strip().split('Action:')[0].strip()
+    content = message_log[-1].content
+    if not isinstance(content, str):
+        content = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content.strip()
+
+
+class QueueCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that forwards agent progress onto a job's EventLog.
+    The Flask response generator replays the log and turns each item into an SSE frame.
+    """
+
+    def __init__(self, event_log: EventLog):
+        self.events = event_log
+        self.lock = threading.Lock()
+        self.tool_runs = set()
+        self.lookup_runs = set()
+
+    def emit(self, event_type: str, data: dict):
+        self.events.put((event_type, data))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        # A tool run inside another (investigate's lookups) has no agent action of its own
+        with self.lock:
+            nested = parent_run_id in self.tool_runs
+            self.tool_runs.add(run_id)
+            if nested:
+                self.lookup_runs.add(run_id)
+        if nested:
+            self.emit("action", {
+                "thought": "Lookup inside investigate",
+                "tool": (serialized or {}).get("name", "tool"),
+                "tool_input": input_str
+            })
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        if token:
+            self.emit("token", {"text": token})
+
+    def on_agent_action(self, action, **kwargs):
+        self.emit("action", {
+            "thought": action_thought(action),
+            "tool": action.tool,
+            "tool_input": action.tool_input
+        })
+
+    def _finish_tool(self, run_id) -> bool:
+        """Forget a finished tool run; True if it was a lookup, whose output is in investigate's"""
+        with self.lock:
+            self.tool_runs.discard(run_id)
+            if run_id in self.lookup_runs:
+                self.lookup_runs.discard(run_id)
+                return True
+        return False
+
+    def on_tool_end(self, output, *, run_id=None, **kwargs):
+        if self._finish_tool(run_id):
+            return
+        # The browser gets the whole output even when the agent saw a truncated one
+        self.emit("observation", {"observation": full_output(str(output))})
+
+    def on_tool_error(self, error, *, run_id=None, **kwargs):
+        if self._finish_tool(run_id):
+            return
+        self.emit("observation", {"observation": f"Tool error: {error}"})
+
+    def on_agent_finish(self, finish, **kwargs):
+        self.emit("final", {"output": finish.return_values.get("output", "")})
+
+
+def drain_events(event_log: EventLog, keepalive_seconds: float = 15.0):
+    """
+    Yield SSE frames for every event in the log, from the first, until STREAM_END.
+    A finished job replays its whole log and closes. Sends a comment line while idle
+    so proxies keep the connection open.
+    """
+    offset = 0
+    while True:
+        items = event_log.read(offset, keepalive_seconds)
+        if not items:
+            yield ": keepalive\n\n"
+            continue
+
+        offset += len(items)
+        for item in items:
+            if item is STREAM_END:
+                return
+            event_type, data = item
+            yield sse_event(event_type, data)
@@ -0,0 +1,21 @@
+# tests/conftest.py
+# Run from the repository root: python -m pytest -q
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Sandbox"))
+
+# Keep turn logs and result caches out of the working tree when the app modules are imported
+_scratch = tempfile.mkdtemp(prefix="tests-")
+os.environ.setdefault("TURN_LOG", "off")
+os.environ.setdefault("VISION_CACHE_PATH", os.path.join(_scratch, "vision_cache.db"))
+os.environ.setdefault("TRANSCRIPTION_CACHE_PATH", os.path.join(_scratch, "transcription_cache.db"))
+# Never call Gemini or other hosted models from the tests; agent turns replay instead
+os.environ.setdefault("AGENT_LLM", "replay")
+os.environ.setdefault("LLM_CACHE", "off")
+os.environ.setdefault("MODEL_CLIENTS", "local")
+os.environ.setdefault("SESSION_BACKEND", "memory")
@@ -0,0 +1,29 @@
+# tests/test_agent_core.py
+
+import pytest
+
+try:
+    import agent_core
+except ImportError as e:
+    pytest.skip(f"agent_core needs the pinned langchain: {e}", allow_module_level=True)
+
+
+def tool_named(executor, name):
+    return next(tool for tool in executor.tools if tool.name == name)
+
+
+def test_scoped_investigate_only_reaches_the_scoped_read_only_tools():
+    scoped = agent_core.get_scoped_agent(("compensation",))
+    scoped_names = {tool.name for tool in scoped.tools}
+    investigate = tool_named(scoped, "investigate")
+
+    assert "check_driver_history" not in scoped_names
+    assert "check_driver_history" not in investigate.description
+    assert "check_customer_history" in investigate.description
+    result = investigate.run({"lookups": [{"tool": "check_driver_history", "args": {"driver_id": "D001"}}]})
+    assert "[check_driver_history] Unknown tool" in result
+
+
+def test_every_executor_has_one_investigate_tool():
+    for executor in (agent_core.agent, agent_core.get_scoped_agent(("evidence", "tracking"))):
+        assert [tool.name for tool in executor.tools].count("investigate") == 1
@@ -0,0 +1,46 @@
+# tests/test_asgi_app.py
+
+import asyncio
+import json
+
+from starlette.testclient import TestClient
+
+import asgi_app
+import flask_app
+
+
+def on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def test_send_message_keeps_blocking_work_off_the_event_loop(monkeypatch, tmp_path):
+    calls = []
+    if flask_app.AGENT_AVAILABLE:
+        # The agent replays a canned answer (AGENT_LLM=replay, see conftest.py)
+        cassette = tmp_path / "cold_order.json"
+        cassette.write_text(json.dumps({"scenario": "cold_order", "turns": [], "responses": ["Sorry about that!"]}))
+        import agent_core
+        agent_core.llm.load_cassette(str(cassette))
+
+    def recording(name, func):
+        def wrapper(*args, **kwargs):
+            calls.append((name, on_event_loop()))
+            return func(*args, **kwargs)
+        return wrapper
+
+    backend = asgi_app.session_backend
+    monkeypatch.setattr(backend, "load", recording("load", backend.load))
+    monkeypatch.setattr(backend, "save", recording("save", backend.save))
+    for name in ("try_fast_path", "prepare_agent_turn", "record_turn", "close_turn"):
+        monkeypatch.setattr(asgi_app, name, recording(name, getattr(asgi_app, name)))
+
+    with TestClient(asgi_app.app) as client:
+        response = client.post("/async/send_message", data={"message": "my order arrived cold"})
+
+    assert response.json()["success"]
+    assert {name for name, _ in calls} >= {"load", "save", "try_fast_path", "prepare_agent_turn", "record_turn", "close_turn"}
+    assert [name for name, blocked_loop in calls if blocked_loop] == []
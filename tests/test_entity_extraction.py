@@ -0,0 +1,25 @@
+# tests/test_entity_extraction.py
+
+import pytest
+
+from entity_extraction import extract_entities
+
+
+@pytest.mark.parametrize("text", [
+    "Please refund Rs. 500 for the cold food",
+    "Please refund Rs.500 for the cold food",
+    "Please refund Rs 500 for the cold food",
+    "Please refund ₹500 for the cold food",
+    "Please refund INR 500 for the cold food",
+    "Please refund 500 rupees for the cold food",
+])
+def test_rupee_amount_forms(text):
+    assert extract_entities(text).amounts == ({"value": 500, "currency": "INR"},)
+
+
+def test_grouped_rupee_amount_after_dotted_symbol():
+    assert extract_entities("I was charged Rs. 1,250.50 twice").amounts == ({"value": 1250.5, "currency": "INR"},)
+
+
+def test_words_starting_with_a_currency_are_not_amounts():
+    assert extract_entities("Please rsvp 500 guests").amounts == ()
@@ -0,0 +1,147 @@
+# tests/test_flask_app.py
+
+import threading
+import time
+
+import pytest
+
+import flask_app
+
+
+@pytest.fixture
+def slow_agent(monkeypatch):
+    """Agent stand-in that records the memory each turn saw and blocks on gates[prompt]"""
+    calls = []
+    gates = {}
+
+    def run_agent_turn(agent_input_content, memory, memory_summary, callbacks=None, accounting=None):
+        prompt = agent_input_content[0]
+        calls.append((prompt, [entry["content"] for entry in memory]))
+        if prompt in gates:
+            gates[prompt].wait(5)
+        return f"reply to {prompt}", "", {}
+
+    monkeypatch.setattr(flask_app, "run_agent_turn", run_agent_turn)
+    monkeypatch.setattr(flask_app, "FAST_PATH_ENABLED", False)
+    return calls, gates
+
+
+def test_sync_turn_waits_for_queued_turn_of_same_session(slow_agent):
+    calls, gates = slow_agent
+    gates["first"] = threading.Event()
+    client = flask_app.app.test_client()
+
+    assert client.post("/send_message_async", data={"message": "first"}).status_code == 202
+    responses = []
+    sync = threading.Thread(target=lambda: responses.append(client.post("/send_message", data={"message": "second"})))
+    sync.start()
+    sync.join(0.3)
+    assert [prompt for prompt, _ in calls] == ["first"]
+
+    gates["first"].set()
+    sync.join(5)
+    assert responses[0].get_json()["assistant_message"]["content"] == "reply to second"
+    # The second turn saw the first one's exchange exactly once
+    assert calls[1] == ("second", ["first", "reply to first"])
+    contents = [message["content"] for message in client.get("/get_messages").get_json()]
+    assert contents == ["first", "reply to first", "second", "reply to second"]
+
+
+def test_jobs_lists_only_the_callers_session(slow_agent):
+    owner = flask_app.app.test_client()
+    job_id = owner.post("/send_message_async", data={"message": "mine"}).get_json()["job_id"]
+
+    assert job_id in [job["id"] for job in owner.get("/jobs").get_json()["jobs"]]
+    assert flask_app.app.test_client().get("/jobs").get_json()["jobs"] == []
+
+
+def test_turn_is_parked_atomically_with_leaving_the_session_queue(slow_agent):
+    _, gates = slow_agent
+    gates["parked"] = threading.Event()
+    client = flask_app.app.test_client()
+    job = flask_app.job_queue.get_job(client.post("/send_message_async", data={"message": "parked"}).get_json()["job_id"])
+    conversation_id = job["session_id"]
+
+    with flask_app.job_queue.lock:
+        gates["parked"].set()
+        assert not flask_app.job_queue.wait(job, 0.2)
+        # While the lock is held the turn is still active and not yet parked
+        assert flask_app.job_queue.active_jobs(conversation_id) == [job]
+        assert conversation_id not in flask_app.pending_turns
+
+    assert flask_app.job_queue.wait(job, 5)
+    assert flask_app.job_queue.active_jobs(conversation_id) == []
+    assert len(flask_app.pending_turns[conversation_id]) == 1
+
+
+def test_stale_parked_turns_expire():
+    flask_app.pending_turns["abandoned"] = [([], [], time.time() - flask_app.PENDING_TURN_TTL_SECONDS - 1)]
+    flask_app.park_finished_turn({"session_id": "other", "result": None})
+    assert "abandoned" not in flask_app.pending_turns
+
+
+@pytest.fixture
+def fast_path(slow_agent, monkeypatch):
+    monkeypatch.setattr(flask_app, "FAST_PATH_ENABLED", True)
+    return slow_agent
+
+
+def test_fast_path_replies_without_the_agent(fast_path):
+    calls, _ = fast_path
+    client = flask_app.app.test_client()
+
+    greeting = client.post("/send_message", data={"message": "Hi there!"}).get_json()
+    tracking = client.post("/send_message", data={"message": "Where is my order ORD_042?"}).get_json()
+    cleared = client.post("/send_message", data={"message": "clear the chat"}).get_json()
+
+    assert greeting["assistant_message"]["route"] == "greeting"
+    assert tracking["assistant_message"]["route"] == "tracking"
+    assert cleared["assistant_message"]["cleared"]
+    assert calls == []
+    assert client.get("/get_messages").get_json() == []
+
+
+def test_tracking_without_an_order_id_goes_to_the_agent(fast_path):
+    calls, _ = fast_path
+    client = flask_app.app.test_client()
+
+    reply = client.post("/send_message", data={"message": "Where is my order?"}).get_json()
+
+    assert "route" not in reply["assistant_message"]
+    assert [prompt for prompt, _ in calls] == ["Where is my order?"]
+
+
+def test_fast_path_waits_behind_queued_turns(fast_path):
+    calls, gates = fast_path
+    gates["first"] = threading.Event()
+    client = flask_app.app.test_client()
+
+    client.post("/send_message_async", data={"message": "first"})
+    greeting = client.post("/send_message_async", data={"message": "Hello"})
+
+    # Queued behind "first" instead of being answered ahead of it
+    assert greeting.status_code == 202
+    gates["first"].set()
+    assert flask_app.job_queue.wait(flask_app.job_queue.get_job(greeting.get_json()["job_id"]), 5)
+    assert [prompt for prompt, _ in calls] == ["first", "Hello"]
+
+
+def test_fast_path_check_and_write_hold_the_queue_lock(fast_path):
+    state = {"conversation_id": "fast-path-lock", "messages": [], "memory": [], "memory_summary": []}
+    results = []
+    routed = threading.Thread(target=lambda: results.append(flask_app.try_fast_path("Hi", False, state)))
+
+    with flask_app.job_queue.lock:
+        routed.start()
+        routed.join(0.2)
+        # Nothing checked or written while a submitter holds the lock
+        assert routed.is_alive() and state["messages"] == []
+        # A turn that finished meanwhile is merged before the routed reply
+        flask_app.pending_turns[state["conversation_id"]] = [
+            ([{"role": "user", "content": "earlier"}], [], time.time())
+        ]
+
+    routed.join(5)
+    assert results[0] is not None
+    assert [message["content"] for message in state["messages"]][:1] == ["earlier"]
+    assert len(state["messages"]) == 3
@@ -0,0 +1,48 @@
+# tests/test_intent_router.py
+
+import pytest
+
+from intent_router import CLEAR_REPLY, GREETING_REPLY, IntentRouter
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("Where is my order ORD_123?", "tracking"),
+    ("order status for ord_45 please", "tracking"),
+    ("Where is my order?", None),
+    ("Where is my order ORD_123? The food will be cold and I want a refund", None),
+    ("Hi there!", "greeting"),
+    ("hello, my pizza was spilled", None),
+    ("Please clear the conversation", "clear_conversation"),
+    ("let's start over", "clear_conversation"),
+    ("My burger was missing from the order", None),
+])
+def test_classify(message, intent):
+    assert IntentRouter().classify(message) == intent
+
+
+def test_image_messages_go_to_the_agent():
+    assert IntentRouter().classify("Where is my order ORD_123?", has_image=True) is None
+
+
+def test_tracking_reply_uses_the_named_order():
+    route = IntentRouter().route("where is my order ORD_123")
+
+    assert route["intent"] == "tracking"
+    assert "track_delivery_status (Input: ORD_123)" in route["reasoning"]
+
+
+def test_tracking_without_an_order_id_is_left_to_the_agent():
+    router = IntentRouter()
+
+    assert router.route("Where is my order?") is None
+    assert router.stats()["routed"] == 0 and router.stats()["messages"] == 1
+
+
+def test_greeting_and_clear_replies():
+    router = IntentRouter()
+
+    assert router.route("Hello")["output"] == GREETING_REPLY
+    assert router.route("reset the chat")["output"] == CLEAR_REPLY
+    stats = router.stats()
+    assert stats["by_intent"] == {"tracking": 0, "greeting": 1, "clear_conversation": 1}
+    assert stats["saved_llm_calls"] == 2 and stats["hit_rate"] == 1.0
@@ -0,0 +1,56 @@
+# tests/test_investigation.py
+
+from langchain_core.tools import StructuredTool
+
+from investigation import Investigator
+from streaming import EventLog, QueueCallbackHandler
+from turn_accounting import TurnAccounting
+
+
+def check_driver(driver_id: str) -> str:
+    """Driver record"""
+    return f"driver {driver_id}: on time"
+
+
+def check_merchant(merchant_id: str) -> str:
+    """Merchant record"""
+    raise ValueError(f"merchant {merchant_id} unreachable")
+
+
+def refund(customer_id: str) -> str:
+    """Refund"""
+    return "refunded"
+
+
+def investigate_tool():
+    tools = [StructuredTool.from_function(check_driver, metadata={"read_only": True}),
+             StructuredTool.from_function(check_merchant, metadata={"read_only": True}),
+             StructuredTool.from_function(refund, metadata={"read_only": False})]
+    return StructuredTool.from_function(Investigator(tools).investigate, name="investigate", description="Lookups")
+
+
+LOOKUPS = {"lookups": [{"tool": "check_driver", "args": {"driver_id": "D7"}},
+                       {"tool": "check_merchant", "args": {"merchant_id": "M7"}},
+                       {"tool": "refund", "args": {"customer_id": "C7"}}]}
+
+
+def test_lookups_are_counted_in_the_turn_accounting():
+    accounting = TurnAccounting()
+
+    result = investigate_tool().run(LOOKUPS, callbacks=[accounting])
+
+    assert "driver D7: on time" in result and "Lookup failed" in result
+    tools = accounting.finish()["tools"]
+    assert sorted(tool["name"] for tool in tools) == ["check_driver", "check_merchant", "investigate"]
+    assert [tool["name"] for tool in tools if tool.get("error")] == ["check_merchant"]
+
+
+def test_lookups_stream_as_steps_without_repeating_their_output():
+    events = EventLog()
+
+    investigate_tool().run(LOOKUPS, callbacks=[QueueCallbackHandler(events)])
+
+    items = events.read(0, 0)
+    assert sorted(data["tool"] for kind, data in items if kind == "action") == ["check_driver", "check_merchant"]
+    observations = [data["observation"] for kind, data in items if kind == "observation"]
+    assert len(observations) == 1 and "driver D7: on time" in observations[0]
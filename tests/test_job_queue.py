@@ -0,0 +1,49 @@
+# tests/test_job_queue.py
+
+import threading
+
+from job_queue import JobQueue
+from streaming import drain_events
+
+
+def emit_steps(events, steps):
+    for step in steps:
+        events.put(("step", {"n": step}))
+    return {"steps": steps}
+
+
+def frames(job):
+    return [frame for frame in drain_events(job["events"], keepalive_seconds=0.05) if not frame.startswith(":")]
+
+
+def test_finished_job_can_be_streamed_again():
+    jobs = JobQueue("Test", max_workers=1)
+    job = jobs.submit("s1", emit_steps, [1, 2, 3])
+
+    first = frames(job)
+    second = frames(job)
+
+    assert len(first) == 3
+    assert second == first
+
+
+def test_concurrent_readers_each_see_every_event():
+    jobs = JobQueue("Test", max_workers=1)
+    release = threading.Event()
+
+    def slow(events):
+        events.put(("step", {"n": 1}))
+        release.wait(5)
+        events.put(("step", {"n": 2}))
+
+    job = jobs.submit("s1", slow)
+    results = [None, None]
+    readers = [threading.Thread(target=lambda i=i: results.__setitem__(i, frames(job))) for i in range(2)]
+    for reader in readers:
+        reader.start()
+    release.set()
+    for reader in readers:
+        reader.join(5)
+
+    assert results[0] == results[1]
+    assert len(results[0]) == 2
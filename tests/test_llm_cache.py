@@ -0,0 +1,61 @@
+# tests/test_llm_cache.py
+
+import threading
+import time
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from cache_store import TieredCache
+from llm_cache import CoalescingLLMCache, releases_failed_calls
+
+
+class FailingChatModel(BaseChatModel):
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "failing"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        raise RuntimeError("upstream unavailable")
+
+
+def new_cache():
+    return CoalescingLLMCache(TieredCache("test", disk_path=None), wait_seconds=30)
+
+
+def test_abandon_releases_waiters_immediately():
+    cache = new_cache()
+    assert cache.lookup("prompt", "llm") is None  # leader
+    waited = []
+
+    def waiter():
+        started = time.perf_counter()
+        waited.append((cache.lookup("prompt", "llm"), time.perf_counter() - started))
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.1)
+    cache.abandon("prompt", "llm")
+    thread.join(5)
+
+    assert waited[0][0] is None
+    assert waited[0][1] < 5
+    assert cache.in_flight == {}
+
+
+def test_failed_leader_call_does_not_block_the_retry():
+    cache = new_cache()
+    model = releases_failed_calls(FailingChatModel)(cache=cache)
+
+    with pytest.raises(RuntimeError):
+        model.invoke("hello")
+    assert cache.in_flight == {}
+
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        model.invoke("hello")
+    assert time.perf_counter() - started < 5
+    assert model.calls == 2
@@ -0,0 +1,43 @@
+# tests/test_lookup_cache.py
+
+from lookup_cache import cached_lookup, lookup_scope
+from sandbox_database import SandboxDatabase
+
+
+def counted_lookups(database):
+    calls = []
+
+    @cached_lookup("customers", "orders")
+    def wallet(customer_id):
+        calls.append(customer_id)
+        return database.get_customer_details(customer_id)["wallet_balance"]
+
+    return wallet, calls
+
+
+def test_unrelated_write_keeps_cached_lookup():
+    database = SandboxDatabase()
+    wallet, calls = counted_lookups(database)
+
+    with lookup_scope() as scope:
+        wallet("C001")
+        database.log_merchant_feedback("M001", "Late pickup", "low")
+        database.exonerate_driver("D001", "Traffic")
+        wallet("C001")
+
+    assert calls == ["C001"]
+    assert scope.stats()["hits"] == 1
+
+
+def test_write_to_read_table_invalidates_lookup():
+    database = SandboxDatabase()
+    wallet, calls = counted_lookups(database)
+
+    with lookup_scope() as scope:
+        before = wallet("C001")
+        database.process_refund("C001", 50.0, "Cold food")
+        after = wallet("C001")
+
+    assert calls == ["C001", "C001"]
+    assert after == before + 50.0
+    assert scope.stats()["invalidations"] == 1
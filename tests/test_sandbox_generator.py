@@ -0,0 +1,20 @@
+# tests/test_sandbox_generator.py
+
+from sandbox_generator import generate
+
+
+def test_same_seed_gives_the_same_records():
+    assert list(generate(7, 50, 20, 30, 500)) == list(generate(7, 50, 20, 30, 500))
+
+
+def test_order_prices_come_from_the_merchant_menu():
+    menus = {}
+    orders = 0
+    for table, record in generate(7, 50, 20, 30, 500):
+        if table == "merchants":
+            menus[record["id"]] = record["menu"]
+        elif table == "orders":
+            orders += 1
+            for item in record["items"]:
+                assert menus[record["merchant_id"]][item["name"]]["price"] == item["price"]
+    assert orders
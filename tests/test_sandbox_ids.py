@@ -0,0 +1,104 @@
+# tests/test_sandbox_ids.py
+
+import threading
+
+import pytest
+
+from sandbox_database import SandboxDatabase
+from sandbox_sqlite import SQLiteSandboxDatabase
+
+
+def imported_order(order_id):
+    return {"id": order_id, "customer_id": "C001", "merchant_id": "M001", "driver_id": "D001",
+            "description": f"Imported {order_id}", "amount": 100.0, "order_time": "2024-01-15 19:30:00",
+            "status": "delivered", "payment_method": "wallet", "delivery_address": "Noida", "issue_reported": None}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def database(request, tmp_path):
+    if request.param == "memory":
+        yield SandboxDatabase()
+        return
+    database = SQLiteSandboxDatabase(str(tmp_path / "sandbox.db"), seed=SandboxDatabase())
+    yield database
+    database.close()
+
+
+def test_new_orders_skip_imported_ids(database):
+    # Imported IDs out of step with insertion order: the next sequence number names an existing order
+    database.bulk_load("orders", [imported_order(f"ORD_{number:03d}") for number in (2, 3, 5)])
+    imported = {order_id: database.get_order_details(order_id) for order_id in ("ORD_002", "ORD_003", "ORD_005")}
+
+    created = [database.create_order_from_description(f"New order {number}") for number in range(4)]
+
+    assert len(set(created)) == len(created)
+    assert not set(created) & set(imported)
+    for order_id, order in imported.items():
+        assert database.get_order_details(order_id) == order
+    for number, order_id in enumerate(created):
+        assert database.get_order_details(order_id)["description"] == f"New order {number}"
+
+
+def test_new_complaints_skip_imported_ids(database):
+    database.bulk_load("complaints", [{"id": "COMP_002", "customer_id": "C001", "order_id": "ORD_001",
+                                       "issue_type": "imported", "details": "", "status": "closed",
+                                       "timestamp": "2024-01-15 19:30:00", "resolution": None}])
+
+    created = [database.log_complaint("C001", "ORD_001", "late_delivery", "Cold food") for _ in range(3)]
+
+    assert "COMP_002" not in created
+    assert len(set(created)) == 3
+    assert [complaint["issue_type"] for complaint in database.get_order_complaints("ORD_001")].count("imported") == 1
+
+
+def imported_complaint(complaint_id):
+    return {"id": complaint_id, "customer_id": "C001", "order_id": "ORD_001", "issue_type": "imported",
+            "details": "", "status": "closed", "timestamp": "2024-01-15 19:30:00", "resolution": None}
+
+
+def test_memory_ids_count_on_from_the_highest_imported_id():
+    database = SandboxDatabase()
+    database.bulk_load("orders", [imported_order(order_id) for order_id in ("ORD_040", "ORD_900", "ORD_1200")])
+    database.bulk_load("complaints", [imported_complaint("COMP_250")])
+    # A later import of lower IDs does not wind the sequence back
+    database.bulk_load("orders", [imported_order("ORD_050")])
+
+    assert database.create_order_from_description("After import") == "ORD_1201"
+    assert database.log_complaint("C001", "ORD_001", "late_delivery", "Cold food") == "COMP_251"
+
+
+def test_memory_ids_are_allocated_under_the_table_lock():
+    database = SandboxDatabase()
+    database.bulk_load("complaints", [imported_complaint("COMP_900")])
+    created = []
+
+    with database.table_locks["complaints"]:
+        writer = threading.Thread(target=lambda: created.append(
+            database.log_complaint("C001", "ORD_001", "late_delivery", "Cold food")))
+        writer.start()
+        writer.join(timeout=0.2)
+        assert writer.is_alive()
+        assert database.next_ids["complaints"] == 901
+    writer.join()
+
+    assert created == ["COMP_901"]
+
+
+def test_concurrent_writers_never_share_an_id(database):
+    database.bulk_load("complaints", [imported_complaint(f"COMP_{number:03d}") for number in (3, 7, 500)])
+    results = {"complaints": [], "refunds": []}
+
+    def write(count):
+        for _ in range(count):
+            results["complaints"].append(database.log_complaint("C001", "ORD_001", "late_delivery", "Cold food"))
+            results["refunds"].append(database.process_refund("C001", 1.0, "Cold food")["id"])
+
+    writers = [threading.Thread(target=write, args=(25,)) for _ in range(8)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert len(set(results["complaints"])) == 200
+    assert not set(results["complaints"]) & {"COMP_003", "COMP_007", "COMP_500"}
+    assert len(set(results["refunds"])) == 200
@@ -0,0 +1,62 @@
+# tests/test_sandbox_indexes.py
+
+import pytest
+
+from sandbox_database import COMPLAINT_INDEX_FIELDS, ORDER_INDEX_FIELDS, SandboxDatabase
+from sandbox_generator import generate, load_into
+
+ORDER_ACCESSORS = {"customer_id": "get_customer_order_history", "merchant_id": "get_merchant_orders",
+                   "driver_id": "get_driver_orders", "status": "get_orders_by_status"}
+COMPLAINT_ACCESSORS = {"customer_id": "get_customer_complaints", "order_id": "get_order_complaints"}
+
+
+def ids(records):
+    return sorted(record["id"] for record in records)
+
+
+def assert_indexes_match_scans(database):
+    for field in ORDER_INDEX_FIELDS:
+        for value in {order[field] for order in database.orders.values()}:
+            scan = [order for order in database.orders.values() if order[field] == value]
+            assert ids(getattr(database, ORDER_ACCESSORS[field])(value)) == ids(scan), (field, value)
+        assert set(database.order_index[field]) == {order[field] for order in database.orders.values()}
+    for field in COMPLAINT_INDEX_FIELDS:
+        for value in {complaint[field] for complaint in database.complaints.values()}:
+            scan = [complaint for complaint in database.complaints.values() if complaint[field] == value]
+            assert ids(getattr(database, COMPLAINT_ACCESSORS[field])(value)) == ids(scan), (field, value)
+    available = [officer["id"] for officer in database.customer_care_officers.values()
+                 if officer["current_status"] == "available"]
+    assert sorted(database.officers_by_status.get("available", ())) == sorted(available)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_indexes_follow_every_write(compact):
+    database = SandboxDatabase(compact_records=compact)
+    load_into(database, generate(3, 40, 10, 15, 400))
+    assert_indexes_match_scans(database)
+
+    order_id = next(iter(database.orders))
+    database.update_order_status(order_id, "refunded")
+    moved = dict(database.get_order_details(order_id), customer_id="C001", merchant_id="M001", status="disputed")
+    database.add_order(moved)
+    created = database.create_order_from_description("Two masala dosas")
+    database.log_complaint("C001", created, "cold_food", "Arrived cold")
+    database.log_complaint("C002", order_id, "wrong_order", "Wrong dish")
+    officer = database.get_available_customer_care_officer()
+    database.assign_customer_care_officer(officer["id"])
+    database.bulk_load("orders", [dict(database.get_order_details(created), status="cancelled")])
+
+    assert_indexes_match_scans(database)
+    assert database.get_orders_by_status("refunded") == []
+    assert order_id in ids(database.get_customer_order_history("C001"))
+    assert database.get_customer_order_history("C001")[-1]["id"] == created
+    assert officer["id"] not in database.officers_by_status.get("available", ())
+
+
+def test_history_keeps_insertion_order():
+    database = SandboxDatabase()
+    created = [database.create_order_from_description(f"Order {number}") for number in range(5)]
+
+    history = [order["id"] for order in database.get_customer_order_history("C001")]
+
+    assert history[-5:] == created
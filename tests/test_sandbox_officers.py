@@ -0,0 +1,58 @@
+# tests/test_sandbox_officers.py
+
+import pytest
+
+from sandbox_database import SandboxDatabase
+from sandbox_sqlite import SQLiteSandboxDatabase
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def database(request, tmp_path):
+    if request.param == "memory":
+        yield SandboxDatabase()
+        return
+    database = SQLiteSandboxDatabase(str(tmp_path / "sandbox.db"), seed=SandboxDatabase())
+    yield database
+    database.close()
+
+
+def handle_ticket(database, specialization=None):
+    officer_id = database.get_available_customer_care_officer(specialization)["id"]
+    database.assign_customer_care_officer(officer_id)
+    database.release_customer_care_officer(officer_id)
+    return officer_id
+
+
+def test_released_officers_go_to_the_back_of_the_queue(database):
+    # Seeded as CCO001, CCO002, CCO003 (busy), CCO004; releasing CCO003 queues it behind the others
+    database.release_customer_care_officer("CCO003")
+
+    assert [handle_ticket(database) for _ in range(6)] == ["CCO001", "CCO002", "CCO004", "CCO003",
+                                                           "CCO001", "CCO002"]
+
+
+def test_specialists_are_preferred_over_the_queue(database):
+    assert handle_ticket(database, "general") == "CCO004"
+    assert handle_ticket(database) == "CCO001"
+    assert handle_ticket(database, "refunds") == "CCO001"
+    assert handle_ticket(database) == "CCO002"
+
+
+def test_bulk_loaded_officers_join_the_back_of_the_queue(database):
+    officer = dict(database.get_available_customer_care_officer(), name="Reloaded")
+    database.bulk_load("officers", [officer])
+
+    assert [handle_ticket(database) for _ in range(3)] == ["CCO002", "CCO004", "CCO001"]
+
+
+def test_sqlite_queue_survives_reopening(tmp_path):
+    path = str(tmp_path / "sandbox.db")
+    database = SQLiteSandboxDatabase(path, seed=SandboxDatabase())
+    handle_ticket(database)
+    database.close()
+
+    reopened = SQLiteSandboxDatabase(path, seed=SandboxDatabase())
+    try:
+        assert handle_ticket(reopened) == "CCO002"
+    finally:
+        reopened.close()
@@ -0,0 +1,59 @@
+# tests/test_sandbox_records.py
+
+import json
+
+import pytest
+
+from sandbox_generator import generate
+from sandbox_records import ComplaintRecord, CustomerRecord, OrderRecord, TransactionRecord
+from sandbox_sqlite import _dump
+
+RECORD_TYPES = {"customers": CustomerRecord, "orders": OrderRecord, "complaints": ComplaintRecord}
+
+
+def test_generated_records_round_trip():
+    checked = 0
+    for table, record in generate(11, 30, 10, 10, 300):
+        if table in RECORD_TYPES:
+            original = json.loads(json.dumps(record))
+            compact = RECORD_TYPES[table](record)
+            assert compact == original
+            assert compact.to_dict() == original
+            assert json.loads(_dump(compact)) == original
+            assert set(compact) == set(original) and len(compact) == len(original)
+            checked += 1
+    assert checked
+
+
+@pytest.mark.parametrize("value", ["2024-01-15 19:30:00", "1969-12-31 23:59:59", "2024-02-29 00:00:00",
+                                   "2024-01-15T19:30:00", "2024-13-01 00:00:00", "yesterday", None, ""])
+def test_timestamps_round_trip(value):
+    record = TransactionRecord({"id": "REF_001", "timestamp": value})
+    assert record["timestamp"] == value
+
+
+@pytest.mark.parametrize("items", [
+    [{"name": "dosa", "quantity": 2, "price": 120}],
+    [{"name": "dosa", "quantity": 2, "price": 120, "note": "extra chutney"}],
+    [{"name": "dosa", "quantity": 2}],
+    [],
+    "2x dosa",
+])
+def test_items_round_trip(items):
+    assert OrderRecord({"id": "ORD_001", "items": items})["items"] == items
+
+
+def test_record_behaves_as_a_mutable_dict():
+    record = CustomerRecord({"id": "C001", "wallet_balance": 500.0, "complaint_history": [], "nickname": "JS"})
+
+    record["wallet_balance"] += 50.0
+    record.setdefault("complaint_history", []).append("COMP_001")
+    record["loyalty_tier"] = "gold"
+    del record["nickname"]
+
+    assert record == {"id": "C001", "wallet_balance": 550.0, "complaint_history": ["COMP_001"], "loyalty_tier": "gold"}
+    assert record.get("email") is None and "email" not in record
+    with pytest.raises(KeyError):
+        del record["email"]
+    with pytest.raises(KeyError):
+        record["nickname"]
@@ -0,0 +1,67 @@
+# tests/test_tools.py
+
+import tools
+from entity_extraction import entity_scope
+from sandbox_database import sandbox_db
+
+
+def test_refund_tool_credits_the_sandbox_wallet():
+    assert tools.SANDBOX_AVAILABLE
+    before = sandbox_db.get_customer_details("C001")["wallet_balance"]
+
+    report = tools.issue_instant_refund("C001", 40.0, "Spilled drink")
+
+    assert "C001" in report
+    assert sandbox_db.get_customer_details("C001")["wallet_balance"] == before + 40.0
+
+
+def test_exonerate_and_feedback_tools_write_sandbox_logs():
+    tools.exonerate_driver("D001", "Restaurant delay")
+    tools.log_merchant_packaging_feedback("M001", "Lid not sealed")
+
+    assert sandbox_db.get_driver_details("D001")["exoneration_log"][-1].endswith("EXONERATED - Restaurant delay")
+    assert "Lid not sealed" in sandbox_db.get_merchant_details("M001")["feedback_log"][-1]
+
+
+def recorded_lookups(monkeypatch, method):
+    calls = []
+    real = getattr(sandbox_db, method)
+
+    def record(record_id):
+        calls.append(record_id)
+        return real(record_id)
+    monkeypatch.setattr(sandbox_db, method, record)
+    return calls
+
+
+def test_explicit_ids_reach_the_sandbox_unchanged(monkeypatch):
+    orders = recorded_lookups(monkeypatch, "get_order_details")
+    customers = recorded_lookups(monkeypatch, "get_customer_details")
+
+    with entity_scope(["My order ORD_002 was late"]):
+        tools.analyze_order_discrepancy("GF-88231")
+        tools.assess_refund_eligibility("cust-42", "GF-88232", 200.0)
+
+    assert orders == ["GF-88231", "GF-88232"]
+    assert customers == ["cust-42"]
+
+
+def test_placeholder_ids_use_the_turn_entities(monkeypatch):
+    orders = recorded_lookups(monkeypatch, "get_order_details")
+
+    with entity_scope(["My order ORD_002 was late, I'm C001"]):
+        tools.analyze_order_discrepancy("obtained from customer")
+        tools.assess_refund_eligibility("", "null", 200.0)
+
+    assert orders == ["ORD_002", "ORD_002"]
+
+
+def test_missing_ids_never_fall_back_to_the_sample_records(monkeypatch):
+    orders = recorded_lookups(monkeypatch, "get_order_details")
+
+    with entity_scope(["My food was cold"]):
+        discrepancy = tools.analyze_order_discrepancy("null")
+        eligibility = tools.assess_refund_eligibility("", "", 200.0)
+
+    assert orders == []
+    assert "order ID" in discrepancy and "order ID" in eligibility
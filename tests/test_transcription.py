@@ -0,0 +1,31 @@
+# tests/test_transcription.py
+
+import asyncio
+import concurrent.futures
+import io
+from types import SimpleNamespace
+
+import assemblyai as aai
+
+from model_clients import LocalTranscriber
+from transcription import transcribe_async
+
+
+def test_real_sdk_transcriber_is_polled_not_awaited(monkeypatch):
+    transcriber = aai.Transcriber(api_key="test")
+    # The SDK method returns a concurrent Future, which cannot be awaited
+    monkeypatch.setattr(transcriber, "transcribe_async", lambda *args, **kwargs: concurrent.futures.Future())
+    statuses = iter([aai.TranscriptStatus.processing, aai.TranscriptStatus.completed])
+    monkeypatch.setattr(transcriber, "submit", lambda audio: SimpleNamespace(id="t1", status=aai.TranscriptStatus.queued))
+    monkeypatch.setattr(aai.Transcript, "get_by_id",
+                        lambda transcript_id: SimpleNamespace(id=transcript_id, status=next(statuses), text="hello"))
+
+    transcript = asyncio.run(transcribe_async(transcriber, io.BytesIO(b"audio"), poll_seconds=0))
+
+    assert transcript.status == aai.TranscriptStatus.completed
+    assert transcript.text == "hello"
+
+
+def test_local_stand_in_coroutine_is_awaited():
+    transcript = asyncio.run(transcribe_async(LocalTranscriber(text="local"), io.BytesIO(b"audio")))
+    assert transcript.text == "local"
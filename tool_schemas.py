@@ -0,0 +1,116 @@
+# tool_schemas.py
+# Argument schemas for the agent's multi-argument tools. The model fills these in through
+# function calling, so values arrive typed and validated instead of as comma-separated strings.
+
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+CUSTOMER_ID = "Customer ID, e.g. C001"
+ORDER_ID = "Order ID, e.g. ORD_001"
+MERCHANT_ID = "Merchant ID, e.g. M001"
+DRIVER_ID = "Driver ID, e.g. D001"
+
+
+class RefundInput(BaseModel):
+    customer_id: str = Field(description=CUSTOMER_ID)
+    amount: float = Field(gt=0, description="Refund amount in rupees, as a number")
+    reason: str = Field(description="Short reason recorded with the refund")
+
+
+class VoucherInput(BaseModel):
+    customer_id: str = Field(description=CUSTOMER_ID)
+    amount: float = Field(gt=0, description="Voucher value in rupees, as a number")
+    voucher_type: str = Field(description="Kind of voucher, e.g. goodwill, food_credit, free_delivery")
+
+
+class IncidentReportInput(BaseModel):
+    incident_type: str = Field(description="e.g. spilled_food, wrong_order, late_delivery, driver_behaviour")
+    details: str = Field(description="What happened")
+    involved_parties: str = Field(description="IDs or roles involved, e.g. 'C001, M001, D001'")
+
+
+class DriverMessageInput(BaseModel):
+    driver_id: str = Field(description=DRIVER_ID)
+    message: str = Field(default="Status update", description="Message or question for the driver")
+
+
+class MerchantMessageInput(BaseModel):
+    merchant_id: str = Field(description=MERCHANT_ID)
+    message: str = Field(default="Order inquiry", description="Message or question for the merchant")
+
+
+class IdentityVerificationInput(BaseModel):
+    customer_id: str = Field(description=CUSTOMER_ID)
+    verification_method: str = Field(default="standard", description="e.g. standard, otp, email")
+
+
+class ExonerateDriverInput(BaseModel):
+    driver_id: str = Field(description=DRIVER_ID)
+    reason: str = Field(default="Evidence supports innocence", description="Evidence clearing the driver")
+
+
+class MerchantFeedbackInput(BaseModel):
+    merchant_id: str = Field(description=MERCHANT_ID)
+    feedback: str = Field(description="Quality or packaging feedback for the merchant")
+
+
+class EscalationInput(BaseModel):
+    reason: str = Field(description="Why a human agent is needed")
+    urgency_level: Literal["low", "medium", "high"] = Field(default="medium")
+    case_summary: str = Field(description="Summary of the case so far for the human agent")
+
+
+class RefundEligibilityInput(BaseModel):
+    customer_id: str = Field(default="", description=CUSTOMER_ID + "; leave empty to use the one the customer gave")
+    order_id: str = Field(default="", description=ORDER_ID + "; leave empty to use the one the customer gave")
+    requested_amount: Optional[float] = Field(
+        default=None, gt=0, description="Amount the customer asks for, in rupees; leave empty to use the amount they mentioned"
+    )
+
+
+class SubstitutionPolicyInput(BaseModel):
+    merchant_id: str = Field(description=MERCHANT_ID)
+    original_item: str = Field(description="Item the customer ordered")
+
+
+class TrafficInput(BaseModel):
+    location: str = Field(description="Area or address")
+    route: str = Field(default="", description="Optional route being driven")
+
+
+class RerouteInput(BaseModel):
+    driver_id: str = Field(description=DRIVER_ID)
+    new_route: str = Field(description="Route to switch the driver to")
+
+
+class NearbyMerchantsInput(BaseModel):
+    location: str = Field(description="Area or address")
+    cuisine_type: str = Field(default="", description="Optional cuisine filter")
+
+
+class RefundAmountInput(BaseModel):
+    order_value: int = Field(gt=0, description="Order value in rupees, as a number")
+    issue_type: str = Field(description=(
+        "One of wrong_order, quality_issue, delivery_delay, missing_items, spilled_food, "
+        "cold_food, damaged_packaging"
+    ))
+    customer_expectation: str = Field(default="reasonable", description="e.g. reasonable, full_refund, high")
+
+
+class Lookup(BaseModel):
+    tool: str = Field(description="Name of a read-only tool")
+    args: Dict[str, Any] = Field(default_factory=dict, description="That tool's arguments, e.g. {\"customer_id\": \"C001\"}")
+
+
+class InvestigateInput(BaseModel):
+    lookups: List[Lookup] = Field(min_length=1, description="Lookups to run in parallel")
+
+
+def describe_validation_error(error: ValidationError) -> str:
+    """Observation returned to the agent when its tool arguments fail validation"""
+    problems = "; ".join(
+        f"{'.'.join(str(part) for part in problem['loc']) or 'input'}: {problem['msg']}"
+        for problem in error.errors()
+    )
+    return f"Invalid tool arguments ({problems}). Call the tool again with corrected arguments."
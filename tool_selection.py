@@ -0,0 +1,85 @@
+# tool_selection.py
+# Picks the intent-relevant tool groups for a turn so the agent prompt only lists tools it may need
+
+import re
+
+# Always offered: situation analysis, batched lookups, the generic solution path, tracking and escalation
+CORE_TOOLS = (
+    "analyze_customer_situation",
+    "investigate",
+    "provide_generic_solution",
+    "track_delivery_status",
+    "orchestrate_resolution_plan",
+    "log_incident_report",
+    "escalate_to_human",
+)
+
+TOOL_GROUPS = {
+    "tracking": (
+        "analyze_gps_data",
+        "check_weather_conditions",
+        "check_traffic",
+        "contact_driver",
+        "reroute_driver",
+        "check_driver_history",
+        "find_nearby_locker",
+    ),
+    "evidence": (
+        "analyze_image_evidence",
+        "validate_customer_complaint",
+        "analyze_order_discrepancy",
+        "handle_wrong_order_situation",
+        "check_merchant_substitution_policy",
+        "log_merchant_packaging_feedback",
+        "check_merchant_history",
+        "contact_merchant",
+        "get_merchant_status",
+        "get_nearby_merchants",
+        "exonerate_driver",
+        "initiate_mediation_flow",
+    ),
+    "compensation": (
+        "gather_compensation_details",
+        "negotiate_fair_compensation",
+        "explain_business_compensation_policy",
+        "calculate_dynamic_refund_amount",
+        "assess_refund_eligibility",
+        "offer_compensation_voucher",
+        "issue_instant_refund",
+        "check_customer_history",
+        "verify_customer_identity",
+    ),
+}
+
+GROUP_PATTERNS = {
+    "tracking": re.compile(
+        r"\b(where|late|delay\w*|status|track\w*|eta|driver|rider|how long|arriv\w*|"
+        r"traffic|weather|rain\w*|locker|reroute|address|on (?:the|its) way)\b",
+        re.IGNORECASE
+    ),
+    "evidence": re.compile(
+        r"\b(spill\w*|wrong|missing|damage\w*|cold|broken|leak\w*|packag\w*|photo\w*|image|picture|"
+        r"evidence|quality|stale|undercooked|raw|substitut\w*|items?|merchant|restaurant|dispute)\b",
+        re.IGNORECASE
+    ),
+    "compensation": re.compile(
+        r"(₹|\b(refund\w*|money|compensat\w*|voucher|credits?|cash|pay\w*|charge\w*|rs\.?|inr|rupees?|"
+        r"amount|policy|fair|reimburs\w*)\b)",
+        re.IGNORECASE
+    ),
+}
+
+
+def select_tool_groups(text: str) -> tuple:
+    """
+    Return the sorted tool groups whose keywords appear in the turn text.
+    An empty tuple means nothing matched and the agent should get the full toolset.
+    """
+    return tuple(sorted(group for group, pattern in GROUP_PATTERNS.items() if pattern.search(text)))
+
+
+def tool_names_for_groups(groups: tuple) -> set:
+    names = set(CORE_TOOLS)
+    for group in groups:
+        names.update(TOOL_GROUPS[group])
+    return names
@@ -7,8 +7,16 @@ from datetime import datetime, timedelta
 import sys
 import os
 
-# Add sandbox directory to Python path
-sandbox_path = os.path.join(os.path.dirname(__file__), 'sandbox')
+from entity_extraction import entities_for, turn_entities
+from message_features import (
+    COMPENSATION_ISSUES, EVIDENCE_REQUEST_ISSUES, EVIDENCE_TERMS, FEEDBACK_ISSUES,
+    ISSUE_INFO_TERMS, ORDER_INFO_TERMS, PROBLEM_TERMS, QUERY_SEVERITY, SITUATION_ISSUES,
+    SOLUTION_ISSUES, VAGUE_TERMS, message_features
+)
+
+# Add sandbox directory to Python path. The package directory is 'Sandbox'; the old lowercase
+# 'sandbox' only resolved on case-insensitive filesystems, so elsewhere the sandbox never loaded.
+sandbox_path = os.path.join(os.path.dirname(__file__), 'Sandbox')
 if sandbox_path not in sys.path:
     sys.path.insert(0, sandbox_path)
 
@@ -20,11 +28,31 @@ try:
         exonerate_delivery_partner, check_refund_eligibility,
         get_merchant_substitute_policy
     )
+    from lookup_cache import lookup_scope
     SANDBOX_AVAILABLE = True
     print("✓ Sandbox environment loaded successfully")
 except ImportError as e:
     print(f"⚠ Sandbox not available: {e}")
     SANDBOX_AVAILABLE = False
+    # Nothing to cache without the sandbox; callers get None instead of a LookupScope
+    from contextlib import nullcontext as lookup_scope
+
+# The sandbox's sample customer, used by validate_customer_complaint only when neither the
+# complaint nor the customer's message names one
+DEFAULT_CUSTOMER_ID = "C001"
+
+# What the agent writes when it has no real ID to pass
+PLACEHOLDER_IDS = {"", "null", "none", "n/a", "unknown"}
+
+def named_id(value, turn_value):
+    """
+    The ID the agent passed, as it is, unless it is missing or a placeholder ("null",
+    "obtained from customer"); then the one the customer named this turn, which may be None
+    """
+    value = str(value or "").strip()
+    if value.lower() in PLACEHOLDER_IDS or "obtained from" in value.lower():
+        return turn_value
+    return value
 
 def collect_evidence(query: str) -> str:
     """
@@ -37,8 +65,9 @@ def collect_evidence(query: str) -> str:
     print(f"--- Analyzing Customer Complaint: {query} ---")
     
     # Check if the query contains sufficient information to proceed
-    has_order_info = any(keyword in query.lower() for keyword in ["order", "paid", "rupees", "rs", "$", "restaurant", "kitchen"])
-    has_issue_info = any(keyword in query.lower() for keyword in ["wrong", "late", "delay", "cold", "missing", "quality", "spilled"])
+    features = message_features(query)
+    has_order_info = features.has(ORDER_INFO_TERMS)
+    has_issue_info = features.has(ISSUE_INFO_TERMS)
     
     if has_order_info and has_issue_info:
         return f"""COMPLAINT ANALYSIS COMPLETE:
@@ -143,14 +172,11 @@ def analyze_customer_situation(customer_message: str) -> str:
     print(f"--- Business Analysis: {customer_message} ---")
     
     # Extract key information from the customer's message
-    message_lower = customer_message.lower()
+    features = message_features(customer_message)
     
     # Determine if this is a tracking request or actual problem
-    tracking_keywords = ["where", "status", "driver", "eta", "time", "location"]
-    problem_keywords = ["spill", "wrong", "damage", "cold", "missing", "terrible", "awful", "bad", "broken", "packaging"]
-    
-    is_tracking_request = any(word in message_lower for word in tracking_keywords) and not any(word in message_lower for word in problem_keywords)
-    is_actual_problem = any(word in message_lower for word in problem_keywords)
+    is_tracking_request = "tracking" in features.intents and not features.has(PROBLEM_TERMS)
+    is_actual_problem = features.has(PROBLEM_TERMS)
     
     if is_tracking_request:
         return f"""🎯 TRACKING REQUEST DETECTED:
@@ -168,22 +194,8 @@ def analyze_customer_situation(customer_message: str) -> str:
     
     elif is_actual_problem:
         # Determine if visual evidence would help
-        evidence_needed_cases = ["spill", "damage", "wrong", "packaging", "quality", "broken", "mess", "bad"]
-        needs_evidence = any(word in message_lower for word in evidence_needed_cases)
-        
-        issue_type = "general_problem"
-        if any(word in message_lower for word in ["spill", "damage", "leak", "mess"]):
-            issue_type = "spilled_food"
-        elif any(word in message_lower for word in ["wrong", "different", "mistake"]):
-            issue_type = "wrong_order"
-        elif any(word in message_lower for word in ["packaging", "broken", "damaged"]):
-            issue_type = "packaging_issue"
-        elif any(word in message_lower for word in ["cold", "lukewarm"]):
-            issue_type = "cold_food"
-        elif any(word in message_lower for word in ["missing", "forgot"]):
-            issue_type = "missing_items"
-        elif any(word in message_lower for word in ["quality", "bad", "terrible"]):
-            issue_type = "quality_issue"
+        needs_evidence = features.has(EVIDENCE_TERMS)
+        issue_type = features.classify(SITUATION_ISSUES, "general_problem")
         
         evidence_instruction = ""
         if needs_evidence:
@@ -306,21 +318,8 @@ def provide_generic_solution(issue_details: str) -> str:
     """Business-first solution that tries to solve problems before offering compensation"""
     print(f"--- Business Solution Strategy: {issue_details} ---")
     
-    # Parse the issue type from details
-    details_lower = issue_details.lower()
-    
     # Determine issue type
-    issue_type = "general"
-    if any(word in details_lower for word in ["spill", "damage", "leak", "mess"]):
-        issue_type = "spilled_food"
-    elif any(word in details_lower for word in ["wrong", "different", "not what", "mistake"]):
-        issue_type = "wrong_order"
-    elif any(word in details_lower for word in ["late", "delay", "slow", "waiting"]):
-        issue_type = "late_delivery"
-    elif any(word in details_lower for word in ["cold", "lukewarm", "not hot"]):
-        issue_type = "cold_food"
-    elif any(word in details_lower for word in ["missing", "forgot", "didn't get"]):
-        issue_type = "missing_items"
+    issue_type = message_features(issue_details).classify(SOLUTION_ISSUES, "general")
     
     # Business-first responses that offer solutions before compensation
     if issue_type == "spilled_food":
@@ -500,57 +499,30 @@ Need anything else? I'm here to help! 😊"""
 def handle_edge_cases(message: str) -> dict:
     """Handle humor, vague complaints, slang, and incomplete information naturally"""
     
-    message_lower = message.lower()
+    features = message_features(message)
     
     # Humor detection
-    humor_indicators = ["lol", "haha", "😂", "😅", "funny", "joke", "kidding"]
-    if any(indicator in message_lower for indicator in humor_indicators):
+    if "humor" in features.intents:
         return {
             "type": "humor",
             "response_style": "playful",
             "suggested_tone": "Match their energy while being helpful"
         }
     
-    # Slang detection
-    slang_map = {
-        "food is trash": "poor quality food",
-        "driver is sus": "suspicious driver behavior", 
-        "this is cap": "this seems wrong",
-        "no cap": "honestly",
-        "bet": "okay/sure",
-        "fire food": "excellent food",
-        "mid": "mediocre/average",
-        "lowkey": "somewhat/kind of",
-        "highkey": "very/really",
-        "slaps": "really good",
-        "bussin": "really good/delicious",
-        "periodt": "end of discussion"
-    }
-    
-    translated_message = message_lower
-    slang_found = []
-    for slang, meaning in slang_map.items():
-        if slang in message_lower:
-            translated_message = translated_message.replace(slang, meaning)
-            slang_found.append(slang)
-    
     # Vague complaint detection
-    vague_indicators = ["bad", "terrible", "awful", "horrible", "not good", "disappointing"]
-    is_vague = any(indicator in message_lower for indicator in vague_indicators) and len(message.split()) < 8
+    is_vague = features.has(VAGUE_TERMS) and features.word_count < 8
     
     # Incomplete information detection
-    question_words = ["what", "when", "where", "how", "why"]
-    has_questions = any(word in message_lower for word in question_words)
-    is_incomplete = len(message.split()) < 5 or has_questions
+    is_incomplete = features.word_count < 5 or "question" in features.intents
     
     return {
         "original_message": message,
-        "translated_message": translated_message,
-        "slang_detected": slang_found,
+        "translated_message": features.translated,
+        "slang_detected": features.slang,
         "is_vague": is_vague,
         "is_incomplete": is_incomplete,
-        "has_humor": len([h for h in humor_indicators if h in message_lower]) > 0,
-        "response_style": "casual" if slang_found else "professional"
+        "has_humor": "humor" in features.intents,
+        "response_style": "casual" if features.slang else "professional"
     }
 
 def generate_natural_response(issue_type: str, edge_case_info: dict) -> str:
@@ -606,26 +578,21 @@ def check_customer_history(customer_id: str) -> str:
     
     return f"Customer Profile: {random.choice(profiles)}"
 
-def issue_instant_refund(refund_details: str) -> str:
+# The refund, exoneration and merchant feedback tools write to the sandbox when it is loaded.
+# Until the typed-tools change, later canned-response copies of these three shadowed them, so
+# the agent only ever got the fallback text below; recording the action is the intended behavior.
+def issue_instant_refund(customer_id: str, amount: float, reason: str) -> str:
     """Issue instant refund with proper documentation using sandbox."""
-    try:
-        customer_id, amount, reason = refund_details.split(',', 2)
-        amount = float(amount.strip())
-        reason = reason.strip()
-        
-        print(f"--- Processing Refund: ${amount} to {customer_id} for {reason} ---")
-        
-        if SANDBOX_AVAILABLE:
-            return process_customer_refund(customer_id, amount, reason)
-        
-        # Fallback
-        return f"Instant refund of ₹{amount} processed for customer {customer_id}. Reason: {reason}. Funds will appear in 1-3 business days."
-    except:
-        return "Error: Please provide refund details as customer_id,amount,reason"
+    print(f"--- Processing Refund: ₹{amount} to {customer_id} for {reason} ---")
+    
+    if SANDBOX_AVAILABLE:
+        return process_customer_refund(customer_id, amount, reason)
+    
+    # Fallback
+    return f"Instant refund of ₹{amount} processed for customer {customer_id}. Reason: {reason}. Funds will appear in 1-3 business days."
 
-def exonerate_driver(driver_details: str) -> str:
+def exonerate_driver(driver_id: str, reason: str = "Evidence supports innocence") -> str:
     """Clear driver of fault with documentation using sandbox."""
-    driver_id, reason = driver_details.split(',', 1) if ',' in driver_details else (driver_details, "Evidence supports innocence")
     print(f"--- Exonerating Driver {driver_id}: {reason} ---")
     
     if SANDBOX_AVAILABLE:
@@ -634,27 +601,23 @@ def exonerate_driver(driver_details: str) -> str:
     # Fallback
     return f"Driver {driver_id} cleared of all fault. Reason: {reason}. No impact on performance record."
 
-def log_merchant_packaging_feedback(feedback_details: str) -> str:
+def log_merchant_packaging_feedback(merchant_id: str, feedback: str) -> str:
     """Log detailed merchant feedback for quality improvement using sandbox."""
-    try:
-        merchant_id, feedback = feedback_details.split(',', 1)
-        print(f"--- Logging Merchant Feedback: {merchant_id} ---")
-        
-        if SANDBOX_AVAILABLE:
-            return log_merchant_quality_issue(merchant_id.strip(), feedback.strip(), "high")
-        
-        # Fallback
-        return f"Quality feedback logged for merchant {merchant_id.strip()}: '{feedback.strip()}'. Forwarded to merchant quality team for review and improvement action."
-    except:
-        return "Error: Please provide feedback as merchant_id,feedback_details"
+    print(f"--- Logging Merchant Feedback: {merchant_id} ---")
+    
+    if SANDBOX_AVAILABLE:
+        return log_merchant_quality_issue(merchant_id, feedback, "high")
+    
+    # Fallback
+    return f"Quality feedback logged for merchant {merchant_id}: '{feedback}'. Forwarded to merchant quality team for review and improvement action."
 
 # New sandbox-specific tools for advanced reasoning
 
 def analyze_order_discrepancy(order_id: str) -> str:
     """Analyze what went wrong with a specific order"""
-    # Handle placeholder inputs
-    if not order_id or "obtained from" in order_id.lower() or order_id.lower() in ["null", "none"]:
-        order_id = "ORD_001"  # Default to first sandbox order
+    order_id = named_id(order_id, turn_entities().order_id)
+    if not order_id:
+        return "No order ID given. Ask the customer for their order ID before analyzing the order."
     
     print(f"--- Analyzing Order Discrepancy: {order_id} ---")
     
@@ -669,24 +632,16 @@ def analyze_order_discrepancy(order_id: str) -> str:
     • Root Cause: Kitchen preparation error
     • Recommendation: Full refund + merchant feedback"""
 
-def assess_refund_eligibility(eligibility_details: str) -> str:
+def assess_refund_eligibility(customer_id: str = "", order_id: str = "", requested_amount: float = None) -> str:
     """Assess customer eligibility for refund based on history and order details"""
-    # Parse input or use defaults
-    try:
-        if ',' in eligibility_details:
-            parts = eligibility_details.split(',')
-            customer_id = parts[0].strip() if len(parts) > 0 else "C001"
-            order_id = parts[1].strip() if len(parts) > 1 else "ORD_001"
-            requested_amount = float(parts[2].strip()) if len(parts) > 2 else 450.0
-        else:
-            customer_id = "C001"
-            order_id = "ORD_001"
-            requested_amount = 450.0
-    except:
-        customer_id = "C001"
-        order_id = "ORD_001"
-        requested_amount = 450.0
-    
+    # Anything the agent left out comes from the customer's message this turn
+    entities = turn_entities()
+    customer_id = named_id(customer_id, entities.customer_id)
+    order_id = named_id(order_id, entities.order_id)
+    if not customer_id or not order_id:
+        return "Customer ID and order ID are both needed. Ask the customer for whichever is missing before assessing the refund."
+    if not requested_amount:
+        requested_amount = entities.amount() or 450.0
     print(f"--- Assessing Refund Eligibility for {customer_id} ---")
     
     if SANDBOX_AVAILABLE:
@@ -721,8 +676,8 @@ def check_merchant_substitution_policy(merchant_id: str, original_item: str) ->
 
 def validate_customer_complaint(complaint_details: str) -> str:
     """Validate customer complaint against order history and delivery logs"""
-    # Default customer ID if not provided
-    customer_id = "C001"
+    # Customer named in the complaint or this turn's message, else the sandbox customer
+    customer_id = entities_for(complaint_details).customer_id or DEFAULT_CUSTOMER_ID
     
     # Handle missing complaint details
     if not complaint_details or complaint_details.lower() in ["null", "none"]:
@@ -930,9 +885,8 @@ def check_weather_conditions(location_time: str) -> str:
 • Show customer that delays are weather-related, not service failures
 • Demonstrate mature understanding of uncontrollable factors"""
 
-def contact_driver(driver_message: str) -> str:
+def contact_driver(driver_id: str, message: str = "Status update") -> str:
     """Send message or call driver for clarification."""
-    driver_id, message = driver_message.split(',', 1) if ',' in driver_message else (driver_message, "Status update")
     print(f"--- Contacting Driver {driver_id}: {message} ---")
     
     responses = [
@@ -944,9 +898,8 @@ def contact_driver(driver_message: str) -> str:
     
     return f"Driver Communication: {random.choice(responses)}"
 
-def contact_merchant(merchant_message: str) -> str:
+def contact_merchant(merchant_id: str, message: str = "Order inquiry") -> str:
     """Contact merchant about order issues."""
-    merchant_id, message = merchant_message.split(',', 1) if ',' in merchant_message else (merchant_message, "Order inquiry")
     print(f"--- Contacting Merchant {merchant_id}: {message} ---")
     
     responses = [
@@ -958,63 +911,26 @@ def contact_merchant(merchant_message: str) -> str:
     
     return f"Merchant Response: {random.choice(responses)}"
 
-def verify_customer_identity(verification_request: str) -> str:
+def verify_customer_identity(customer_id: str, verification_method: str = "standard") -> str:
     """Verify customer identity for security purposes."""
-    customer_id, method = verification_request.split(',', 1) if ',' in verification_request else (verification_request, "standard")
-    print(f"--- Verifying Customer Identity: {customer_id} via {method} ---")
+    print(f"--- Verifying Customer Identity: {customer_id} via {verification_method} ---")
     
-    return f"Identity Verification: Customer {customer_id} successfully verified via {method}. Security check passed."
+    return f"Identity Verification: Customer {customer_id} successfully verified via {verification_method}. Security check passed."
 
-def offer_compensation_voucher(voucher_details: str) -> str:
+def offer_compensation_voucher(customer_id: str, amount: float, voucher_type: str) -> str:
     """Offer voucher or credits as compensation."""
-    try:
-        customer_id, amount, voucher_type = voucher_details.split(',')
-        print(f"--- Offering Voucher: {voucher_type} worth {amount} to {customer_id} ---")
-        return f"Successfully issued {voucher_type} voucher worth ${amount} to customer {customer_id}. Valid for 30 days, applicable to future orders."
-    except:
-        return "Error: Please provide voucher details as customer_id,amount,voucher_type"
-
-def issue_instant_refund(refund_details: str) -> str:
-    """Issue instant refund with proper documentation."""
-    try:
-        customer_id, amount, reason = refund_details.split(',', 2)
-        print(f"--- Processing Refund: ${amount} to {customer_id} for {reason} ---")
-        return f"Instant refund of ${amount} processed for customer {customer_id}. Reason: {reason}. Funds will appear in 1-3 business days."
-    except:
-        return "Error: Please provide refund details as customer_id,amount,reason"
-
-def exonerate_driver(driver_details: str) -> str:
-    """Clear driver of fault with documentation."""
-    driver_id, reason = driver_details.split(',', 1) if ',' in driver_details else (driver_details, "Evidence supports innocence")
-    print(f"--- Exonerating Driver {driver_id}: {reason} ---")
-    return f"Driver {driver_id} cleared of all fault. Reason: {reason}. No impact on performance record."
-
-def log_merchant_packaging_feedback(feedback_details: str) -> str:
-    """Log detailed merchant feedback for quality improvement."""
-    try:
-        merchant_id, feedback = feedback_details.split(',', 1)
-        print(f"--- Logging Merchant Feedback: {merchant_id} ---")
-        return f"Quality feedback logged for merchant {merchant_id}: '{feedback}'. Forwarded to merchant quality team for review and improvement action."
-    except:
-        return "Error: Please provide feedback as merchant_id,feedback_details"
+    print(f"--- Offering Voucher: {voucher_type} worth ₹{amount} to {customer_id} ---")
+    return f"Successfully issued {voucher_type} voucher worth ₹{amount} to customer {customer_id}. Valid for 30 days, applicable to future orders."
 
-def log_incident_report(incident_details: str) -> str:
+def log_incident_report(incident_type: str, details: str, involved_parties: str) -> str:
     """Create comprehensive incident report."""
-    try:
-        incident_type, details, parties = incident_details.split(',', 2)
-        print(f"--- Creating Incident Report: {incident_type} ---")
-        return f"Incident report #{random.randint(10000,99999)} created. Type: {incident_type}. Details logged for analysis. Involved parties: {parties}. Report forwarded to quality assurance team."
-    except:
-        return "Error: Please provide incident details as incident_type,details,involved_parties"
-
-def escalate_to_human(escalation_request: str) -> str:
+    print(f"--- Creating Incident Report: {incident_type} ---")
+    return f"Incident report #{random.randint(10000,99999)} created. Type: {incident_type}. Details logged for analysis. Involved parties: {involved_parties}. Report forwarded to quality assurance team."
+
+def escalate_to_human(reason: str, urgency_level: str = "medium", case_summary: str = "") -> str:
     """Escalate complex cases to human agents."""
-    try:
-        reason, urgency, summary = escalation_request.split(',', 2)
-        print(f"--- Escalating to Human Agent: {urgency} priority ---")
-        return f"Case escalated to human agent. Priority: {urgency}. Reason: {reason}. Case summary provided. Expected response time: {'30 minutes' if urgency == 'high' else '2 hours' if urgency == 'medium' else '24 hours'}."
-    except:
-        return "Case escalated to human agent team for specialized handling."
+    print(f"--- Escalating to Human Agent: {urgency_level} priority ---")
+    return f"Case escalated to human agent. Priority: {urgency_level}. Reason: {reason}. Case summary provided. Expected response time: {'30 minutes' if urgency_level == 'high' else '2 hours' if urgency_level == 'medium' else '24 hours'}."
 
 def check_traffic(location: str, route: str = "") -> str:
     """Check current traffic conditions for a specific location and route."""
@@ -1094,7 +1010,7 @@ def get_nearby_merchants(location: str, cuisine_type: str = "") -> str:
         try:
             # Get merchants from sandbox
             merchants = []
-            for merchant in sandbox_db.merchants.values():
+            for merchant in sandbox_db.get_all_merchants():
                 if not cuisine_type or cuisine_type.lower() in merchant['cuisine_type'].lower():
                     distance = round(random.uniform(0.3, 3.5), 1)
                     eta = random.randint(15, 35)
@@ -1252,7 +1168,7 @@ def orchestrate_resolution_plan(issue_details: str) -> str:
     """Create and execute a comprehensive multi-step resolution plan with proactive problem detection."""
     print(f"--- Orchestrating Resolution Plan: {issue_details} ---")
     
-    details_lower = issue_details.lower()
+    features = message_features(issue_details)
     
     # Advanced issue classification with severity scoring
     severity_score = 0
@@ -1260,17 +1176,17 @@ def orchestrate_resolution_plan(issue_details: str) -> str:
     emotional_indicators = []
     
     # Critical issues (100 points)
-    if any(critical in details_lower for critical in ["spilled", "poisoned", "allergic", "sick", "emergency"]):
+    if features.severity == "critical":
         severity_score = 100
         issue_type = "critical_failure"
     
     # High severity (75 points)
-    elif any(high in details_lower for high in ["wrong order", "missing", "damaged", "terrible", "awful", "disgusted"]):
+    elif features.severity == "high":
         severity_score = 75
         issue_type = "major_service_failure"
     
     # Medium severity (50 points)
-    elif any(medium in details_lower for medium in ["cold", "late", "delayed", "poor quality", "disappointed"]):
+    elif features.severity == "medium":
         severity_score = 50
         issue_type = "quality_issue"
     
@@ -1280,15 +1196,15 @@ def orchestrate_resolution_plan(issue_details: str) -> str:
         issue_type = "minor_concern"
     
     # Detect emotional indicators
-    if any(anger in details_lower for anger in ["angry", "furious", "outraged", "disgusted"]):
+    if "high_anger" in features.emotions:
         emotional_indicators.append("high_anger")
         severity_score += 15
-    elif any(frustration in details_lower for frustration in ["frustrated", "annoyed", "disappointed"]):
+    elif "frustration" in features.emotions:
         emotional_indicators.append("frustration")
         severity_score += 10
     
     # Detect repeat customer signals
-    if any(repeat in details_lower for repeat in ["again", "always", "every time", "repeatedly"]):
+    if "repeat" in features.intents:
         emotional_indicators.append("repeat_issue")
         severity_score += 20
     
@@ -1372,24 +1288,17 @@ def gather_compensation_details(customer_query: str) -> str:
     """
     print(f"--- Gathering Compensation Details for: {customer_query} ---")
     
-    # Extract order value if mentioned
-    order_value = None
-    if "₹" in customer_query or "rs" in customer_query.lower() or "rupees" in customer_query.lower():
-        import re
-        amount_match = re.search(r'₹(\d+)|rs\s*(\d+)|(\d+)\s*rupees', customer_query.lower())
-        if amount_match:
-            order_value = int(amount_match.group(1) or amount_match.group(2) or amount_match.group(3))
+    features = message_features(customer_query)
+    
+    # Order value from the query or, failing that, the customer's message this turn
+    order_value = entities_for(customer_query).amount()
     
     # Default order value for simulation
     if not order_value:
         order_value = random.choice([250, 350, 450, 550, 650, 750, 850, 950])
     
     # Determine issue type for context
-    issue_severity = "medium"
-    if any(word in customer_query.lower() for word in ["completely wrong", "terrible", "disgusting", "awful", "horrible"]):
-        issue_severity = "high"
-    elif any(word in customer_query.lower() for word in ["slightly", "minor", "small", "bit"]):
-        issue_severity = "low"
+    issue_severity = features.classify(QUERY_SEVERITY, "medium")
     
     return f"""💼 COMPENSATION ASSESSMENT REQUIRED:
 
@@ -1415,6 +1324,16 @@ To provide fair compensation, I need to understand:
 ⚡ NEXT STEP: Use negotiate_fair_compensation() after gathering customer preferences."""
 
 
+# Share of the order value offered before business adjustments, by negotiated issue type
+COMPENSATION_PERCENTAGES = {
+    "wrong_order": 45,
+    "quality_issue": 50,
+    "delivery_delay": 25,
+    "missing_items": 60,
+    "general": 40
+}
+
+
 def negotiate_fair_compensation(order_details: str) -> str:
     """
     Negotiate fair compensation that balances customer satisfaction with business interests.
@@ -1422,30 +1341,12 @@ def negotiate_fair_compensation(order_details: str) -> str:
     """
     print(f"--- Negotiating Fair Compensation: {order_details} ---")
     
-    # Extract order value from details
-    order_value = 500  # Default
-    if "₹" in order_details:
-        import re
-        match = re.search(r'₹(\d+)', order_details)
-        if match:
-            order_value = int(match.group(1))
+    # Order value from the details or, failing that, the customer's message this turn
+    order_value = entities_for(order_details).amount() or 500  # Default
     
     # Determine issue type and calculate base compensation
-    issue_type = "general"
-    base_percentage = 40
-    
-    if any(word in order_details.lower() for word in ["wrong", "incorrect", "different"]):
-        issue_type = "wrong_order"
-        base_percentage = 45
-    elif any(word in order_details.lower() for word in ["spilled", "damaged", "cold", "soggy"]):
-        issue_type = "quality_issue"
-        base_percentage = 50
-    elif any(word in order_details.lower() for word in ["late", "delay", "waiting"]):
-        issue_type = "delivery_delay"
-        base_percentage = 25
-    elif any(word in order_details.lower() for word in ["missing", "incomplete"]):
-        issue_type = "missing_items"
-        base_percentage = 60
+    issue_type = message_features(order_details).classify(COMPENSATION_ISSUES, "general")
+    base_percentage = COMPENSATION_PERCENTAGES[issue_type]
     
     # Calculate compensation with business considerations
     base_compensation = int(order_value * base_percentage / 100)
@@ -1629,21 +1530,21 @@ def request_visual_evidence(issue_description: str) -> str:
     print(f"--- Requesting Visual Evidence: {issue_description} ---")
     
     # Determine appropriate evidence request based on issue
-    issue_lower = issue_description.lower()
+    issue_type = message_features(issue_description).classify(EVIDENCE_REQUEST_ISSUES)
     
-    if any(word in issue_lower for word in ["spill", "damage", "mess", "leak"]):
+    if issue_type == "spilled_food":
         evidence_type = "spilled or damaged food"
         specific_request = "Could you please share a photo showing the spilled/damaged food? This will help me understand exactly what happened and ensure we address this properly."
         
-    elif any(word in issue_lower for word in ["wrong", "different", "mistake"]):
+    elif issue_type == "wrong_order":
         evidence_type = "wrong order items"
         specific_request = "Could you please take a photo of what you received versus what you ordered? This visual evidence will help me verify the mix-up and arrange the correct resolution."
         
-    elif any(word in issue_lower for word in ["packaging", "broken", "container"]):
+    elif issue_type == "packaging":
         evidence_type = "packaging condition"
         specific_request = "Could you please share a photo of the packaging/container issue? This helps us identify if this is a restaurant packaging problem or delivery handling issue."
         
-    elif any(word in issue_lower for word in ["quality", "bad", "terrible", "awful"]):
+    elif issue_type == "quality":
         evidence_type = "food quality issue"
         specific_request = "Could you please take a photo showing the quality issue with the food? Visual evidence helps us provide accurate feedback to the restaurant."
         
@@ -1684,19 +1585,7 @@ def log_customer_feedback(feedback_details: str, evidence_provided: str = "none"
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Determine feedback category
-    details_lower = feedback_details.lower()
-    category = "General"
-    
-    if any(word in details_lower for word in ["spill", "damage", "mess"]):
-        category = "Delivery Handling"
-    elif any(word in details_lower for word in ["wrong", "different", "mistake"]):
-        category = "Order Accuracy"
-    elif any(word in details_lower for word in ["packaging", "container"]):
-        category = "Packaging Quality"
-    elif any(word in details_lower for word in ["quality", "food", "taste"]):
-        category = "Food Quality"
-    elif any(word in details_lower for word in ["late", "delay", "time"]):
-        category = "Delivery Timeliness"
+    category = message_features(feedback_details).classify(FEEDBACK_ISSUES, "General")
     
     return f"""📋 **FEEDBACK LOGGED SUCCESSFULLY**
 
@@ -0,0 +1,83 @@
+# transcription.py
+# Audio upload buffering and background transcription jobs
+
+import asyncio
+import hashlib
+import inspect
+import tempfile
+
+# Bump when the AssemblyAI TranscriptionConfig in model_clients changes so cached transcripts are not reused
+TRANSCRIPTION_CONFIG_VERSION = 'universal-v1'
+
+CHUNK_SIZE = 64 * 1024
+
+
+def buffer_audio(stream, memory_limit: int, max_bytes: int):
+    """
+    Copy an uploaded audio stream into a SpooledTemporaryFile, hashing it on the way.
+    Clips up to memory_limit bytes stay in memory; only longer recordings spill to disk.
+    Returns (audio_file, sha256_hex, size). Raises ValueError if the upload exceeds max_bytes.
+    """
+    audio_file = tempfile.SpooledTemporaryFile(max_size=memory_limit, suffix='.wav')
+    digest = hashlib.sha256()
+    size = 0
+
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            audio_file.close()
+            raise ValueError(f"Audio upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+        digest.update(chunk)
+        audio_file.write(chunk)
+
+    audio_file.seek(0)
+    return audio_file, digest.hexdigest(), size
+
+
+def run_transcription(transcriber, audio_file, cache, cache_key: str) -> dict:
+    """
+    Transcribe the buffered audio, cache the transcript and return it.
+    Raises RuntimeError when the transcription service reports an error.
+    """
+    try:
+        transcript = transcriber.transcribe(audio_file)
+    finally:
+        audio_file.close()
+
+    return store_transcript(transcript, cache, cache_key)
+
+
+def store_transcript(transcript, cache, cache_key: str) -> dict:
+    """Cache a finished transcript's text; raises RuntimeError if the service reported an error"""
+    if transcript.status == "error":
+        raise RuntimeError(f"Transcription failed: {transcript.error}")
+
+    result = {
+        'text': transcript.text,
+        'confidence': transcript.confidence if hasattr(transcript, 'confidence') else 0.9
+    }
+    cache.set(cache_key, result)
+    return result
+
+
+async def transcribe_async(transcriber, audio_file, poll_seconds: float = 1.0):
+    """
+    Await a transcript without holding a thread while AssemblyAI works: the upload and
+    each status check are short calls run in a worker thread, and the waits between
+    checks are asyncio sleeps. Local stand-ins provide their own coroutine transcribe_async;
+    the SDK's transcribe_async returns a concurrent Future and blocks a pool thread, so it is
+    not used.
+    """
+    if inspect.iscoroutinefunction(getattr(transcriber, "transcribe_async", None)):
+        return await transcriber.transcribe_async(audio_file)
+
+    import assemblyai as aai
+
+    transcript = await asyncio.to_thread(transcriber.submit, audio_file)
+    while transcript.status not in (aai.TranscriptStatus.completed, aai.TranscriptStatus.error):
+        await asyncio.sleep(poll_seconds)
+        transcript = await asyncio.to_thread(aai.Transcript.get_by_id, transcript.id)
+    return transcript
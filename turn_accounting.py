@@ -0,0 +1,133 @@
+# turn_accounting.py
+# Per-turn cost and latency accounting (LangChain callbacks) and the structured turn log
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from conversation_memory import estimate_tokens
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+class TurnAccounting(BaseCallbackHandler):
+    """
+    Pass as a callback to the agent invoke to count LLM calls, prompt/completion tokens
+    and per-call and per-tool latency. Stages outside LangChain (image ingestion, vision,
+    transcription) are added with add_stage(). finish() returns the compact timings object.
+    Token counts come from the model's usage metadata when it reports them, otherwise
+    from the local estimate in conversation_memory.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+        self.running = {}
+        self.llm_ms = []
+        self.tools = []
+        self.stages = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.errors = 0
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        with self.lock:
+            self.running[run_id] = (time.perf_counter(), sum(estimate_tokens(prompt) for prompt in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompt = "\n".join(str(message.content) for batch in messages for message in batch)
+        with self.lock:
+            self.running[run_id] = (time.perf_counter(), estimate_tokens(prompt))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = None
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens"), usage.get("output_tokens")
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(generation.text) if generation else 0
+
+        with self.lock:
+            start, estimated_prompt_tokens = self.running.pop(run_id, (None, 0))
+            self.llm_ms.append(_elapsed_ms(start) if start else 0.0)
+            self.prompt_tokens += prompt_tokens if prompt_tokens is not None else estimated_prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self.lock:
+            self.running.pop(run_id, None)
+            self.errors += 1
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        with self.lock:
+            self.running[run_id] = (time.perf_counter(), (serialized or {}).get("name", "tool"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        with self.lock:
+            start, name = self.running.pop(run_id, (None, "tool"))
+            self.tools.append({"name": name, "ms": _elapsed_ms(start) if start else 0.0})
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        with self.lock:
+            start, name = self.running.pop(run_id, (None, "tool"))
+            self.tools.append({"name": name, "ms": _elapsed_ms(start) if start else 0.0, "error": True})
+            self.errors += 1
+
+    def add_stage(self, name: str, ms: float):
+        with self.lock:
+            self.stages[f"{name}_ms"] = round(self.stages.get(f"{name}_ms", 0.0) + ms, 1)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block (e.g. vision analysis) as the '<name>_ms' stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, (time.perf_counter() - start) * 1000)
+
+    def finish(self) -> dict:
+        with self.lock:
+            timings = {
+                "total_ms": _elapsed_ms(self.start),
+                "llm_calls": len(self.llm_ms),
+                "llm_ms": list(self.llm_ms),
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "tools": list(self.tools),
+            }
+            timings.update(self.stages)
+            if self.errors:
+                timings["errors"] = self.errors
+        return timings
+
+
+class TurnLog:
+    """Appends one JSON line per turn to a local file; path None disables it"""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.lock = threading.Lock()
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def write(self, record: dict):
+        if not self.path:
+            return
+        line = json.dumps(dict(record, logged_at=datetime.now().isoformat(timespec="milliseconds")),
+                          separators=(',', ':'), ensure_ascii=False, default=str)
+        try:
+            with self.lock, open(self.path, "a", encoding="utf-8") as log_file:
+                log_file.write(line + "\n")
+        except OSError as e:
+            print(f"Turn log write failed: {e}")